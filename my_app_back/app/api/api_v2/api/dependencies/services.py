@@ -1,8 +1,11 @@
+from functools import lru_cache
 from typing import Annotated
 from fastapi import Depends
 from app.api.api_v2.services.video import VideoService
 from app.api.api_v2.services.feedback import FeedbackService
+from app.api.api_v2.services.jobs import JobService, get_job_backend
 from app.api.api_v2.services.pose_evaluation import PoseEvaluationService
+from app.api.api_v2.services.rescore import RescoreService
 
 
 def get_feedback_service() -> FeedbackService:
@@ -31,9 +34,26 @@ def get_video_service(
 VideoServiceDep = Depends(get_video_service)
 
 
+@lru_cache()
 def get_pose_evaluation_service() -> PoseEvaluationService:
-    """Dependency for pose evaluation service."""
+    """Dependency for pose evaluation service, shared across requests."""
     return PoseEvaluationService()
 
 
 PoseEvaluationServiceDep = Depends(get_pose_evaluation_service)
+
+
+def get_job_service() -> JobService:
+    """Dependency for job service."""
+    return JobService(get_job_backend())
+
+
+JobServiceDep = Depends(get_job_service)
+
+
+def get_rescore_service() -> RescoreService:
+    """Dependency for rescore service."""
+    return RescoreService()
+
+
+RescoreServiceDep = Depends(get_rescore_service)
@@ -1,15 +1,27 @@
+import asyncio
+import os
 import typing as t
-import zipfile
-import io
-import json
-from fastapi import APIRouter, File, Form, status
+from fastapi import APIRouter, File, Form, HTTPException, status
 from fastapi.responses import StreamingResponse
 from fastapi import UploadFile
 
-from app.api.api_v2.api.dependencies.services import PoseEvaluationServiceDep
+from app.api.api_v2.api.dependencies.services import (
+    JobServiceDep,
+    PoseEvaluationServiceDep,
+    RescoreServiceDep,
+)
+from app.api.api_v2.services.jobs import JobService
 from app.api.api_v2.services.pose_evaluation import PoseEvaluationService
+from app.api.api_v2.services.rescore import RescoreService
+from app.api.api_v2.services.video import VideoServiceFactory
+from app.api.api_v2.schemas.job import Job
 from app.api.api_v2.schemas.pose import OutputPose
-from app.enum import ExerciseEnum
+from app.api.api_v2.schemas.rescore import RescoreRequest, RescoreResult
+from app.core.config import settings
+from app.enum import ExerciseEnum, JobStatusEnum
+
+# Seconds without events before a keep-alive comment is sent
+SSE_KEEP_ALIVE_S = 15
 
 router = APIRouter(
     prefix="/video",
@@ -17,45 +29,146 @@ router = APIRouter(
 )
 
 
+def _remove_files(paths: t.List[str]) -> None:
+    for path in paths:
+        if os.path.exists(path):
+            os.remove(path)
+
+
 @router.post(
     "/upload",
     summary="Upload a video for processing",
-    status_code=status.HTTP_201_CREATED,
-    response_model=OutputPose,
+    status_code=status.HTTP_202_ACCEPTED,
+    response_model=Job,
 )
 def upload_video(
     files: t.List[UploadFile] = File(...),
     exercise_type: ExerciseEnum = Form(...),
     user_id: str = Form(...),
     pose_evaluation_service: PoseEvaluationService = PoseEvaluationServiceDep,
+    job_service: JobService = JobServiceDep,
 ):
     """
-    Upload and analyze multiple video files for exercise form assessment.
+    Upload multiple video files for exercise form assessment. The videos are
+    analyzed in the background, poll GET /video/jobs/{job_id} for the result.
 
     Returns:
-        StreamingResponse with processed videos and analysis
+        Job with the id to poll
 
     Raises:
-        HTTPException: If file upload or processing fails
+        HTTPException: If file upload fails
     """
-    # Convert multiple UploadFiles to a single ZIP BytesIO for the service
-    zip_buffer = io.BytesIO()
-
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
+    # Each upload is streamed to its own temporary file, in chunks
+    video_paths: t.List[str] = []
+    try:
         for file in files:
-            # Read file content
-            file_content = file.file.read()
-            # Write content to zip using writestr (not write)
-            zip_file.writestr(file.filename, file_content)
-
-    # Reset buffer position to beginning
-    zip_buffer.seek(0)
-
-    # Get the pose evaluation result
-    pose_result = pose_evaluation_service.evaluate_pose(
-        file_content=zip_buffer.read(),
-        user_id=user_id,
-        exercise_type=exercise_type,
+            video_paths.append(VideoServiceFactory.save_to_temp_file(file))
+    except BaseException:
+        _remove_files(video_paths)
+        raise
+
+    def evaluate_uploaded_videos(report_progress) -> OutputPose:
+        try:
+            return pose_evaluation_service.evaluate_videos(
+                video_paths=video_paths,
+                user_id=user_id,
+                exercise_type=exercise_type,
+                report_progress=report_progress,
+            )
+        finally:
+            # Processed videos are removed by the service, this covers failures
+            _remove_files(video_paths)
+
+    return job_service.submit(evaluate_uploaded_videos)
+
+
+@router.get(
+    "/jobs/{job_id}",
+    summary="Get the status of an upload job",
+    response_model=Job,
+)
+def get_job(
+    job_id: str,
+    job_service: JobService = JobServiceDep,
+):
+    """
+    Returns:
+        Job with its status, and the OutputPose once it is done
+
+    Raises:
+        HTTPException: If the job does not exist or has expired
+    """
+    job = job_service.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+
+@router.get(
+    "/jobs/{job_id}/events",
+    summary="Stream the progress of an upload job as Server-Sent Events",
+)
+async def stream_job_events(
+    job_id: str,
+    job_service: JobService = JobServiceDep,
+):
+    """
+    Server-Sent Events with the job (see GET /video/jobs/{job_id}) every time its
+    progress changes: "progress" events while it runs, then a final "done" or
+    "error" event with the result, after which the stream ends.
+
+    Raises:
+        HTTPException: If the job does not exist or has expired
+    """
+    if job_service.get(job_id) is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+
+    async def events() -> t.AsyncIterator[str]:
+        last_data = None
+        idle_s = 0.0
+        while True:
+            job = job_service.get(job_id)
+            if job is None:
+                yield "event: error\ndata: {}\n\n"
+                return
+
+            data = job.model_dump_json()
+            if job.status in (JobStatusEnum.DONE, JobStatusEnum.ERROR):
+                yield f"event: {job.status.value}\ndata: {data}\n\n"
+                return
+            if data != last_data:
+                yield f"event: progress\ndata: {data}\n\n"
+                last_data, idle_s = data, 0.0
+            elif idle_s >= SSE_KEEP_ALIVE_S:
+                # Comment line, keeps proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+                idle_s = 0.0
+
+            await asyncio.sleep(settings.PROGRESS_EVENT_INTERVAL_S)
+            idle_s += settings.PROGRESS_EVENT_INTERVAL_S
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
     )
 
-    return pose_result
+
+@router.post(
+    "/rescore",
+    summary="Rescore stored landmark tracks with a threshold profile",
+    response_model=t.List[RescoreResult],
+)
+def rescore_sessions(
+    rescore_request: RescoreRequest,
+    rescore_service: RescoreService = RescoreServiceDep,
+):
+    """
+    Evaluate the archived landmark tracks of already processed videos again
+    (OutputPose.track_keys), with the thresholds of the given profile. No video is decoded, so it is cheap enough to
+    sweep thresholds over the whole archive.
+
+    Returns:
+        One result per session, with the new evaluation or why it failed
+    """
+    return rescore_service.rescore(rescore_request.sessions, rescore_request.profile)
@@ -22,3 +22,5 @@ class ExerciseFeedback(BaseModel):
 class ExerciseFinalEvaluation(BaseModel):
     feedback: dict[ExerciseMeasureEnum, ExerciseFeedback]
     s3_video_keys: list[str]
+    # Track archive key of the video, None if its track could not be archived
+    track_key: Optional[str] = None
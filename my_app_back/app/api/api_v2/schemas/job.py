@@ -0,0 +1,25 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+from app.api.api_v2.schemas.pose import OutputPose
+from app.enum import JobStatusEnum
+
+
+class Progress(BaseModel):
+    viewpoint: Optional[str] = None
+    stage: str
+    stage_frames: int = 0
+    stage_frames_done: int = 0
+    eta_s: Optional[float] = None
+    frames_decoded: int = 0
+    frames_inferred: int = 0
+    frames_encoded: int = 0
+
+
+class Job(BaseModel):
+    job_id: str
+    status: JobStatusEnum
+    progress: Optional[Progress] = None
+    result: Optional[OutputPose] = None
+    error: Optional[str] = None
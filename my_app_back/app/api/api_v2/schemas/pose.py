@@ -5,3 +5,6 @@ from app.api.api_v2.schemas.feedback import Feedback
 class OutputPose(BaseModel):
     feedback: Feedback
     s3_video_keys: list[str]
+    # Track archive keys of the videos whose track was archived, to rescore the
+    # session (see RescoreSession)
+    track_keys: list[str] = []
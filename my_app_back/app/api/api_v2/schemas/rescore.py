@@ -0,0 +1,24 @@
+from typing import Optional
+
+from pydantic import BaseModel
+
+from app.api.api_v2.schemas.exercise import ExerciseFinalEvaluation
+from app.api.api_v2.schemas.thresholds import ThresholdProfile
+from app.enum import ExerciseEnum
+
+
+class RescoreSession(BaseModel):
+    # Track archive key of the video, one of OutputPose.track_keys
+    track_key: str
+    exercise_type: ExerciseEnum
+
+
+class RescoreRequest(BaseModel):
+    sessions: list[RescoreSession]
+    profile: ThresholdProfile = ThresholdProfile()
+
+
+class RescoreResult(BaseModel):
+    track_key: str
+    evaluation: Optional[ExerciseFinalEvaluation] = None
+    error: Optional[str] = None
@@ -0,0 +1,31 @@
+from pydantic import BaseModel
+
+
+class SquatThresholds(BaseModel):
+    back_posture_max_angle: float = 40  # Torso angle (degrees) from the vertical
+    head_alignment_max_offset: float = 0.1  # Ear ahead of the shoulder, in pixels
+    deep_squat_min_frames: int = 30  # Frames below parallel for a PERFECT depth
+    window_size: int = 30  # Frames of the windows the segments are made of
+    window_threshold_frames: int = 10  # Flagged frames that make a window a segment
+
+
+class SideLateralRaiseThresholds(BaseModel):
+    arms_too_high_angle: float = 110  # Abduction angle (degrees) of both arms
+    arms_up_min_angle: float = 70  # Abduction angle (degrees) of both arms
+    elbow_locked_max_angle: float = 10  # Elbow bend (degrees) below it is locked
+    elbow_bend_max_angle: float = 40  # Elbow bend (degrees) above it is too much
+    symmetry_max_angle_diff: float = 10  # Abduction difference (degrees) between arms
+    shoulder_elevation_min_ratio: float = 0.05  # Shoulder travel over its elevation
+    too_high_threshold_frames: int = 5
+    generic_threshold_frames: int = 10
+
+
+class ThresholdProfile(BaseModel):
+    """
+    Thresholds of the exercise evaluations. The defaults are the ones used to
+    process uploaded videos; other profiles are used to rescore stored tracks.
+    """
+
+    name: str = "default"
+    squat: SquatThresholds = SquatThresholds()
+    side_lateral_raise: SideLateralRaiseThresholds = SideLateralRaiseThresholds()
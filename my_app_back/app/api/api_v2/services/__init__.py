@@ -4,7 +4,7 @@ from .exercise import ExerciseFactory
 from .feedback import FeedbackService
 from .pose_evaluation import PoseEvaluationService
 from .video import VideoService, VideoServiceFactory
-from .ffmepg_pipe import FFmpegPipeWriter
+from .ffmepg_pipe import FFmpegMultiOutputWriter, FFmpegPipeReader, FFmpegPipeWriter
 
 __all__ = [
     "ExerciseFactory",
@@ -12,5 +12,7 @@ __all__ = [
     "PoseEvaluationService",
     "VideoService",
     "VideoServiceFactory",
+    "FFmpegMultiOutputWriter",
+    "FFmpegPipeReader",
     "FFmpegPipeWriter",
 ]
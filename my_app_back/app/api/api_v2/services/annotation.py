@@ -0,0 +1,89 @@
+import typing as t
+
+import numpy as np
+
+
+class OverlayLayer:
+    """
+    Annotation of one measure on one frame: the pixels drawn inside a bounding box
+    at (x0, y0), premultiplied by their alpha mask.
+    """
+
+    __slots__ = ("x0", "y0", "pixels", "alpha")
+
+    def __init__(self, x0: int, y0: int, pixels: np.ndarray, alpha: np.ndarray):
+        self.x0 = x0
+        self.y0 = y0
+        self.pixels = pixels
+        self.alpha = alpha
+
+    def composite(self, frame: np.ndarray) -> None:
+        """Blend the layer onto a frame in place."""
+        h, w = self.alpha.shape
+        if not h or not w:
+            return
+        region = frame[self.y0 : self.y0 + h, self.x0 : self.x0 + w]
+        transparency = 1 - self.alpha[..., None].astype(np.float32) / 255
+        # + 0.5 rounds, the assignment truncates to uint8
+        region[:] = region * transparency + self.pixels + 0.5
+
+
+class OverlayRenderer:
+    """
+    Render measure annotations into small layers instead of full-frame copies.
+
+    The bounding box of a layer is derived from the points it annotates plus a
+    margin for the labels and arrows drawn around them. The drawing functions
+    (api_v1/services/draw.py) take points normalized to the frame they draw on, so
+    they get the points normalized to the bounding box and draw on a canvas of its
+    size. The canvas is a view of a scratch buffer reused for every layer, and
+    anything drawn outside the box is clipped.
+
+    The canvas starts black, so an anti-aliased pixel of a saturated colour (every
+    colour in ColorsEnum has a 255 channel) ends up as colour * alpha, and alpha is
+    recovered as its brightest channel.
+    """
+
+    def __init__(self):
+        self._scratch = np.empty(0, dtype=np.uint8)
+
+    def _get_canvas(self, h: int, w: int) -> np.ndarray:
+        if self._scratch.size < h * w * 3:
+            self._scratch = np.empty(h * w * 3, dtype=np.uint8)
+        canvas = self._scratch[: h * w * 3].reshape(h, w, 3)
+        canvas.fill(0)
+        return canvas
+
+    def render(
+        self,
+        frame_shape: tuple,
+        points: t.List[np.ndarray],
+        draw: t.Callable[..., t.Any],
+        margin: int,
+        full_width: bool = False,
+    ) -> OverlayLayer:
+        """
+        Call draw(canvas, *points) with the points (normalized (x, y)) moved into
+        the bounding box, and return what it drew as a layer.
+        """
+        frame_h, frame_w = frame_shape[:2]
+        pixels = np.asarray(points, dtype=np.float64) * (frame_w, frame_h)
+
+        x0 = max(0, int(pixels[:, 0].min()) - margin)
+        x1 = min(frame_w, int(pixels[:, 0].max()) + margin + 1)
+        if full_width:
+            x0, x1 = 0, frame_w
+        y0 = max(0, int(pixels[:, 1].min()) - margin)
+        y1 = min(frame_h, int(pixels[:, 1].max()) + margin + 1)
+        if x1 <= x0 or y1 <= y0:
+            # The points are out of the frame, nothing to draw
+            return OverlayLayer(
+                0, 0, np.zeros((0, 0, 3), np.uint8), np.zeros((0, 0), np.uint8)
+            )
+
+        h, w = y1 - y0, x1 - x0
+        canvas = self._get_canvas(h, w)
+        local_points = (pixels - (x0, y0)) / (w, h)
+        draw(canvas, *local_points)
+
+        return OverlayLayer(x0, y0, canvas.copy(), canvas.max(axis=2))
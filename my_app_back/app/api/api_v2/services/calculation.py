@@ -1,38 +1,99 @@
 import numpy as np
 
+from app.utils import calculate_angles
+
 
 class CalculationService:
+    """
+    Measures over joints. The *_batch methods work on arrays of points with shape
+    (N, 2), i.e. LandmarkTrack.points(...) of N frames, and return (N,) arrays.
+    The scalar methods take one point per joint and are thin wrappers over them.
+    """
+
     def scale_point(self, point, image_shape):
         h, w = image_shape[:2]
         return (int(point[0] * w), int(point[1] * h))
 
-    def squat_back_posture_calculations(self, shoulder, hip, frame_shape) -> int:
-        shoulder = self.scale_point(shoulder, frame_shape)
-        hip = self.scale_point(hip, frame_shape)
+    def scale_points(self, points: np.ndarray, image_shape) -> np.ndarray:
+        h, w = image_shape[:2]
+        # astype truncates toward zero like int() in scale_point
+        return (np.asarray(points, dtype=np.float64) * (w, h)).astype(np.int64)
 
-        torso_vec = np.array(shoulder) - np.array(hip)
-        # Normalize the vector to get only the direction
-        torso_norm = np.linalg.norm(torso_vec)
-        torso_norm_is_zero = torso_norm < 1e-6
+    # #########################################################################
+    # Generic measures
+    # #########################################################################
+
+    def angles(self, a: np.ndarray, b: np.ndarray, c: np.ndarray) -> np.ndarray:
+        """Angle at b of the joints a-b-c, in degrees. Degenerate angles are 0."""
+        return calculate_angles(a, b, c)
+
+    def joint_angles(self, points: np.ndarray, a: int, b: int, c: int) -> np.ndarray:
+        """Angle at joint b for (N, 33, 2) points of N frames, i.e. LandmarkTrack.xy()."""
+        return calculate_angles(points[..., a, :], points[..., b, :], points[..., c, :])
+
+    def offsets(self, p: np.ndarray, q: np.ndarray, axis: int) -> np.ndarray:
+        """Signed offset p - q along an axis (0 for x, 1 for y)."""
+        return np.asarray(p)[..., axis] - np.asarray(q)[..., axis]
+
+    def distances(self, p: np.ndarray, q: np.ndarray) -> np.ndarray:
+        """Euclidean distance between p and q."""
+        return np.linalg.norm(np.asarray(p) - np.asarray(q), axis=-1)
 
-        if not torso_norm_is_zero:
-            vertical_vec = np.array([0, -1])  # Opposite to gravity vector
-            cos_theta = np.dot(torso_vec, vertical_vec) / torso_norm
-            raw_angle = np.degrees(np.arccos(np.clip(cos_theta, -1.0, 1.0)))
-            angle_deg = int(min(raw_angle, 180 - raw_angle))
+    # #########################################################################
+    # Squat
+    # #########################################################################
 
+    def squat_back_posture_calculations_batch(
+        self, shoulders: np.ndarray, hips: np.ndarray, frame_shape
+    ) -> np.ndarray:
+        torso_vec = self.scale_points(shoulders, frame_shape) - self.scale_points(
+            hips, frame_shape
+        )
+        torso_norm = np.hypot(torso_vec[:, 0], torso_vec[:, 1])
+        torso_norm_is_zero = torso_norm < 1e-6
+
+        # Dot product with the vertical vector (0, -1), opposite to gravity
+        cos_theta = -torso_vec[:, 1] / np.where(torso_norm_is_zero, 1.0, torso_norm)
+        raw_angle = np.degrees(np.arccos(np.clip(cos_theta, -1.0, 1.0)))
+        angle_deg = np.minimum(raw_angle, 180 - raw_angle).astype(np.int64)
+        angle_deg[torso_norm_is_zero] = 0
         return angle_deg
 
-    def squat_depth_calculations(self, hip, knee, frame_shape) -> int:
-        hip = self.scale_point(hip, frame_shape)
-        knee = self.scale_point(knee, frame_shape)
+    def squat_depth_calculations_batch(
+        self, hips: np.ndarray, knees: np.ndarray, frame_shape
+    ) -> np.ndarray:
+        return self.offsets(
+            self.scale_points(hips, frame_shape),
+            self.scale_points(knees, frame_shape),
+            axis=1,
+        )
 
-        depth = hip[1] - knee[1]
-        return depth
+    def squat_head_alignment_calculations_batch(
+        self, ears: np.ndarray, shoulders: np.ndarray, frame_shape
+    ) -> np.ndarray:
+        return self.offsets(
+            self.scale_points(ears, frame_shape),
+            self.scale_points(shoulders, frame_shape),
+            axis=0,
+        )
 
-    def squat_head_alignment_calculations(self, ear, shoulder, frame_shape) -> float:
-        ear = self.scale_point(ear, frame_shape)
-        shoulder = self.scale_point(shoulder, frame_shape)
+    def squat_back_posture_calculations(self, shoulder, hip, frame_shape) -> int:
+        return int(
+            self.squat_back_posture_calculations_batch(
+                np.reshape(shoulder, (1, 2)), np.reshape(hip, (1, 2)), frame_shape
+            )[0]
+        )
+
+    def squat_depth_calculations(self, hip, knee, frame_shape) -> int:
+        return int(
+            self.squat_depth_calculations_batch(
+                np.reshape(hip, (1, 2)), np.reshape(knee, (1, 2)), frame_shape
+            )[0]
+        )
 
-        horizontal_offset = ear[0] - shoulder[0]
-        return horizontal_offset
+    def squat_head_alignment_calculations(self, ear, shoulder, frame_shape) -> float:
+        return int(
+            self.squat_head_alignment_calculations_batch(
+                np.reshape(ear, (1, 2)), np.reshape(shoulder, (1, 2)), frame_shape
+            )[0]
+        )
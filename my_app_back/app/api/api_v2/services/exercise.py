@@ -1,9 +1,9 @@
 import typing as t
 from datetime import datetime
+from concurrent.futures import wait
 import mediapipe as mp
 import numpy as np
 from mediapipe.framework.formats import landmark_pb2
-from mediapipe.framework.formats.landmark_pb2 import NormalizedLandmarkList
 import uuid
 
 
@@ -16,6 +16,11 @@ from app.api.api_v1.services.exercise import (
     draw_pullup_arms_nearly_extended,
     calculate_angle,
 )
+from app.api.api_v2.schemas.thresholds import (
+    SideLateralRaiseThresholds,
+    SquatThresholds,
+    ThresholdProfile,
+)
 from app.api.api_v2.schemas.exercise import (
     ExerciseFeedback,
     ExerciseFinalEvaluation,
@@ -26,8 +31,14 @@ from app.constants import (
     MAPPING_EXERCISE_TO_EXERCISE_MEASURES,
 )
 from app.enum import ExerciseEnum, ExerciseMeasureEnum, ExerciseRatingEnum
-from app.api.api_v2.services.ffmepg_pipe import FFmpegPipeWriter
+from app.api.api_v2.services.ffmepg_pipe import (
+    FFmpegMultiOutputWriter,
+    FFmpegPipeWriter,
+)
+from app.api.api_v2.services.annotation import OverlayLayer, OverlayRenderer
 from app.api.api_v2.services.calculation import CalculationService
+from app.api.api_v2.services.landmark_track import LandmarkTrack, PoseLandmark
+from app.core.config import settings
 
 
 """
@@ -61,20 +72,29 @@ frames se pasarán por este filtro, asegurándonos que la curva resultante es su
 
 class ExerciseFactory:
     @staticmethod
-    def get_exercise_strategy_service(exercise_type: ExerciseEnum, total_frames: int):
+    def get_exercise_strategy_service(
+        exercise_type: ExerciseEnum,
+        total_frames: int,
+        profile: t.Optional[ThresholdProfile] = None,
+    ):
+        profile = profile or ThresholdProfile()
         if exercise_type == ExerciseEnum.SQUAT:
-            return ExerciseSquad(total_frames)
+            return ExerciseSquad(total_frames, profile.squat)
         elif exercise_type == ExerciseEnum.BENCH_PRESS:
             return ExerciseBenchPress(total_frames)
         elif exercise_type == ExerciseEnum.PULL_UP:
             return ExercisePullUp(total_frames)
         elif exercise_type == ExerciseEnum.SIDE_LATERAL_RAISE:
-            return ExerciseSideLateralRaises(total_frames)
+            return ExerciseSideLateralRaises(total_frames, profile.side_lateral_raise)
         else:
             raise ValueError(f"Exercise {exercise_type} not supported")
 
 
 class BaseExerciseService:
+    supports_track_evaluation = False
+    # Feedback can be built before rendering, to only render flagged segments
+    supports_segment_rendering = False
+
     def __init__(self, exercise: ExerciseEnum, total_frames: int):
         self.exercise = exercise
         self.total_frames = total_frames
@@ -83,8 +103,23 @@ class BaseExerciseService:
         self.window_size = 30
         self.window_threshold_frames = 10
 
+        # Names the annotated videos (and their storage keys) of this evaluation
+        # apart from those of the evaluations running at the same time
+        self.output_id = uuid.uuid4().hex
         # FFmpeg writers for the feedback annotated videos
         self.writers: dict[ExerciseMeasureEnum, FFmpegPipeWriter] = {}
+        # Single ffmpeg process for all the measures (VIDEO_SHARED_ENCODER)
+        self.shared_writer: t.Optional[FFmpegMultiOutputWriter] = None
+        self.shared_writer_measures: t.List[ExerciseMeasureEnum] = []
+
+        # Annotations are drawn as small overlay layers, see write_annotation_layers
+        self.overlay_renderer = OverlayRenderer()
+        self._composition: t.Optional[np.ndarray] = None
+
+        # Frame ranges to annotate per measure, None annotates every measure
+        self.render_ranges: t.Optional[
+            dict[ExerciseMeasureEnum, t.List[t.Tuple[int, int]]]
+        ] = None
 
         self.calculation_service = CalculationService()
 
@@ -96,28 +131,177 @@ class BaseExerciseService:
         """
         if measure in self.writers:
             return self.writers[measure]
-        out_path = f"/tmp/{measure.value}.{datetime.now().strftime('%Y-%m-%d')}.mp4"
         self.writers[measure] = FFmpegPipeWriter(
-            out_path, w, h, fps=6, crf=22, preset="veryfast"
+            self._get_video_path(measure),
+            w,
+            h,
+            fps=6,
+            crf=22,
+            preset="veryfast",
+            queue_slots=settings.VIDEO_WRITER_QUEUE_SLOTS,
+            backpressure=settings.VIDEO_WRITER_BACKPRESSURE,
         )
         return self.writers[measure]
 
+    def _get_video_path(self, measure: ExerciseMeasureEnum) -> str:
+        date = datetime.now().strftime("%Y-%m-%d")
+        return f"/tmp/{measure.value}.{date}.{self.output_id}.mp4"
+
+    def write_annotation_layers(
+        self, frame_img: np.ndarray, layers: dict[ExerciseMeasureEnum, OverlayLayer]
+    ) -> None:
+        """
+        Encode one annotated video frame per measure. The layers are composited on
+        the base frame only here, directly into the encoder input when the shared
+        encoder is used, or into a single reusable buffer otherwise.
+
+        The shared encoder (VIDEO_SHARED_ENCODER) needs every measure to get every
+        frame, so it only applies when whole videos are rendered: with
+        VIDEO_TWO_PASS off, or for exercises without segment rendering.
+        """
+        h, w = frame_img.shape[:2]
+        # With render ranges every measure has its own frames, so its own writer
+        if not settings.VIDEO_SHARED_ENCODER or self.render_ranges is not None:
+            if self._composition is None or self._composition.shape != frame_img.shape:
+                self._composition = np.empty_like(frame_img)
+            for measure, layer in layers.items():
+                np.copyto(self._composition, frame_img)
+                layer.composite(self._composition)
+                self.get_writer(measure, w, h).write(self._composition)
+            return
+
+        if self.shared_writer is None:
+            self.shared_writer_measures = list(layers)
+            self.shared_writer = FFmpegMultiOutputWriter(
+                [self._get_video_path(measure) for measure in layers],
+                w,
+                h,
+                fps=6,
+                crf=22,
+                preset="veryfast",
+                queue_slots=settings.VIDEO_WRITER_QUEUE_SLOTS,
+                backpressure=settings.VIDEO_WRITER_BACKPRESSURE,
+            )
+        if not self.shared_writer.begin_frame():
+            # Dropped by the writer backpressure policy
+            return
+        for measure, layer in layers.items():
+            tile = self.shared_writer.tile(self.shared_writer_measures.index(measure))
+            np.copyto(tile, frame_img)
+            layer.composite(tile)
+        self.shared_writer.write_tiles()
+
+    def build_feedback(self) -> dict[ExerciseMeasureEnum, ExerciseFeedback]:
+        """
+        Rate the evaluated measures without closing the writers, i.e. to pick the
+        segments to render or to rescore a stored track.
+        """
+        raise NotImplementedError(
+            f"Exercise {self.exercise} does not support building the feedback alone"
+        )
+
+    def get_render_ranges(
+        self, preview_start: int, preview_frames: int
+    ) -> dict[ExerciseMeasureEnum, t.List[t.Tuple[int, int]]]:
+        """
+        Frame ranges worth annotating for each measure: the segments of the measures
+        rated WARNING or DANGEROUS, and a short preview from preview_start for the
+        PERFECT ones.
+        """
+        render_ranges = {}
+        for measure, feedback in self.build_feedback().items():
+            if feedback.rating == ExerciseRatingEnum.PERFECT:
+                preview_end = min(preview_start + preview_frames, self.total_frames)
+                render_ranges[measure] = [(preview_start, preview_end)]
+                continue
+
+            ranges = []
+            for segment in feedback.video_segments:
+                if segment.applies_to_full_video:
+                    ranges = [(0, self.total_frames)]
+                    break
+                ranges.append((segment.start_frame, segment.end_frame))
+            render_ranges[measure] = ranges
+        return render_ranges
+
+    def measures_to_annotate(
+        self, frame_index: int, measures: t.List[ExerciseMeasureEnum]
+    ) -> t.List[ExerciseMeasureEnum]:
+        """The measures whose render ranges include the frame."""
+        if self.render_ranges is None:
+            return measures
+        return [
+            measure
+            for measure in measures
+            if any(
+                start <= frame_index < end
+                for start, end in self.render_ranges.get(measure, [])
+            )
+        ]
+
+    def close_writers(self) -> t.List[str]:
+        """
+        Finish the annotated videos and upload them. Returns their S3 keys.
+        The writers are closed and uploaded concurrently, so the wait is about
+        the slowest video rather than the sum of all of them.
+        """
+        futures = [writer.close_and_upload_async() for writer in self.writers.values()]
+        if self.shared_writer is not None:
+            futures.extend(self.shared_writer.close_and_upload_async())
+        # Let every upload finish (and clean up) before raising a failed one
+        wait(futures)
+        return [future.result() for future in futures]
+
     def evaluate_frame(
         self,
         frame_img: np.ndarray,
         frame: int,
-        landmarks: NormalizedLandmarkList,
+        track: LandmarkTrack,
     ):
         raise NotImplementedError("Subclasses must implement this method")
 
+    def evaluate_track(self, track: LandmarkTrack, frame_shape: tuple) -> None:
+        """
+        Batch evaluation mode: compute the measures of every frame of the landmark
+        track at once, instead of calling evaluate_frame frame by frame. Videos are
+        only processed this way when supports_track_evaluation is True, stored
+        tracks are rescored this way whenever it is implemented.
+        """
+        raise NotImplementedError(
+            f"Exercise {self.exercise} does not support batch evaluation"
+        )
+
+    def should_annotate(self, frame_index: int) -> bool:
+        """
+        Whether the frame has to be sent to annotate_frame. Annotation runs on its
+        own pipeline stage, so it must only depend on its arguments and the writers.
+        """
+        return False
+
+    def annotate_frame(
+        self,
+        frame_img: np.ndarray,
+        frame_index: int,
+        track: LandmarkTrack,
+    ):
+        pass
+
     def get_final_evaluation(self) -> dict[ExerciseMeasureEnum, ExerciseFeedback]:
         raise NotImplementedError("Subclasses must implement this method")
 
 
 class ExerciseSquad(BaseExerciseService):
-    def __init__(self, total_frames: int):
+    supports_track_evaluation = True
+    supports_segment_rendering = True
+
+    def __init__(
+        self, total_frames: int, thresholds: t.Optional[SquatThresholds] = None
+    ):
         exercise = ExerciseEnum.SQUAT
         super().__init__(exercise, total_frames)
+        self.thresholds = thresholds or SquatThresholds()
+        self.window_size = self.thresholds.window_size
+        self.window_threshold_frames = self.thresholds.window_threshold_frames
 
         # Measures
         self.measures = MAPPING_EXERCISE_TO_EXERCISE_MEASURES[exercise]
@@ -127,78 +311,95 @@ class ExerciseSquad(BaseExerciseService):
         self.deep_squad_frames = 0
         self.head_alignment = np.zeros(self.total_frames, dtype=np.uint8)
 
-    def set_relevant_landmark_points(self, landmarks: NormalizedLandmarkList):
-        # Get landmark coordinates using landmark indices
-        left_hip = landmarks.landmark[mp.solutions.pose.PoseLandmark.LEFT_HIP.value]
-        left_knee = landmarks.landmark[mp.solutions.pose.PoseLandmark.LEFT_KNEE.value]
-        left_shoulder = landmarks.landmark[
-            mp.solutions.pose.PoseLandmark.LEFT_SHOULDER.value
-        ]
-        left_ear = landmarks.landmark[mp.solutions.pose.PoseLandmark.LEFT_EAR.value]
+    def get_relevant_landmark_points(self, frame_index: int, track: LandmarkTrack):
+        hip = track.point(frame_index, PoseLandmark.LEFT_HIP)
+        knee = track.point(frame_index, PoseLandmark.LEFT_KNEE)
+        shoulder = track.point(frame_index, PoseLandmark.LEFT_SHOULDER)
+        ear = track.point(frame_index, PoseLandmark.LEFT_EAR)
+        return hip, knee, shoulder, ear
 
-        # Convert landmarks to points for angle calculation
-        self.hip = [float(left_hip.x), float(left_hip.y)]
-        self.knee = [float(left_knee.x), float(left_knee.y)]
-        self.shoulder = [float(left_shoulder.x), float(left_shoulder.y)]
-        self.ear = [float(left_ear.x), float(left_ear.y)]
+    def should_annotate(self, frame_index: int) -> bool:
+        # We only annotate every 5 frames to reduce the number of frames.
+        return frame_index % 5 == 0
 
     def annotate_frame(
         self,
         frame_img: np.ndarray,
-        w: int,
-        h: int,
-        back_posture_angle_deg: int,
-        depth: int,
-        max_offset: int,
+        frame_index: int,
+        track: LandmarkTrack,
     ):
-        copy_frame_back_posture = frame_img.copy()
-        draw_back_posture(
-            frame=copy_frame_back_posture,
-            shoulder=self.shoulder,
-            hip=self.hip,
-            max_offset=max_offset,
-        )
-        copy_frame_squad_depth = frame_img.copy()
-        draw_squad_depth(
-            frame=copy_frame_squad_depth, knee=self.knee, hip=self.hip, depth=depth
+        hip, knee, shoulder, ear = self.get_relevant_landmark_points(frame_index, track)
+        depth = self.calculation_service.squat_depth_calculations(
+            hip, knee, frame_img.shape
         )
-        copy_frame_head_alignment = frame_img.copy()
-        draw_head_alignment(
-            frame=copy_frame_head_alignment,
-            ear=self.ear,
-            shoulder=self.shoulder,
-            max_offset=max_offset,
+        horizontal_offset = self.calculation_service.squat_head_alignment_calculations(
+            ear, shoulder, frame_img.shape
         )
 
-        self.get_writer(ExerciseMeasureEnum.SQUAT_BACK_POSTURE, w, h).write(
-            copy_frame_back_posture
-        )
-        self.get_writer(ExerciseMeasureEnum.SQUAT_DEPTH, w, h).write(
-            copy_frame_squad_depth
-        )
-        self.get_writer(ExerciseMeasureEnum.HEAD_ALIGNMENT, w, h).write(
-            copy_frame_head_alignment
-        )
+        render = self.overlay_renderer.render
+        layer_renderers = {
+            # Margins fit the gravity arrows and the angle label around the hip
+            ExerciseMeasureEnum.SQUAT_BACK_POSTURE: lambda: render(
+                frame_img.shape,
+                [shoulder, hip],
+                lambda frame, shoulder, hip: draw_back_posture(
+                    frame=frame,
+                    shoulder=shoulder,
+                    hip=hip,
+                    max_offset=horizontal_offset,
+                ),
+                margin=220,
+            ),
+            # The knee line spans the whole width
+            ExerciseMeasureEnum.SQUAT_DEPTH: lambda: render(
+                frame_img.shape,
+                [knee, hip],
+                lambda frame, knee, hip: draw_squad_depth(
+                    frame=frame, knee=knee, hip=hip, depth=depth
+                ),
+                margin=30,
+                full_width=True,
+            ),
+            ExerciseMeasureEnum.HEAD_ALIGNMENT: lambda: render(
+                frame_img.shape,
+                [ear, shoulder],
+                lambda frame, ear, shoulder: draw_head_alignment(
+                    frame=frame,
+                    ear=ear,
+                    shoulder=shoulder,
+                    max_offset=horizontal_offset,
+                ),
+                margin=160,
+            ),
+        }
+        layers = {
+            measure: layer_renderers[measure]()
+            for measure in self.measures_to_annotate(
+                frame_index, list(layer_renderers)
+            )
+        }
+        if layers:
+            self.write_annotation_layers(frame_img, layers)
 
     def evaluate_frame(
-        self, frame_img: np.ndarray, frame_index: int, landmarks: NormalizedLandmarkList
+        self, frame_img: np.ndarray, frame_index: int, track: LandmarkTrack
     ):
-        self.set_relevant_landmark_points(landmarks)
+        hip, knee, shoulder, ear = self.get_relevant_landmark_points(frame_index, track)
         # #########################################################################
         # [SQUAD-01] Back Posture:
         # #########################################################################
         # Define a line going down from the hip
         back_posture_angle = self.calculation_service.squat_back_posture_calculations(
-            self.shoulder, self.hip, frame_img.shape
+            shoulder, hip, frame_img.shape
         )
-        if back_posture_angle > 40:
+        if back_posture_angle > self.thresholds.back_posture_max_angle:
             self.back_posture[frame_index] = 1
 
         # #########################################################################
         # [SQUAD-02] Squad depth:
         # #########################################################################
         depth = self.calculation_service.squat_depth_calculations(
-            self.hip, self.knee, frame_img.shape
+            hip, knee, frame_img.shape
         )
         if depth > 0:
             self.deep_squad_frames += 1
@@ -207,24 +408,48 @@ class ExerciseSquad(BaseExerciseService):
         # [SQUAD-03] Head alignment:
         # #########################################################################
         horizontal_offset = self.calculation_service.squat_head_alignment_calculations(
-            self.ear, self.shoulder, frame_img.shape
+            ear, shoulder, frame_img.shape
         )
-        max_offset = 0.1
-        if horizontal_offset > max_offset:
+        if horizontal_offset > self.thresholds.head_alignment_max_offset:
             self.head_alignment[frame_index] = 1
 
-        # #########################################################################
-        # Draw feedback. We only annotate every 5 frames to reduce the number of frames.
-        # #########################################################################
-        if frame_index % 5 == 0:
-            self.annotate_frame(
-                frame_img,
-                w=frame_img.shape[1],
-                h=frame_img.shape[0],
-                back_posture_angle_deg=back_posture_angle,
-                depth=depth,
-                max_offset=horizontal_offset,
+        # Feedback drawing is done by annotate_frame on the annotation stage
+
+    def evaluate_track(self, track: LandmarkTrack, frame_shape: tuple) -> None:
+        # Same measures as evaluate_frame, for all the detected frames at once
+        frames = np.flatnonzero(track.detected[: self.total_frames])
+        hips = track.points(PoseLandmark.LEFT_HIP)[frames]
+        knees = track.points(PoseLandmark.LEFT_KNEE)[frames]
+        shoulders = track.points(PoseLandmark.LEFT_SHOULDER)[frames]
+        ears = track.points(PoseLandmark.LEFT_EAR)[frames]
+
+        # [SQUAD-01] Back Posture
+        back_posture_angles = (
+            self.calculation_service.squat_back_posture_calculations_batch(
+                shoulders, hips, frame_shape
             )
+        )
+        self.back_posture[:] = 0
+        self.back_posture[
+            frames[back_posture_angles > self.thresholds.back_posture_max_angle]
+        ] = 1
+
+        # [SQUAD-02] Squad depth
+        depths = self.calculation_service.squat_depth_calculations_batch(
+            hips, knees, frame_shape
+        )
+        self.deep_squad_frames = int(np.count_nonzero(depths > 0))
+
+        # [SQUAD-03] Head alignment
+        horizontal_offsets = (
+            self.calculation_service.squat_head_alignment_calculations_batch(
+                ears, shoulders, frame_shape
+            )
+        )
+        self.head_alignment[:] = 0
+        self.head_alignment[
+            frames[horizontal_offsets > self.thresholds.head_alignment_max_offset]
+        ] = 1
 
     def _get_relevant_video_segments(
         self,
@@ -255,16 +480,17 @@ class ExerciseSquad(BaseExerciseService):
         self,
     ) -> ExerciseFinalEvaluation:
         # Upload all the videos to S3
-        s3_video_keys = []
-        for _, writer in self.writers.items():
-            s3_video_key = writer.close_and_upload()
-            s3_video_keys.append(s3_video_key)
+        s3_video_keys = self.close_writers()
 
-        # Get the feedback
+        return ExerciseFinalEvaluation(
+            feedback=self.build_feedback(),
+            s3_video_keys=s3_video_keys,
+        )
+
+    def build_feedback(self) -> dict[ExerciseMeasureEnum, ExerciseFeedback]:
         feedback: dict[ExerciseMeasureEnum, ExerciseFeedback] = {}
 
-        deep_squad_threshold = 30
-        if self.deep_squad_frames < deep_squad_threshold:
+        if self.deep_squad_frames < self.thresholds.deep_squat_min_frames:
             feedback[ExerciseMeasureEnum.SQUAT_DEPTH] = ExerciseFeedback(
                 rating=ExerciseRatingEnum.WARNING,
                 comment=MAPPING_EXERCISE_MEASURE_TO_COMMENT[ExerciseEnum.SQUAT][
@@ -321,10 +547,7 @@ class ExerciseSquad(BaseExerciseService):
                 video_segments=[VideoSegment(applies_to_full_video=True)],
             )
 
-        return ExerciseFinalEvaluation(
-            feedback=feedback,
-            s3_video_keys=s3_video_keys,
-        )
+        return feedback
 
 
 class ExerciseBenchPress(BaseExerciseService):
@@ -336,11 +559,11 @@ class ExerciseBenchPress(BaseExerciseService):
         for measure in MAPPING_EXERCISE_TO_EXERCISE_MEASURES[ExerciseEnum.BENCH_PRESS]:
             self.videos[measure] = []
 
-    def evaluate_frame(
-        self, frame_img: np.ndarray, frame: int, landmarks: NormalizedLandmarkList
-    ):
+    def evaluate_frame(self, frame_img: np.ndarray, frame: int, track: LandmarkTrack):
         mp.solutions.drawing_utils.draw_landmarks(
-            frame_img, landmarks, mp.solutions.pose.POSE_CONNECTIONS
+            frame_img,
+            track.to_landmark_list(frame),
+            mp.solutions.pose.POSE_CONNECTIONS,
         )
         self.videos[ExerciseMeasureEnum.BASIC_LANDMARKS].append(frame_img)
 
@@ -369,48 +592,19 @@ class ExercisePullUp(BaseExerciseService):
         for measure in MAPPING_EXERCISE_TO_EXERCISE_MEASURES[ExerciseEnum.PULL_UP]:
             self.videos[measure] = []
 
-    def evaluate_frame(
-        self, frame_img: np.ndarray, frame: int, landmarks: NormalizedLandmarkList
-    ):
-        # Get landmark coordinates using landmark indices
-        left_hip = landmarks.landmark[mp.solutions.pose.PoseLandmark.LEFT_HIP.value]
-        right_hip = landmarks.landmark[mp.solutions.pose.PoseLandmark.RIGHT_HIP.value]
-        left_shoulder = landmarks.landmark[
-            mp.solutions.pose.PoseLandmark.LEFT_SHOULDER.value
-        ]
-        right_shoulder = landmarks.landmark[
-            mp.solutions.pose.PoseLandmark.RIGHT_SHOULDER.value
-        ]
-        left_elbow = landmarks.landmark[mp.solutions.pose.PoseLandmark.LEFT_ELBOW.value]
-        left_wrist = landmarks.landmark[mp.solutions.pose.PoseLandmark.LEFT_WRIST.value]
-        left_ear = landmarks.landmark[mp.solutions.pose.PoseLandmark.LEFT_EAR.value]
-        right_ear = landmarks.landmark[mp.solutions.pose.PoseLandmark.RIGHT_EAR.value]
-        left_mouth = landmarks.landmark[mp.solutions.pose.PoseLandmark.MOUTH_LEFT.value]
-        left_index_finger = landmarks.landmark[
-            mp.solutions.pose.PoseLandmark.LEFT_INDEX.value
-        ]
-        right_index_finger = landmarks.landmark[
-            mp.solutions.pose.PoseLandmark.RIGHT_INDEX.value
-        ]
-
-        # Convert landmarks to points for angle calculation
-        right_hip = [float(right_hip.x), float(right_hip.y)]
-        left_hip = [float(left_hip.x), float(left_hip.y)]
-        left_shoulder = [float(left_shoulder.x), float(left_shoulder.y)]
-        right_shoulder = [float(right_shoulder.x), float(right_shoulder.y)]
-        left_elbow = [float(left_elbow.x), float(left_elbow.y)]
-        left_wrist = [float(left_wrist.x), float(left_wrist.y)]
-        left_ear = [float(left_ear.x), float(left_ear.y)]
-        right_ear = [float(right_ear.x), float(right_ear.y)]
-        left_mouth = [float(left_mouth.x), float(left_mouth.y)]
-        left_index_finger = [
-            float(left_index_finger.x),
-            float(left_index_finger.y),
-        ]
-        right_index_finger = [
-            float(right_index_finger.x),
-            float(right_index_finger.y),
-        ]
+    def evaluate_frame(self, frame_img: np.ndarray, frame: int, track: LandmarkTrack):
+        # Get landmark coordinates from the landmark track
+        left_hip = track.point(frame, PoseLandmark.LEFT_HIP)
+        right_hip = track.point(frame, PoseLandmark.RIGHT_HIP)
+        left_shoulder = track.point(frame, PoseLandmark.LEFT_SHOULDER)
+        right_shoulder = track.point(frame, PoseLandmark.RIGHT_SHOULDER)
+        left_elbow = track.point(frame, PoseLandmark.LEFT_ELBOW)
+        left_wrist = track.point(frame, PoseLandmark.LEFT_WRIST)
+        left_ear = track.point(frame, PoseLandmark.LEFT_EAR)
+        right_ear = track.point(frame, PoseLandmark.RIGHT_EAR)
+        left_mouth = track.point(frame, PoseLandmark.MOUTH_LEFT)
+        left_index_finger = track.point(frame, PoseLandmark.LEFT_INDEX)
+        right_index_finger = track.point(frame, PoseLandmark.RIGHT_INDEX)
 
         # [PULLUP-01] Full range of motion:
 
@@ -458,7 +652,9 @@ class ExercisePullUp(BaseExerciseService):
             self.shoulder_correct_position[frame] = 1
 
         mp.solutions.drawing_utils.draw_landmarks(
-            frame_img, landmarks, mp.solutions.pose.POSE_CONNECTIONS
+            frame_img,
+            track.to_landmark_list(frame),
+            mp.solutions.pose.POSE_CONNECTIONS,
         )
 
     def _get_relevant_video_segments(
@@ -573,8 +769,13 @@ class ExercisePullUp(BaseExerciseService):
 
 
 class ExerciseSideLateralRaises(BaseExerciseService):
-    def __init__(self, total_frames: int):
+    def __init__(
+        self,
+        total_frames: int,
+        thresholds: t.Optional[SideLateralRaiseThresholds] = None,
+    ):
         super().__init__(ExerciseEnum.SIDE_LATERAL_RAISE, total_frames)
+        self.thresholds = thresholds or SideLateralRaiseThresholds()
 
         # Initial values for the feedback experimentation:
         self.arms_abduction_up_correct_position = [0] * self.total_frames
@@ -591,49 +792,34 @@ class ExerciseSideLateralRaises(BaseExerciseService):
         ]:
             self.videos[measure] = []
 
-    def evaluate_frame(
-        self, frame_img: np.ndarray, frame: int, landmarks: NormalizedLandmarkList
-    ):
-        # Get landmark coordinates using landmark indices
-        left_hip = landmarks.landmark[mp.solutions.pose.PoseLandmark.LEFT_HIP.value]
-        right_hip = landmarks.landmark[mp.solutions.pose.PoseLandmark.RIGHT_HIP.value]
-        left_shoulder = landmarks.landmark[
-            mp.solutions.pose.PoseLandmark.LEFT_SHOULDER.value
-        ]
-        right_shoulder = landmarks.landmark[
-            mp.solutions.pose.PoseLandmark.RIGHT_SHOULDER.value
-        ]
-        left_elbow = landmarks.landmark[mp.solutions.pose.PoseLandmark.LEFT_ELBOW.value]
-        right_elbow = landmarks.landmark[
-            mp.solutions.pose.PoseLandmark.RIGHT_ELBOW.value
-        ]
-        left_wrist = landmarks.landmark[mp.solutions.pose.PoseLandmark.LEFT_WRIST.value]
-        right_wrist = landmarks.landmark[
-            mp.solutions.pose.PoseLandmark.RIGHT_WRIST.value
-        ]
-
-        # Convert landmarks to points for angle calculation
-        right_hip = [float(right_hip.x), float(right_hip.y)]
-        left_hip = [float(left_hip.x), float(left_hip.y)]
-        left_shoulder = [float(left_shoulder.x), float(left_shoulder.y)]
-        right_shoulder = [float(right_shoulder.x), float(right_shoulder.y)]
-        left_elbow = [float(left_elbow.x), float(left_elbow.y)]
-        right_elbow = [float(right_elbow.x), float(right_elbow.y)]
-        left_wrist = [float(left_wrist.x), float(left_wrist.y)]
-        right_wrist = [float(right_wrist.x), float(right_wrist.y)]
+    def evaluate_frame(self, frame_img: np.ndarray, frame: int, track: LandmarkTrack):
+        # Get landmark coordinates from the landmark track
+        left_hip = track.point(frame, PoseLandmark.LEFT_HIP)
+        right_hip = track.point(frame, PoseLandmark.RIGHT_HIP)
+        left_shoulder = track.point(frame, PoseLandmark.LEFT_SHOULDER)
+        right_shoulder = track.point(frame, PoseLandmark.RIGHT_SHOULDER)
+        left_elbow = track.point(frame, PoseLandmark.LEFT_ELBOW)
+        right_elbow = track.point(frame, PoseLandmark.RIGHT_ELBOW)
+        left_wrist = track.point(frame, PoseLandmark.LEFT_WRIST)
+        right_wrist = track.point(frame, PoseLandmark.RIGHT_WRIST)
 
         # [SIDE_LATERAL_RAISE-01] Arms abduction not high enough or too high
 
         left_abduction_angle = calculate_angle(left_hip, left_shoulder, left_wrist)
         right_abduction_angle = calculate_angle(right_hip, right_shoulder, right_wrist)
 
-        lifting_too_high = left_abduction_angle > 110 and right_abduction_angle > 110
+        thresholds = self.thresholds
+        lifting_too_high = (
+            left_abduction_angle > thresholds.arms_too_high_angle
+            and right_abduction_angle > thresholds.arms_too_high_angle
+        )
 
         if lifting_too_high:
             self.arms_lifting_too_high[frame] = 1
 
         lifting_up_correct = (
-            left_abduction_angle > 70 and right_abduction_angle > 70
+            left_abduction_angle > thresholds.arms_up_min_angle
+            and right_abduction_angle > thresholds.arms_up_min_angle
         ) and not lifting_too_high
 
         if lifting_up_correct:
@@ -646,8 +832,14 @@ class ExerciseSideLateralRaises(BaseExerciseService):
             right_shoulder, right_elbow, right_wrist
         )
 
-        locked_elbow = left_elbow_bend_angle < 10 or right_elbow_bend_angle < 10
-        too_much_elbow_bend = left_elbow_bend_angle > 40 or right_elbow_bend_angle > 40
+        locked_elbow = (
+            left_elbow_bend_angle < thresholds.elbow_locked_max_angle
+            or right_elbow_bend_angle < thresholds.elbow_locked_max_angle
+        )
+        too_much_elbow_bend = (
+            left_elbow_bend_angle > thresholds.elbow_bend_max_angle
+            or right_elbow_bend_angle > thresholds.elbow_bend_max_angle
+        )
 
         if locked_elbow or too_much_elbow_bend:
             self.incorrect_elbows_bend_angles[frame] = 1
@@ -663,11 +855,13 @@ class ExerciseSideLateralRaises(BaseExerciseService):
         # [SIDE_LATERAL_RAISE-04] Symmetry
 
         symmetry = abs(left_abduction_angle - right_abduction_angle)
-        if symmetry > 10:
+        if symmetry > thresholds.symmetry_max_angle_diff:
             self.incorrect_symmetry[frame] = 1
 
         mp.solutions.drawing_utils.draw_landmarks(
-            frame_img, landmarks, mp.solutions.pose.POSE_CONNECTIONS
+            frame_img,
+            track.to_landmark_list(frame),
+            mp.solutions.pose.POSE_CONNECTIONS,
         )
         self.videos[ExerciseMeasureEnum.BASIC_LANDMARKS].append(frame_img)
         self.videos[
@@ -684,11 +878,86 @@ class ExerciseSideLateralRaises(BaseExerciseService):
         ].append(frame_img)
         self.videos[ExerciseMeasureEnum.SIDE_LATERAL_RAISE_SYMMETRY].append(frame_img)
 
-    def get_final_evaluation(self):
+    def evaluate_track(self, track: LandmarkTrack, frame_shape: tuple) -> None:
+        # Same measures as evaluate_frame, for all the detected frames at once
+        frames = np.flatnonzero(track.detected[: self.total_frames])
+        xy = track.xy()[frames]
+        calc = self.calculation_service
+        thresholds = self.thresholds
+
+        # [SIDE_LATERAL_RAISE-01] Arms abduction not high enough or too high
+        left_abduction_angles = calc.joint_angles(
+            xy, PoseLandmark.LEFT_HIP, PoseLandmark.LEFT_SHOULDER, PoseLandmark.LEFT_WRIST
+        )
+        right_abduction_angles = calc.joint_angles(
+            xy,
+            PoseLandmark.RIGHT_HIP,
+            PoseLandmark.RIGHT_SHOULDER,
+            PoseLandmark.RIGHT_WRIST,
+        )
+        lifting_too_high = (left_abduction_angles > thresholds.arms_too_high_angle) & (
+            right_abduction_angles > thresholds.arms_too_high_angle
+        )
+        lifting_up_correct = (
+            (left_abduction_angles > thresholds.arms_up_min_angle)
+            & (right_abduction_angles > thresholds.arms_up_min_angle)
+        ) & ~lifting_too_high
+
+        self.arms_lifting_too_high = np.zeros(self.total_frames, dtype=np.uint8)
+        self.arms_lifting_too_high[frames[lifting_too_high]] = 1
+        self.arms_abduction_up_correct_position = np.zeros(
+            self.total_frames, dtype=np.uint8
+        )
+        self.arms_abduction_up_correct_position[frames[lifting_up_correct]] = 1
+
+        # [SIDE_LATERAL_RAISE-02] Elbows bend angles
+        left_elbow_bend_angles = calc.joint_angles(
+            xy,
+            PoseLandmark.LEFT_SHOULDER,
+            PoseLandmark.LEFT_ELBOW,
+            PoseLandmark.LEFT_WRIST,
+        )
+        right_elbow_bend_angles = calc.joint_angles(
+            xy,
+            PoseLandmark.RIGHT_SHOULDER,
+            PoseLandmark.RIGHT_ELBOW,
+            PoseLandmark.RIGHT_WRIST,
+        )
+        locked_elbow = (left_elbow_bend_angles < thresholds.elbow_locked_max_angle) | (
+            right_elbow_bend_angles < thresholds.elbow_locked_max_angle
+        )
+        too_much_elbow_bend = (
+            left_elbow_bend_angles > thresholds.elbow_bend_max_angle
+        ) | (right_elbow_bend_angles > thresholds.elbow_bend_max_angle)
+        self.incorrect_elbows_bend_angles = np.zeros(self.total_frames, dtype=np.uint8)
+        self.incorrect_elbows_bend_angles[frames[locked_elbow | too_much_elbow_bend]] = 1
+
+        # [SIDE_LATERAL_RAISE-03] Shoulders incorrect elevation
+        self.left_shoulder_elevation_array = calc.offsets(
+            xy[:, PoseLandmark.LEFT_SHOULDER], xy[:, PoseLandmark.LEFT_HIP], axis=1
+        )
+        self.right_shoulder_elevation_array = calc.offsets(
+            xy[:, PoseLandmark.RIGHT_SHOULDER], xy[:, PoseLandmark.RIGHT_HIP], axis=1
+        )
+
+        # [SIDE_LATERAL_RAISE-04] Symmetry
+        symmetry = np.abs(left_abduction_angles - right_abduction_angles)
+        self.incorrect_symmetry = np.zeros(self.total_frames, dtype=np.uint8)
+        self.incorrect_symmetry[
+            frames[symmetry > thresholds.symmetry_max_angle_diff]
+        ] = 1
+
+    def get_final_evaluation(self) -> ExerciseFinalEvaluation:
+        return ExerciseFinalEvaluation(
+            feedback=self.build_feedback(),
+            s3_video_keys=self.close_writers(),
+        )
+
+    def build_feedback(self) -> dict[ExerciseMeasureEnum, ExerciseFeedback]:
         feedback: dict[ExerciseMeasureEnum, ExerciseFeedback] = {}
 
-        generic_threshold_frames = 10
-        too_high_threshold_frames = 5
+        generic_threshold_frames = self.thresholds.generic_threshold_frames
+        too_high_threshold_frames = self.thresholds.too_high_threshold_frames
 
         # Check if the arms are lifting up correctly
         if np.sum(self.arms_lifting_too_high) > too_high_threshold_frames:
@@ -775,7 +1044,9 @@ class ExerciseSideLateralRaises(BaseExerciseService):
         average_ten_highest_elevations = np.mean(
             np.sort(self.left_shoulder_elevation_array)[-10:]
         )
-        baseline_elevation = average_ten_highest_elevations * 0.05
+        baseline_elevation = (
+            average_ten_highest_elevations * self.thresholds.shoulder_elevation_min_ratio
+        )
 
         if (
             abs(average_ten_lowest_elevations - average_ten_highest_elevations)
@@ -843,22 +1114,12 @@ class ExerciseTricepsExtension(BaseExerciseService):
         self.complete_down_extension = [0] * self.total_frames
         self.shoulder_angle = []
 
-    def evaluate_frame(
-        self, frame_img: np.ndarray, frame: int, landmarks: NormalizedLandmarkList
-    ):
-        # Get landmark coordinates using landmark indices
-        left_hip = landmarks.landmark[mp.solutions.pose.PoseLandmark.LEFT_HIP.value]
-        left_shoulder = landmarks.landmark[
-            mp.solutions.pose.PoseLandmark.LEFT_SHOULDER.value
-        ]
-        left_elbow = landmarks.landmark[mp.solutions.pose.PoseLandmark.LEFT_ELBOW.value]
-        left_wrist = landmarks.landmark[mp.solutions.pose.PoseLandmark.LEFT_WRIST.value]
-
-        # Convert landmarks to points for angle calculation
-        left_hip = [float(left_hip.x), float(left_hip.y)]
-        left_shoulder = [float(left_shoulder.x), float(left_shoulder.y)]
-        left_elbow = [float(left_elbow.x), float(left_elbow.y)]
-        left_wrist = [float(left_wrist.x), float(left_wrist.y)]
+    def evaluate_frame(self, frame_img: np.ndarray, frame: int, track: LandmarkTrack):
+        # Get landmark coordinates from the landmark track
+        left_hip = track.point(frame, PoseLandmark.LEFT_HIP)
+        left_shoulder = track.point(frame, PoseLandmark.LEFT_SHOULDER)
+        left_elbow = track.point(frame, PoseLandmark.LEFT_ELBOW)
+        left_wrist = track.point(frame, PoseLandmark.LEFT_WRIST)
 
         # [TRICEPS_EXTENSION-01] Arms abduction not high enough or too high
 
@@ -875,7 +1136,9 @@ class ExerciseTricepsExtension(BaseExerciseService):
         self.shoulder_angle.append(shoulder_angle)
 
         mp.solutions.drawing_utils.draw_landmarks(
-            frame_img, landmarks, mp.solutions.pose.POSE_CONNECTIONS
+            frame_img,
+            track.to_landmark_list(frame),
+            mp.solutions.pose.POSE_CONNECTIONS,
         )
         self.videos[ExerciseMeasureEnum.BASIC_LANDMARKS].append(frame_img)
         self.videos[ExerciseMeasureEnum.TRICEPS_EXTENSION_COMPLETE_UP_EXTENSION].append(
@@ -888,6 +1151,31 @@ class ExerciseTricepsExtension(BaseExerciseService):
             frame_img
         )
 
+    def evaluate_track(self, track: LandmarkTrack, frame_shape: tuple) -> None:
+        # Same measures as evaluate_frame, for all the detected frames at once
+        frames = np.flatnonzero(track.detected[: self.total_frames])
+        xy = track.xy()[frames]
+
+        # [TRICEPS_EXTENSION-01] Arms abduction not high enough or too high
+        elbow_extension_angles = self.calculation_service.joint_angles(
+            xy,
+            PoseLandmark.LEFT_SHOULDER,
+            PoseLandmark.LEFT_ELBOW,
+            PoseLandmark.LEFT_WRIST,
+        )
+        self.complete_up_extension = np.zeros(self.total_frames, dtype=np.uint8)
+        self.complete_up_extension[frames[elbow_extension_angles > 170]] = 1
+        self.complete_down_extension = np.zeros(self.total_frames, dtype=np.uint8)
+        self.complete_down_extension[frames[elbow_extension_angles < 80]] = 1
+
+        # [TRICEPS_EXTENSION-02] Shoulder angle
+        self.shoulder_angle = self.calculation_service.joint_angles(
+            xy,
+            PoseLandmark.LEFT_HIP,
+            PoseLandmark.LEFT_SHOULDER,
+            PoseLandmark.LEFT_ELBOW,
+        )
+
     def get_final_evaluation(self):
         feedback: dict[ExerciseMeasureEnum, ExerciseFeedback] = {}
 
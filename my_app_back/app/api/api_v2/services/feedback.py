@@ -5,7 +5,10 @@ from app.enum import (
     ExerciseRatingEnum,
 )
 from app.api.api_v2.schemas.exercise import ExerciseFeedback
-from app.api.api_v2.schemas.feedback import Feedback
+from app.api.api_v2.schemas.feedback import Feedback, FeedbackComment
+from app.core.logging import debug, get_logger
+
+logger = get_logger(__name__)
 
 
 class FeedbackService:
@@ -28,19 +31,23 @@ class FeedbackService:
         )
 
         for final_evaluation_feedback in final_evaluation_feedbacks_list:
-            print("final_evaluation_feedback", final_evaluation_feedback)
+            debug(logger, "Final evaluation feedback: %s", final_evaluation_feedback)
             for measure, feedback_value in final_evaluation_feedback.items():
                 if feedback_value.rating == ExerciseRatingEnum.WARNING:
                     feedback.warnings.append(
-                        title=measure.value,
-                        feedback=feedback_value.comment,
-                        severity=feedback_value.rating.value,
+                        FeedbackComment(
+                            title=measure.value,
+                            feedback=feedback_value.comment,
+                            severity=feedback_value.rating.value,
+                        )
                     )
                 elif feedback_value.rating == ExerciseRatingEnum.DANGEROUS:
                     feedback.harmful.append(
-                        title=measure.value,
-                        feedback=feedback_value.comment,
-                        severity=feedback_value.rating.value,
+                        FeedbackComment(
+                            title=measure.value,
+                            feedback=feedback_value.comment,
+                            severity=feedback_value.rating.value,
+                        )
                     )
 
         return feedback
@@ -1,18 +1,437 @@
 # ffmpeg_pipe_writer.py
+import collections
+import functools
+import json
 import subprocess
+import threading
+import time
+import typing as t
+from concurrent.futures import Future, ThreadPoolExecutor, wait
 import numpy as np
 import cv2
 import os
 import shutil
 from pathlib import Path
-import boto3
-from app.constants import BUCKET_NAME
+from app.api.api_v2.services.storage import StorageBackend, get_storage
+from app.core.config import settings
+from app.core.logging import LogSampler, debug, get_logger, is_debug_enabled
+
+logger = get_logger(__name__)
+
+# Inputs can be files or S3 URLs, possibly a byte range of one (see video_input.py)
+INPUT_PROTOCOL_WHITELIST = ["-protocol_whitelist", "file,subfile,http,https,tcp,tls"]
+
+
+class FFmpegPipeReader:
+    """
+    Decode a video with ffmpeg and stream raw BGR frames out of a pipe.
+
+    ffmpeg applies the rotation metadata, scales the frames so the short side is
+    at most short_side (0 keeps the size) and drops to at most fps frames per
+    second (0 keeps the rate). The frames come out with the same layout as
+    cv2.VideoCapture, so the rest of the pipeline does not change.
+    """
+
+    def __init__(self, path: str, short_side: int = 0, fps: float = 0):
+        for binary in ("ffmpeg", "ffprobe"):
+            if not shutil.which(binary):
+                raise FileNotFoundError(f"{binary} is not installed or not found in PATH")
+
+        self.path = path
+        stream = self.probe(path)
+
+        self.rotation = self._get_rotation(stream)
+        width, height = int(stream["width"]), int(stream["height"])
+        if self.rotation % 180 == 90:
+            width, height = height, width
+        self.width, self.height = self.get_output_size(width, height, short_side)
+
+        self.source_fps = self._parse_rate(stream.get("avg_frame_rate")) or (
+            self._parse_rate(stream.get("r_frame_rate")) or 30
+        )
+        self.fps = min(fps, self.source_fps) if fps else self.source_fps
+
+        source_frames = int(stream.get("nb_frames") or 0)
+        if not source_frames and stream.get("duration"):
+            source_frames = int(float(stream["duration"]) * self.source_fps)
+        self.total_frames = int(round(source_frames * self.fps / self.source_fps))
+
+    @staticmethod
+    def is_available() -> bool:
+        """Whether ffmpeg and ffprobe are installed, i.e. URLs can be decoded."""
+        return all(shutil.which(binary) for binary in ("ffmpeg", "ffprobe"))
+
+    @staticmethod
+    def probe(path: str) -> dict[str, t.Any]:
+        """Metadata of the first video stream, from ffprobe."""
+        result = subprocess.run(
+            [
+                "ffprobe",
+                "-v",
+                "error",
+                "-select_streams",
+                "v:0",
+                "-show_entries",
+                "stream=width,height,avg_frame_rate,r_frame_rate,nb_frames,duration"
+                ":stream_tags=rotate:stream_side_data=rotation",
+                "-of",
+                "json",
+                *INPUT_PROTOCOL_WHITELIST,
+                path,
+            ],
+            capture_output=True,
+            text=True,
+        )
+        streams = json.loads(result.stdout or "{}").get("streams")
+        if result.returncode != 0 or not streams:
+            raise RuntimeError(f"Could not probe the video in {path}: {result.stderr}")
+        return streams[0]
+
+    @staticmethod
+    def get_output_size(width: int, height: int, short_side: int) -> t.Tuple[int, int]:
+        """Scale (width, height) down to the short side, keeping even dimensions."""
+        scale = 1.0
+        if short_side and min(width, height) > short_side:
+            scale = short_side / min(width, height)
+        # yuv420p sources and the libx264 writers need even dimensions
+        return (
+            max(2, int(round(width * scale / 2)) * 2),
+            max(2, int(round(height * scale / 2)) * 2),
+        )
+
+    @staticmethod
+    def _get_rotation(stream: dict[str, t.Any]) -> int:
+        rotation = stream.get("tags", {}).get("rotate")
+        for side_data in stream.get("side_data_list", []):
+            if "rotation" in side_data:
+                rotation = side_data["rotation"]
+        return int(float(rotation or 0)) % 360
+
+    @staticmethod
+    def _parse_rate(rate: t.Optional[str]) -> float:
+        if not rate:
+            return 0.0
+        numerator, _, denominator = rate.partition("/")
+        if not float(denominator or 1):
+            return 0.0
+        return float(numerator) / float(denominator or 1)
+
+    def frames(
+        self, start_frame: int = 0, frame_count: t.Optional[int] = None
+    ) -> t.Iterator[np.ndarray]:
+        """
+        Yield the decoded frames as (height, width, 3) uint8 BGR arrays, from
+        start_frame (at the output fps) and at most frame_count of them.
+        """
+        seek = []
+        if start_frame:
+            # Input seeking jumps to the previous keyframe and decodes from there
+            seek = ["-ss", f"{start_frame / self.fps:.6f}"]
+        limit = []
+        if frame_count is not None:
+            limit = ["-frames:v", str(frame_count)]
+
+        filters = []
+        if self.fps < self.source_fps:
+            filters.append(f"fps={self.fps}")
+        filters.append(f"scale={self.width}:{self.height}:flags=area")
+
+        frame_size = self.width * self.height * 3
+        proc = subprocess.Popen(
+            [
+                "ffmpeg",
+                "-nostdin",
+                "-v",
+                "error",
+                *seek,
+                *INPUT_PROTOCOL_WHITELIST,
+                "-i",
+                self.path,
+                "-an",
+                "-sn",
+                "-vf",
+                ",".join(filters),
+                *limit,
+                "-f",
+                "rawvideo",
+                "-pix_fmt",
+                "bgr24",  # same channel order as OpenCV, no cvtColor needed
+                "pipe:1",
+            ],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            bufsize=frame_size,
+        )
+        frame_count = 0
+        try:
+            while True:
+                # Read straight into the frame array, without intermediate bytes
+                frame = np.empty((self.height, self.width, 3), dtype=np.uint8)
+                buffer = memoryview(frame).cast("B")
+                read = 0
+                while read < frame_size:
+                    n = proc.stdout.readinto(buffer[read:])
+                    if not n:
+                        break
+                    read += n
+                if read < frame_size:
+                    break
+                frame_count += 1
+                yield frame
+        finally:
+            proc.stdout.close()
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+
+        if proc.returncode != 0 and frame_count == 0:
+            raise RuntimeError(f"ffmpeg could not decode the video in {self.path}")
+
+
+class AsyncFrameWriter:
+    """
+    Bounded ring of preallocated frame slots drained into a sink (the ffmpeg pipe)
+    by a feeder thread, so the caller does not wait on the pipe. The caller takes
+    a slot with acquire(), fills slots[index] and hands it over with commit().
+
+    Backpressure policy when every slot is waiting to be written:
+    - block: wait until the feeder frees a slot.
+    - drop_oldest: reuse the slot of the oldest frame not written yet.
+    - downsample: keep one of every `stride` frames. The stride doubles every time
+      the ring is full and halves back once it is less than half full.
+    """
+
+    POLICIES = ("block", "drop_oldest", "downsample")
+    MAX_DOWNSAMPLE_STRIDE = 16
+
+    def __init__(
+        self,
+        sink: t.Callable[[np.ndarray], t.Any],
+        frame_shape: tuple,
+        slots: int = 4,
+        policy: str = "block",
+    ):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown backpressure policy {policy}, use one of {self.POLICIES}")
+        self.sink = sink
+        self.policy = policy
+        self.slots = [np.empty(frame_shape, dtype=np.uint8) for _ in range(max(1, slots))]
+
+        self.frames_written = 0
+        self.frames_dropped = 0
+        self.frames_downsampled = 0
+        self.frames_blocked = 0
+        self.blocked_s = 0.0
+
+        self._free = collections.deque(range(len(self.slots)))
+        self._ready: t.Deque[int] = collections.deque()
+        self._cond = threading.Condition()
+        self._closed = False
+        self._error: t.Optional[BaseException] = None
+        self._stride = 1
+        self._offered = 0
+
+        self._thread = threading.Thread(
+            target=self._feed, name="ffmpeg-feeder", daemon=True
+        )
+        self._thread.start()
+
+    def _raise_error(self) -> None:
+        if self._error is not None:
+            raise self._error
+
+    def acquire(self) -> t.Optional[int]:
+        """Index of a free slot, or None if the policy drops the frame."""
+        with self._cond:
+            self._raise_error()
+
+            if self.policy == "downsample":
+                self._offered += 1
+                if not self._free:
+                    self._stride = min(self._stride * 2, self.MAX_DOWNSAMPLE_STRIDE)
+                elif self._stride > 1 and len(self._ready) < len(self.slots) // 2:
+                    self._stride //= 2
+                if not self._free or (self._offered - 1) % self._stride:
+                    self.frames_downsampled += 1
+                    return None
+                return self._free.popleft()
+
+            if self._free:
+                return self._free.popleft()
+            if self.policy == "drop_oldest" and self._ready:
+                self.frames_dropped += 1
+                return self._ready.popleft()
+
+            self.frames_blocked += 1
+            started = time.perf_counter()
+            while not self._free and self._error is None:
+                self._cond.wait()
+            self.blocked_s += time.perf_counter() - started
+            self._raise_error()
+            return self._free.popleft()
+
+    def commit(self, index: int) -> None:
+        """Queue the filled slot for writing."""
+        with self._cond:
+            self._ready.append(index)
+            self._cond.notify_all()
+
+    def write(self, frame: np.ndarray) -> bool:
+        """Copy a frame into a slot and queue it. False if the frame was dropped."""
+        index = self.acquire()
+        if index is None:
+            return False
+        np.copyto(self.slots[index], frame)
+        self.commit(index)
+        return True
+
+    def _feed(self) -> None:
+        while True:
+            with self._cond:
+                while not self._ready and not self._closed:
+                    self._cond.wait()
+                if not self._ready:
+                    return
+                index = self._ready.popleft()
+
+            try:
+                self.sink(self.slots[index])
+            except BaseException as e:
+                with self._cond:
+                    self._error = e
+                    self._cond.notify_all()
+                return
+
+            with self._cond:
+                self._free.append(index)
+                self.frames_written += 1
+                self._cond.notify_all()
+
+    def close(self) -> None:
+        """Write the queued frames and stop the feeder."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self._raise_error()
+
+    @property
+    def stats(self) -> dict[str, t.Any]:
+        return {
+            "policy": self.policy,
+            "frames_written": self.frames_written,
+            "frames_dropped": self.frames_dropped,
+            "frames_downsampled": self.frames_downsampled,
+            "frames_blocked": self.frames_blocked,
+            "blocked_s": round(self.blocked_s, 3),
+        }
+
+
+class PipeWriteStats:
+    """
+    Writes frames into an ffmpeg pipe without intermediate copies and measures
+    the throughput: frames, bytes and time spent in the pipe writes.
+    """
+
+    def __init__(self):
+        self.frames_written = 0
+        self.bytes_written = 0
+        self.write_s = 0.0
+
+    def write(self, stream: t.BinaryIO, frame: np.ndarray) -> None:
+        if not frame.flags.c_contiguous:
+            frame = np.ascontiguousarray(frame)
+        started = time.perf_counter()
+        # The frame buffer goes to the pipe as is, no tobytes() copy
+        stream.write(memoryview(frame).cast("B"))
+        self.write_s += time.perf_counter() - started
+        self.frames_written += 1
+        self.bytes_written += frame.nbytes
+
+    @property
+    def mb_per_s(self) -> float:
+        if not self.write_s:
+            return 0.0
+        return self.bytes_written / 2**20 / self.write_s
+
+    def __str__(self):
+        return (
+            f"PipeWriteStats(frames={self.frames_written}, "
+            f"MB={self.bytes_written / 2**20:.1f}, write={self.write_s:.2f}s, "
+            f"throughput={self.mb_per_s:.1f}MB/s)"
+        )
+
+
+def _check_ffmpeg() -> None:
+    if not shutil.which("ffmpeg"):
+        raise FileNotFoundError(
+            "FFmpeg is not installed or not found in PATH. "
+            "Please install FFmpeg to use video processing features.\n"
+            "Installation instructions:\n"
+            "- macOS: brew install ffmpeg\n"
+            "- Ubuntu/Debian: sudo apt-get install ffmpeg\n"
+            "- Windows: Download from https://ffmpeg.org/download.html"
+        )
+
+
+@functools.lru_cache(maxsize=None)
+def get_upload_executor() -> ThreadPoolExecutor:
+    """
+    Threads finalizing and uploading the annotated videos of the process, so the
+    videos of all the measures are uploaded at the same time.
+    """
+    return ThreadPoolExecutor(
+        settings.RESULT_UPLOAD_WORKERS, thread_name_prefix="result-upload"
+    )
+
+
+def _stop_ffmpeg(proc: t.Optional[subprocess.Popen], kill: bool = False) -> None:
+    """
+    Close the input pipe of an encoder and wait for it to exit. With kill the
+    encoder is killed first, and the frames still buffered are discarded.
+    """
+    if not proc:
+        return
+    if kill:
+        proc.kill()
+    if proc.stdin:
+        try:
+            proc.stdin.close()
+        except BrokenPipeError:
+            if not kill:
+                raise
+    proc.wait()
+
+
+def upload_video(storage: StorageBackend, local_path: str) -> str:
+    """
+    Store an encoded video and remove the local file. Returns the key. A failed
+    upload raises, so the evaluation fails (and is retried) instead of returning
+    the key of a video that does not exist.
+    """
+    key = f"results/{Path(local_path).name}"
+
+    try:
+        storage.put_file(local_path, key, content_type="video/mp4", move=True)
+    except Exception as e:
+        logger.error("Failed to store %s as %s: %s", local_path, key, e)
+        raise
+    finally:
+        # Free space
+        try:
+            os.remove(local_path)
+        except FileNotFoundError:
+            pass
+
+    logger.info("Stored %s as %s", local_path, key)
+    return key
 
 
 class FFmpegPipeWriter:
     """
-    Stream raw RGB frames into ffmpeg (libx264). One instance per measure.
+    Stream raw BGR frames into ffmpeg (libx264). One instance per measure.
     Call write(frame_bgr) repeatedly, then close() to finalize.
+    With queue_slots the frames are written by an AsyncFrameWriter.
     """
 
     def __init__(
@@ -23,30 +442,11 @@ class FFmpegPipeWriter:
         fps: int = 6,
         crf: int = 23,
         preset: str = "veryfast",
+        queue_slots: int = 0,
+        backpressure: str = "block",
     ):
-        # Check if ffmpeg is available
-        if not shutil.which("ffmpeg"):
-            raise FileNotFoundError(
-                "FFmpeg is not installed or not found in PATH. "
-                "Please install FFmpeg to use video processing features.\n"
-                "Installation instructions:\n"
-                "- macOS: brew install ffmpeg\n"
-                "- Ubuntu/Debian: sudo apt-get install ffmpeg\n"
-                "- Windows: Download from https://ffmpeg.org/download.html"
-            )
-
-        # Use AWS credential chain: IAM roles in AWS, profiles locally
-        env_profile = os.getenv("AWS_PROFILE")
-
-        if env_profile:
-            # Local development with explicit profile
-            print(f"🏠 FFmpeg local dev: Using AWS profile: {env_profile}")
-            session = boto3.Session(profile_name=env_profile)
-            self.s3 = session.client("s3")
-        else:
-            # AWS environment: Use IAM roles automatically
-            print("☁️ FFmpeg AWS environment: Using IAM role credentials")
-            self.s3 = boto3.client("s3")
+        _check_ffmpeg()
+        self.storage = get_storage()
 
         self.out_path = out_path
         self.width, self.height = width, height
@@ -57,7 +457,7 @@ class FFmpegPipeWriter:
                 "-f",
                 "rawvideo",
                 "-pix_fmt",
-                "rgb24",
+                "bgr24",  # OpenCV layout, the frames need no colour conversion
                 "-s",
                 f"{width}x{height}",
                 "-r",
@@ -80,43 +480,208 @@ class FFmpegPipeWriter:
             stdout=subprocess.DEVNULL,
             stderr=subprocess.DEVNULL,
         )
+        self.pipe_stats = PipeWriteStats()
+        self.async_writer: t.Optional[AsyncFrameWriter] = None
+        if queue_slots:
+            self.async_writer = AsyncFrameWriter(
+                self._write_to_pipe, (height, width, 3), queue_slots, backpressure
+            )
+        self._log_resize = (
+            LogSampler(settings.LOG_SAMPLE_EVERY) if is_debug_enabled(logger) else None
+        )
 
     def write(self, frame_bgr: np.ndarray):
         # Ensure size matches; resize if needed
         if frame_bgr.shape[1] != self.width or frame_bgr.shape[0] != self.height:
-            print(
-                f"Resizing frame from {frame_bgr.shape} to {self.width}x{self.height}"
-            )
+            if self._log_resize is not None and self._log_resize():
+                debug(
+                    logger,
+                    "Resizing frame from %s to %sx%s",
+                    frame_bgr.shape,
+                    self.width,
+                    self.height,
+                )
             frame_bgr = cv2.resize(frame_bgr, (self.width, self.height))
-        frame_rgb = cv2.cvtColor(frame_bgr, cv2.COLOR_BGR2RGB)
+        if self.async_writer is None:
+            self._write_to_pipe(frame_bgr)
+        else:
+            # The caller reuses its frame, the ring keeps a copy until it is written
+            self.async_writer.write(frame_bgr)
+
+    def _write_to_pipe(self, frame_bgr: np.ndarray) -> None:
         if self.proc and self.proc.stdin:
-            self.proc.stdin.write(frame_rgb.tobytes())
+            self.pipe_stats.write(self.proc.stdin, frame_bgr)
+
+    def close(self) -> None:
+        if self.async_writer is not None:
+            try:
+                self.async_writer.close()
+            except BaseException:
+                # The feeder failed, the video is incomplete: don't leave ffmpeg running
+                _stop_ffmpeg(self.proc, kill=True)
+                raise
+            logger.info("%s writer: %s", self.out_path, self.async_writer.stats)
+        logger.info("%s pipe: %s", self.out_path, self.pipe_stats)
 
-    def close_and_upload(self):
         # Close the ffmpeg process
-        if self.proc and self.proc.stdin:
-            self.proc.stdin.close()
-            self.proc.wait()
+        _stop_ffmpeg(self.proc)
 
-        local_path = self.out_path
-        key = f"results/{Path(local_path).name}"
+    def close_and_upload(self) -> str:
+        self.close()
+        return upload_video(self.storage, self.out_path)
 
-        try:
-            # Upload to S3
-            self.s3.upload_file(
-                local_path, BUCKET_NAME, key, ExtraArgs={"ContentType": "video/mp4"}
+    def close_and_upload_async(self) -> Future:
+        """close_and_upload on the upload threads. The future is the S3 key."""
+        return get_upload_executor().submit(self.close_and_upload)
+
+
+class FFmpegMultiOutputWriter:
+    """
+    One ffmpeg process encoding the videos of several measures.
+
+    Each frame is a vertical stack of one tile per output. For every frame the
+    caller calls begin_frame(), draws the frame of each output into its tile
+    (preallocated, see tile()) and calls write_tiles(): the whole stack goes down
+    the pipe in a single write, and ffmpeg crops every tile into its own libx264
+    output. Compared to one FFmpegPipeWriter per measure, this spawns one process
+    instead of N and avoids allocating a frame copy per measure.
+
+    It does not reduce the pipe bandwidth: every frame still sends N full-size
+    bgr24 tiles (see pipe_stats). Piping the base frame once plus the overlay
+    layers of the measures would need a second input pipe, fed from its own
+    thread so ffmpeg cannot stall on one input, and fixed-size (so full-frame
+    or downscaled) BGRA layers, which cost as many bytes or blur the
+    annotations. The tiles keep the compositing exact and in one pipe.
+
+    With queue_slots the stacks are written by an AsyncFrameWriter, and the
+    stack being drawn is one of its ring slots.
+    """
+
+    def __init__(
+        self,
+        out_paths: t.List[str],
+        width: int,
+        height: int,
+        fps: int = 6,
+        crf: int = 23,
+        preset: str = "veryfast",
+        queue_slots: int = 0,
+        backpressure: str = "block",
+    ):
+        _check_ffmpeg()
+        self.storage = get_storage()
+
+        self.out_paths = out_paths
+        self.width, self.height = width, height
+        n = len(out_paths)
+        # bgr24 is the OpenCV layout, the tiles are written as they are drawn
+        self._frames = np.zeros((n * height, width, 3), dtype=np.uint8)
+        self._slot_index: t.Optional[int] = None
+
+        splits = "".join(f"[s{i}]" for i in range(n))
+        filters = [f"[0:v]split={n}{splits}"]
+        outputs = []
+        for i, out_path in enumerate(out_paths):
+            filters.append(f"[s{i}]crop={width}:{height}:0:{i * height},format=yuv420p[v{i}]")
+            outputs += [
+                "-map",
+                f"[v{i}]",
+                "-c:v",
+                "libx264",
+                "-preset",
+                preset,
+                "-crf",
+                str(crf),
+                "-movflags",
+                "+faststart",
+                out_path,
+            ]
+
+        self.proc = subprocess.Popen(
+            [
+                "ffmpeg",
+                "-y",
+                "-f",
+                "rawvideo",
+                "-pix_fmt",
+                "bgr24",
+                "-s",
+                f"{width}x{n * height}",
+                "-r",
+                str(fps),
+                "-i",
+                "pipe:0",
+                "-filter_complex",
+                ";".join(filters),
+                *outputs,
+            ],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        self.pipe_stats = PipeWriteStats()
+        self.async_writer: t.Optional[AsyncFrameWriter] = None
+        if queue_slots:
+            self.async_writer = AsyncFrameWriter(
+                self._write_to_pipe, self._frames.shape, queue_slots, backpressure
             )
-            print(f"Successfully uploaded {local_path} to s3://{BUCKET_NAME}/{key}")
-        except Exception as e:
-            print(f"Failed to upload {local_path} to S3: {str(e)}")
-            print(f"Bucket: {BUCKET_NAME}, Key: {key}")
-            # Don't raise the exception, just log it for now
-            # You can change this behavior based on your requirements
 
-        # Free space
-        try:
-            os.remove(local_path)
-        except FileNotFoundError:
-            pass
+    def begin_frame(self) -> bool:
+        """Start a frame. False if the backpressure policy drops it."""
+        if self.async_writer is None:
+            return True
+        self._slot_index = self.async_writer.acquire()
+        if self._slot_index is None:
+            return False
+        self._frames = self.async_writer.slots[self._slot_index]
+        return True
+
+    def tile(self, index: int) -> np.ndarray:
+        """(height, width, 3) view of the frame of the output at index."""
+        return self._frames[index * self.height : (index + 1) * self.height]
+
+    def write_tiles(self) -> None:
+        if self.async_writer is None:
+            self._write_to_pipe(self._frames)
+        else:
+            self.async_writer.commit(self._slot_index)
+
+    def _write_to_pipe(self, frames: np.ndarray) -> None:
+        if self.proc and self.proc.stdin:
+            self.pipe_stats.write(self.proc.stdin, frames)
+
+    def close(self) -> None:
+        if self.async_writer is not None:
+            try:
+                self.async_writer.close()
+            except BaseException:
+                # The feeder failed, the video is incomplete: don't leave ffmpeg running
+                _stop_ffmpeg(self.proc, kill=True)
+                raise
+            logger.info("%s writer: %s", self.out_paths, self.async_writer.stats)
+        logger.info("%s pipe: %s", self.out_paths, self.pipe_stats)
+
+        _stop_ffmpeg(self.proc)
+
+    def close_and_upload(self) -> t.List[str]:
+        futures = self.close_and_upload_async()
+        # Let every upload finish (and clean up) before raising a failed one
+        wait(futures)
+        return [future.result() for future in futures]
+
+    def close_and_upload_async(self) -> t.List[Future]:
+        """
+        Close on the upload threads, then upload every output on its own thread.
+        The futures are the S3 keys, in the order of out_paths.
+        """
+        executor = get_upload_executor()
+        closed = executor.submit(self.close)
+        # Submitted after the close, so they never hold every thread waiting for it
+        return [
+            executor.submit(self._upload_when_closed, closed, out_path)
+            for out_path in self.out_paths
+        ]
 
-        return key
+    def _upload_when_closed(self, closed: Future, out_path: str) -> str:
+        closed.result()
+        return upload_video(self.storage, out_path)
@@ -0,0 +1,133 @@
+import contextvars
+import fcntl
+import functools
+import os
+import threading
+import time
+import typing as t
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from app.api.api_v2.schemas.job import Job, Progress
+from app.api.api_v2.schemas.pose import OutputPose
+from app.core.config import settings
+from app.core.logging import get_logger
+from app.enum import JobStatusEnum
+
+logger = get_logger(__name__)
+
+# A job gets a callback to report the Progress of its videos
+JobFunction = t.Callable[[t.Callable[[Progress], None]], OutputPose]
+
+
+class JobBackend:
+    """Runs the jobs and keeps their status until they are collected."""
+
+    def submit(self, job_id: str, fn: JobFunction) -> None:
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def get(self, job_id: str) -> t.Optional[Job]:
+        raise NotImplementedError("Subclasses must implement this method")
+
+
+class LocalJobBackend(JobBackend):
+    """
+    In-process queue drained by max_running threads. A job runs on its thread:
+    a single video (the default single viewpoint, or any video where there is no
+    process pool) is tracked inline and holds one graph of the pose pool, while
+    several viewpoints or chunks go to the worker processes (see
+    workers.map_in_workers). So by default as many jobs run as there are Pose
+    graphs, and the others wait queued instead of blocking in the pose pool.
+    Finished jobs are forgotten ttl_s seconds after they end.
+
+    The jobs live in the memory of the process: they can only be polled from the
+    process that accepted them, and are lost when it restarts. get_job_backend
+    therefore allows a single API process per host (see JOB_LOCK_PATH).
+    """
+
+    def __init__(self, max_running: int, ttl_s: float):
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(1, max_running), thread_name_prefix="job"
+        )
+        self.ttl_s = ttl_s
+        self._jobs: dict[str, Job] = {}
+        self._finished_at: dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, job_id: str, fn: JobFunction) -> None:
+        with self._lock:
+            self._expire()
+            self._jobs[job_id] = Job(job_id=job_id, status=JobStatusEnum.PENDING)
+        self.executor.submit(self._run, job_id, fn)
+
+    def get(self, job_id: str) -> t.Optional[Job]:
+        with self._lock:
+            self._expire()
+            return self._jobs.get(job_id)
+
+    def _run(self, job_id: str, fn: JobFunction) -> None:
+        self._update(job_id, status=JobStatusEnum.PROCESSING)
+        try:
+            result = fn(lambda progress: self._update(job_id, progress=progress))
+        except Exception as e:
+            logger.exception("Job %s failed: %s", job_id, e)
+            self._update(job_id, status=JobStatusEnum.ERROR, error=str(e))
+        else:
+            self._update(job_id, status=JobStatusEnum.DONE, result=result)
+
+    def _update(self, job_id: str, **fields) -> None:
+        with self._lock:
+            self._jobs[job_id] = self._jobs[job_id].model_copy(update=fields)
+            if fields.get("status") in (JobStatusEnum.DONE, JobStatusEnum.ERROR):
+                self._finished_at[job_id] = time.monotonic()
+
+    def _expire(self) -> None:
+        deadline = time.monotonic() - self.ttl_s
+        for job_id, finished_at in list(self._finished_at.items()):
+            if finished_at < deadline:
+                del self._finished_at[job_id]
+                del self._jobs[job_id]
+
+
+def _lock_single_process(lock_path: str) -> None:
+    """
+    Hold an exclusive lock on lock_path until the process exits, or raise if
+    another process holds it, i.e. when uvicorn runs with --workers > 1.
+    """
+    fd = os.open(lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        raise RuntimeError(
+            f"Another process holds {lock_path}: the local job backend keeps the "
+            "jobs in memory, so the API must run as a single process"
+        )
+
+
+@functools.lru_cache(maxsize=None)
+def get_job_backend() -> JobBackend:
+    """Job backend configured by JOB_BACKEND, shared by the whole process."""
+    if settings.JOB_BACKEND == "local":
+        if settings.JOB_LOCK_PATH:
+            _lock_single_process(settings.JOB_LOCK_PATH)
+        # 0: one job per Pose graph, the inline videos never wait for a graph
+        max_running = settings.JOB_MAX_RUNNING or settings.POSE_POOL_SIZE
+        return LocalJobBackend(max_running, settings.JOB_TTL_S)
+    raise ValueError(f"Unknown job backend: {settings.JOB_BACKEND}")
+
+
+class JobService:
+    def __init__(self, backend: JobBackend):
+        self.backend = backend
+
+    def submit(self, fn: JobFunction) -> Job:
+        """Queue fn and return the job to poll for its OutputPose."""
+        job_id = uuid.uuid4().hex
+        # The job runs in the request's context, i.e. with its debug_logging()
+        context = contextvars.copy_context()
+        self.backend.submit(job_id, lambda report: context.run(fn, report))
+        return Job(job_id=job_id, status=JobStatusEnum.PENDING)
+
+    def get(self, job_id: str) -> t.Optional[Job]:
+        return self.backend.get(job_id)
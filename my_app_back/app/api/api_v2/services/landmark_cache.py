@@ -0,0 +1,172 @@
+import functools
+import hashlib
+import io
+import os
+import tempfile
+import typing as t
+
+from app.api.api_v2.services.landmark_track import LandmarkTrack
+from app.api.api_v2.services.pose_pool import get_pose_pool
+from app.api.api_v2.services.storage import StorageBackend, get_storage
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+_HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def get_file_hash(path: str) -> str:
+    """blake2b of the file contents, read in blocks so large videos stay off the heap."""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_HASH_BLOCK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def get_cache_key(video_path: str, content_hash: t.Optional[str] = None) -> str:
+    """
+    Cache key of the landmark track of a video: its content hash plus every
+    setting that changes which landmarks the pose stage produces. content_hash
+    replaces the hash of the file for videos that are not on disk.
+    """
+    pose_settings = "|".join(
+        str(value)
+        for value in (
+            sorted(get_pose_pool().pose_kwargs.items()),
+            settings.VIDEO_DECODE_SHORT_SIDE,
+            settings.VIDEO_DECODE_FPS,
+            settings.VIDEO_INFERENCE_MAX_STRIDE,
+            settings.VIDEO_INFERENCE_MOTION_THRESHOLD,
+        )
+    )
+    settings_hash = hashlib.blake2b(pose_settings.encode(), digest_size=8).hexdigest()
+    return f"{content_hash or get_file_hash(video_path)}-{settings_hash}"
+
+
+class LandmarkCache:
+    """
+    Landmark tracks of already processed videos, see get_cache_key. The cache is
+    an optimization: a backend failure is logged and treated as a miss.
+    """
+
+    def get(self, key: str) -> t.Optional[LandmarkTrack]:
+        try:
+            payload = self._read(key)
+            if payload is None:
+                return None
+            return LandmarkTrack.from_bytes(payload)
+        except Exception as e:
+            logger.warning("Landmark cache read failed for %s: %s", key, e)
+            return None
+
+    def put(self, key: str, track: LandmarkTrack) -> None:
+        try:
+            self._write(key, track.to_bytes())
+        except Exception as e:
+            logger.warning("Landmark cache write failed for %s: %s", key, e)
+
+    def _read(self, key: str) -> t.Optional[bytes]:
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def _write(self, key: str, payload: bytes) -> None:
+        raise NotImplementedError("Subclasses must implement this method")
+
+
+class DiskLandmarkCache(LandmarkCache):
+    """
+    Entries are files in a directory. Reads bump the modification time, and once
+    the directory is over max_bytes the least recently used entries are removed.
+    """
+
+    SUFFIX = ".lmtk"
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.SUFFIX)
+
+    def _read(self, key: str) -> t.Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                payload = f.read()
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return payload
+
+    def _write(self, key: str, payload: bytes) -> None:
+        # Written aside and renamed, so concurrent readers never see half an entry
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self._evict()
+
+    def _evict(self) -> None:
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(self.SUFFIX):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+
+
+class StorageLandmarkCache(LandmarkCache):
+    """
+    Entries are objects under a prefix of the storage backend, shared by every
+    worker. In S3 they are expired by a lifecycle rule.
+    """
+
+    def __init__(self, storage: StorageBackend, prefix: str):
+        self.storage = storage
+        self.prefix = prefix
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}{key}"
+
+    def _read(self, key: str) -> t.Optional[bytes]:
+        try:
+            with self.storage.get_stream(self._key(key)) as stream:
+                return stream.read()
+        except FileNotFoundError:
+            return None
+
+    def _write(self, key: str, payload: bytes) -> None:
+        self.storage.put_stream(
+            self._key(key), io.BytesIO(payload), content_type="application/octet-stream"
+        )
+
+
+@functools.lru_cache(maxsize=None)
+def get_landmark_cache() -> t.Optional[LandmarkCache]:
+    """Landmark cache configured by LANDMARK_CACHE_BACKEND, None when disabled."""
+    backend = settings.LANDMARK_CACHE_BACKEND
+    if backend == "disk":
+        return DiskLandmarkCache(
+            settings.LANDMARK_CACHE_DIR, settings.LANDMARK_CACHE_MAX_MB * 1024 * 1024
+        )
+    if backend == "storage":
+        return StorageLandmarkCache(get_storage(), settings.LANDMARK_CACHE_STORAGE_PREFIX)
+    if backend:
+        raise ValueError(f"Unknown landmark cache backend: {backend}")
+    return None
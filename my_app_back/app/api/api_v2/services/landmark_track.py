@@ -0,0 +1,210 @@
+import struct
+import typing as t
+
+import mediapipe as mp
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+from mediapipe.framework.formats.landmark_pb2 import NormalizedLandmarkList
+
+PoseLandmark = mp.solutions.pose.PoseLandmark
+
+NUM_LANDMARKS = len(PoseLandmark)
+# Columns of the landmark tensor
+X, Y, Z, VISIBILITY = range(4)
+
+# Binary format of to_bytes(): magic, version, frames, landmarks per frame
+_TRACK_MAGIC = b"LMTK"
+_TRACK_VERSION = 1
+_TRACK_HEADER = struct.Struct("<4sHIH")
+
+
+class LandmarkTrack:
+    """
+    Pose landmarks of a whole video as a float32 tensor of shape (frames, 33, 4)
+    holding (x, y, z, visibility) in MediaPipe normalized coordinates.
+
+    The tensor is preallocated and grows in chunks, and it is filled once per frame
+    from the MediaPipe result. Frames without a detected pose are NaN and flagged
+    as not detected. Frames skipped by the pose stage are filled by interpolate()
+    and flagged as interpolated. The exercise services index it by named joint, i.e.
+    track.point(frame_index, PoseLandmark.LEFT_HIP), or take the whole series of a
+    joint with track.points(PoseLandmark.LEFT_HIP) for vectorized evaluation.
+    """
+
+    def __init__(self, capacity: int = 0, chunk_size: int = 256):
+        self.chunk_size = chunk_size
+        self._data = np.full((max(capacity, 0), NUM_LANDMARKS, 4), np.nan, np.float32)
+        self._detected = np.zeros(max(capacity, 0), dtype=bool)
+        self._interpolated = np.zeros(max(capacity, 0), dtype=bool)
+        self.length = 0
+
+    def __len__(self) -> int:
+        return self.length
+
+    @property
+    def data(self) -> np.ndarray:
+        """(frames, 33, 4) view of the filled frames."""
+        return self._data[: self.length]
+
+    @property
+    def detected(self) -> np.ndarray:
+        """(frames,) bool mask of the frames with a detected pose."""
+        return self._detected[: self.length]
+
+    @property
+    def interpolated(self) -> np.ndarray:
+        """(frames,) bool mask of the frames filled by interpolation."""
+        return self._interpolated[: self.length]
+
+    def _ensure_capacity(self, frames: int) -> None:
+        capacity = self._data.shape[0]
+        if frames <= capacity:
+            return
+
+        new_capacity = max(frames, capacity + self.chunk_size)
+        data = np.full((new_capacity, NUM_LANDMARKS, 4), np.nan, np.float32)
+        data[:capacity] = self._data
+        detected = np.zeros(new_capacity, dtype=bool)
+        detected[:capacity] = self._detected
+        interpolated = np.zeros(new_capacity, dtype=bool)
+        interpolated[:capacity] = self._interpolated
+        # Rows are written before the frame is handed to other threads, so readers
+        # of the old array still see valid data until the swap.
+        self._data, self._detected, self._interpolated = data, detected, interpolated
+
+    def set_frame(
+        self, frame_index: int, landmarks: t.Optional[NormalizedLandmarkList]
+    ) -> None:
+        """Store the MediaPipe landmarks of a frame (None if no pose was detected)."""
+        self._ensure_capacity(frame_index + 1)
+        if landmarks is not None:
+            self._data[frame_index] = [
+                (l.x, l.y, l.z, l.visibility) for l in landmarks.landmark
+            ]
+            self._detected[frame_index] = True
+        else:
+            self._data[frame_index] = np.nan
+            self._detected[frame_index] = False
+        self._interpolated[frame_index] = False
+        self.length = max(self.length, frame_index + 1)
+
+    def interpolate(self, start: int, end: int) -> None:
+        """
+        Fill the frames strictly between start and end linearly from both ends. If
+        the pose is missing at either end the gap is left as not detected.
+        """
+        if end - start < 2:
+            return
+        self._ensure_capacity(end + 1)
+        gap = slice(start + 1, end)
+
+        if self._detected[start] and self._detected[end]:
+            weights = np.arange(1, end - start, dtype=np.float32) / (end - start)
+            self._data[gap] = self._data[start] + weights[:, None, None] * (
+                self._data[end] - self._data[start]
+            )
+            self._detected[gap] = True
+            self._interpolated[gap] = True
+        else:
+            self._data[gap] = np.nan
+            self._detected[gap] = False
+            self._interpolated[gap] = False
+        self.length = max(self.length, end + 1)
+
+    def append(self, landmarks: t.Optional[NormalizedLandmarkList]) -> int:
+        """Store the landmarks of the next frame and return its index."""
+        frame_index = self.length
+        self.set_frame(frame_index, landmarks)
+        return frame_index
+
+    def slice(self, start: int, end: int) -> "LandmarkTrack":
+        """Copy of the frames in [start, end) as a new track starting at frame 0."""
+        end = min(end, self.length)
+        track = LandmarkTrack(capacity=max(end - start, 0), chunk_size=self.chunk_size)
+        track._data[:] = self._data[start:end]
+        track._detected[:] = self._detected[start:end]
+        track._interpolated[:] = self._interpolated[start:end]
+        track.length = max(end - start, 0)
+        return track
+
+    def merge(self, start: int, other: "LandmarkTrack") -> None:
+        """Write the frames of another track from start, i.e. to stitch video chunks."""
+        end = start + len(other)
+        self._ensure_capacity(end)
+        self._data[start:end] = other.data
+        self._detected[start:end] = other.detected
+        self._interpolated[start:end] = other.interpolated
+        self.length = max(self.length, end)
+
+    def to_bytes(self) -> bytes:
+        """
+        Compact binary form of the track: a header, the detected and interpolated
+        masks as bit fields, and the float32 landmarks of the detected frames only.
+        """
+        detected = self.detected
+        return b"".join(
+            [
+                _TRACK_HEADER.pack(
+                    _TRACK_MAGIC, _TRACK_VERSION, self.length, NUM_LANDMARKS
+                ),
+                np.packbits(detected).tobytes(),
+                np.packbits(self.interpolated).tobytes(),
+                np.ascontiguousarray(self.data[detected], dtype="<f4").tobytes(),
+            ]
+        )
+
+    @classmethod
+    def from_bytes(cls, payload: bytes) -> "LandmarkTrack":
+        """Rebuild a track from to_bytes(). Raises ValueError on a foreign payload."""
+        if len(payload) < _TRACK_HEADER.size:
+            raise ValueError("Truncated landmark track")
+        magic, version, frames, landmarks = _TRACK_HEADER.unpack_from(payload)
+        if (magic, version, landmarks) != (_TRACK_MAGIC, _TRACK_VERSION, NUM_LANDMARKS):
+            raise ValueError(f"Unsupported landmark track format: {magic!r} v{version}")
+
+        offset = _TRACK_HEADER.size
+        mask_size = (frames + 7) // 8
+        masks = np.frombuffer(payload, np.uint8, 2 * mask_size, offset)
+        detected = np.unpackbits(masks[:mask_size], count=frames).astype(bool)
+        interpolated = np.unpackbits(masks[mask_size:], count=frames).astype(bool)
+        offset += 2 * mask_size
+
+        rows = int(detected.sum())
+        if len(payload) - offset != rows * NUM_LANDMARKS * 4 * 4:
+            raise ValueError("Truncated landmark track")
+        track = cls(capacity=frames)
+        track._data[detected] = np.frombuffer(payload, "<f4", offset=offset).reshape(
+            rows, NUM_LANDMARKS, 4
+        )
+        track._detected[:] = detected
+        track._interpolated[:] = interpolated
+        track.length = frames
+        return track
+
+    def is_detected(self, frame_index: int) -> bool:
+        return frame_index < self.length and bool(self._detected[frame_index])
+
+    def point(self, frame_index: int, landmark: PoseLandmark) -> np.ndarray:
+        """(x, y) of a joint in a frame."""
+        return self._data[frame_index, landmark, :2]
+
+    def points(
+        self,
+        landmark: PoseLandmark,
+        start: int = 0,
+        end: t.Optional[int] = None,
+    ) -> np.ndarray:
+        """(frames, 2) series of (x, y) of a joint."""
+        end = self.length if end is None else min(end, self.length)
+        return self._data[start:end, landmark, :2]
+
+    def xy(self) -> np.ndarray:
+        """(frames, 33, 2) view of the (x, y) coordinates of every joint."""
+        return self._data[: self.length, :, :2]
+
+    def to_landmark_list(self, frame_index: int) -> NormalizedLandmarkList:
+        """Rebuild the MediaPipe landmarks of a frame, i.e. for drawing utilities."""
+        landmark_list = landmark_pb2.NormalizedLandmarkList()
+        for x, y, z, visibility in self._data[frame_index].tolist():
+            landmark_list.landmark.add(x=x, y=y, z=z, visibility=visibility)
+        return landmark_list
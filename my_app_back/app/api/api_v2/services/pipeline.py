@@ -0,0 +1,277 @@
+import contextvars
+import queue
+import threading
+import time
+import typing as t
+
+
+_END_OF_STREAM = object()
+
+
+class StageStats:
+    """
+    Counters collected for one pipeline stage.
+
+    - input_stalls: times the stage found its input queue empty (starved by upstream).
+    - output_stalls: times the stage found its output queue full (blocked by downstream).
+    - queue depth: depth of the input queue sampled every time an item is taken.
+
+    The bottleneck is the stage whose input queue stays full while its output
+    queue stays empty, i.e. high mean queue depth and few output stalls.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.processed = 0
+        self.busy_s = 0.0
+        self.input_stalls = 0
+        self.input_wait_s = 0.0
+        self.output_stalls = 0
+        self.output_wait_s = 0.0
+        self.max_queue_depth = 0
+        self._queue_depth_total = 0
+        self._queue_depth_samples = 0
+
+    def sample_queue_depth(self, depth: int) -> None:
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+        self._queue_depth_total += depth
+        self._queue_depth_samples += 1
+
+    @property
+    def mean_queue_depth(self) -> float:
+        if not self._queue_depth_samples:
+            return 0.0
+        return self._queue_depth_total / self._queue_depth_samples
+
+    def to_dict(self) -> dict[str, t.Any]:
+        return {
+            "stage": self.name,
+            "processed": self.processed,
+            "busy_s": round(self.busy_s, 3),
+            "input_stalls": self.input_stalls,
+            "input_wait_s": round(self.input_wait_s, 3),
+            "output_stalls": self.output_stalls,
+            "output_wait_s": round(self.output_wait_s, 3),
+            "max_queue_depth": self.max_queue_depth,
+            "mean_queue_depth": round(self.mean_queue_depth, 2),
+        }
+
+    def __str__(self):
+        return (
+            f"StageStats({self.name}: processed={self.processed}, busy={self.busy_s:.2f}s, "
+            f"input_stalls={self.input_stalls} ({self.input_wait_s:.2f}s), "
+            f"output_stalls={self.output_stalls} ({self.output_wait_s:.2f}s), "
+            f"queue_depth max={self.max_queue_depth} mean={self.mean_queue_depth:.1f})"
+        )
+
+    def __repr__(self):
+        return self.__str__()
+
+
+class FramePipeline:
+    """
+    Run a source iterable and a chain of stages, each on its own thread, connected
+    by bounded queues. A stage receives one item and returns the item for the next
+    stage, or None to drop it. A fan-out stage returns an iterable of items instead,
+    so it can hold items back and release them later, and its optional flush
+    callable releases whatever is still held at the end of the stream. Bounded
+    queues give backpressure: a slow stage makes the upstream ones block instead of
+    buffering the whole video in memory.
+
+    If any stage raises, the pipeline is aborted and the exception is re-raised
+    from run().
+    """
+
+    def __init__(self, queue_size: int = 8, poll_interval: float = 0.1):
+        self.queue_size = queue_size
+        self.poll_interval = poll_interval
+        self.stages: t.List[
+            t.Tuple[
+                str,
+                t.Callable[[t.Any], t.Any],
+                bool,
+                t.Optional[t.Callable[[], t.Iterable[t.Any]]],
+            ]
+        ] = []
+
+        self._abort = threading.Event()
+        self._error: t.Optional[BaseException] = None
+        self._error_lock = threading.Lock()
+
+    def add_stage(
+        self,
+        name: str,
+        fn: t.Callable[[t.Any], t.Any],
+        fan_out: bool = False,
+        flush: t.Optional[t.Callable[[], t.Iterable[t.Any]]] = None,
+    ) -> "FramePipeline":
+        self.stages.append((name, fn, fan_out, flush))
+        return self
+
+    def run(
+        self, source: t.Iterable[t.Any], source_name: str = "decode"
+    ) -> dict[str, StageStats]:
+        """Run the pipeline until the source is exhausted. Returns the stats per stage."""
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        stats = {source_name: StageStats(source_name)}
+        for name, *_ in self.stages:
+            stats[name] = StageStats(name)
+
+        # The stages run in the caller's context, i.e. with its debug_logging()
+        threads = [
+            threading.Thread(
+                target=contextvars.copy_context().run,
+                args=(
+                    self._run_source,
+                    source,
+                    queues[0] if queues else None,
+                    stats[source_name],
+                ),
+                name=f"pipeline-{source_name}",
+                daemon=True,
+            )
+        ]
+        for index, (name, fn, fan_out, flush) in enumerate(self.stages):
+            output_queue = queues[index + 1] if index + 1 < len(queues) else None
+            threads.append(
+                threading.Thread(
+                    target=contextvars.copy_context().run,
+                    args=(
+                        self._run_stage,
+                        fn,
+                        fan_out,
+                        flush,
+                        queues[index],
+                        output_queue,
+                        stats[name],
+                    ),
+                    name=f"pipeline-{name}",
+                    daemon=True,
+                )
+            )
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        if self._error is not None:
+            raise self._error
+        return stats
+
+    def _fail(self, error: BaseException) -> None:
+        with self._error_lock:
+            if self._error is None:
+                self._error = error
+        self._abort.set()
+
+    def _put(self, output_queue: queue.Queue, item: t.Any, stats: StageStats) -> bool:
+        try:
+            output_queue.put_nowait(item)
+            return True
+        except queue.Full:
+            pass
+
+        stats.output_stalls += 1
+        started = time.perf_counter()
+        try:
+            while not self._abort.is_set():
+                try:
+                    output_queue.put(item, timeout=self.poll_interval)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+        finally:
+            stats.output_wait_s += time.perf_counter() - started
+
+    def _get(self, input_queue: queue.Queue, stats: StageStats) -> t.Any:
+        stats.sample_queue_depth(input_queue.qsize())
+        try:
+            return input_queue.get_nowait()
+        except queue.Empty:
+            pass
+
+        stats.input_stalls += 1
+        started = time.perf_counter()
+        try:
+            while not self._abort.is_set():
+                try:
+                    return input_queue.get(timeout=self.poll_interval)
+                except queue.Empty:
+                    continue
+            return _END_OF_STREAM
+        finally:
+            stats.input_wait_s += time.perf_counter() - started
+
+    def _run_source(
+        self,
+        source: t.Iterable[t.Any],
+        output_queue: t.Optional[queue.Queue],
+        stats: StageStats,
+    ) -> None:
+        iterator = iter(source)
+        try:
+            while not self._abort.is_set():
+                started = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                finally:
+                    stats.busy_s += time.perf_counter() - started
+                stats.processed += 1
+                if output_queue is not None and not self._put(output_queue, item, stats):
+                    break
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            # Release the source (i.e. the video capture) even when aborting
+            close = getattr(iterator, "close", None)
+            if close is not None:
+                close()
+            if output_queue is not None:
+                self._put(output_queue, _END_OF_STREAM, stats)
+
+    def _emit(
+        self,
+        output_queue: t.Optional[queue.Queue],
+        results: t.Iterable[t.Any],
+        stats: StageStats,
+    ) -> bool:
+        if output_queue is None:
+            return True
+        for result in results:
+            if result is not None and not self._put(output_queue, result, stats):
+                return False
+        return True
+
+    def _run_stage(
+        self,
+        fn: t.Callable[[t.Any], t.Any],
+        fan_out: bool,
+        flush: t.Optional[t.Callable[[], t.Iterable[t.Any]]],
+        input_queue: queue.Queue,
+        output_queue: t.Optional[queue.Queue],
+        stats: StageStats,
+    ) -> None:
+        try:
+            while True:
+                item = self._get(input_queue, stats)
+                if item is _END_OF_STREAM:
+                    if flush is not None and not self._abort.is_set():
+                        self._emit(output_queue, flush(), stats)
+                    break
+
+                started = time.perf_counter()
+                result = fn(item)
+                stats.busy_s += time.perf_counter() - started
+                stats.processed += 1
+
+                if not self._emit(output_queue, result if fan_out else (result,), stats):
+                    break
+        except BaseException as e:
+            self._fail(e)
+        finally:
+            if output_queue is not None:
+                self._put(output_queue, _END_OF_STREAM, stats)
@@ -3,36 +3,60 @@ import zipfile
 import os
 import typing as t
 
-import boto3
-
 from app.api.api_v2.schemas.exercise import (
+    ExerciseFeedback,
     ExerciseFinalEvaluation,
 )
-from app.api.api_v2.schemas.feedback import Feedback
 from app.api.api_v2.schemas.pose import OutputPose
-from app.enum import ExerciseEnum, Viewpoint
-from app.api.api_v2.services.video import VideoService, VideoServiceFactory
+from app.api.api_v2.services.feedback import FeedbackService
+from app.api.api_v2.services.ffmepg_pipe import FFmpegPipeReader
+from app.api.api_v2.services.landmark_cache import get_cache_key, get_landmark_cache
+from app.api.api_v2.services.progress import (
+    ProgressRelay,
+    ProgressReporter,
+    ProgressSink,
+)
+from app.enum import ExerciseEnum, ExerciseMeasureEnum, Viewpoint
+from app.api.api_v2.services.video import VideoServiceFactory
+from app.api.api_v2.services.storage import get_storage
+from app.api.api_v2.services.track_archive import get_track_archive
+from app.api.api_v2.services.video_input import get_video_sources
+from app.api.api_v2.services.workers import map_in_workers, runs_in_workers
+from app.core.config import settings
+from app.core.logging import debug, get_logger
+
+logger = get_logger(__name__)
 
 HARDCODED_VIEWPOINTS = [
     Viewpoint.SIDE,
 ]
 
 
+def evaluate_view(
+    video_path: str,
+    viewpoint: Viewpoint,
+    exercise_type: ExerciseEnum,
+    cache_key: t.Optional[str] = None,
+    archive_key: t.Optional[str] = None,
+    progress_sink: t.Optional[ProgressSink] = None,
+) -> ExerciseFinalEvaluation:
+    """Process the video of one viewpoint. Runs in a view worker process."""
+    video_service = VideoServiceFactory.get_video_service(video_path, viewpoint)
+    video_service.progress = ProgressReporter(progress_sink, viewpoint.value)
+    video_service.process_video(
+        exercise_type, cache_key=cache_key, archive_key=archive_key
+    )
+    return video_service.get_final_evaluation()
+
+
 class PoseEvaluationService:
+    """
+    Stateless between requests, so one instance (and its storage backend) is
+    shared by the whole process. Per-video state lives in the VideoService instances.
+    """
+
     def __init__(self):
-        self.video_services: t.List[VideoService] = []
-        # Use AWS credential chain: IAM roles in AWS, profiles locally
-        env_profile = os.getenv("AWS_PROFILE")
-
-        if env_profile:
-            # Local development with explicit profile
-            print(f"🏠 Local dev: Using AWS profile: {env_profile}")
-            session = boto3.Session(profile_name=env_profile)
-            self.s3_client = session.client("s3")
-        else:
-            # AWS environment: Use IAM roles automatically
-            print("☁️ AWS environment: Using IAM role credentials")
-            self.s3_client = boto3.client("s3")
+        self.storage = get_storage()
 
     def unzip_videos_to_temp(self, file_path: str) -> list[str]:
         """
@@ -57,7 +81,9 @@ class PoseEvaluationService:
             # (Lambda has /tmp with 512MB–10GB space)
             final_paths = []
             for f in extracted_files:
-                dest_path = os.path.join("/tmp", os.path.basename(f))
+                # Unique names, other evaluations extract videos at the same time
+                fd, dest_path = tempfile.mkstemp(suffix=f"_{os.path.basename(f)}")
+                os.close(fd)
                 os.rename(f, dest_path)  # or shutil.copy if you want to keep original
                 final_paths.append(dest_path)
 
@@ -70,41 +96,112 @@ class PoseEvaluationService:
         exercise_type: ExerciseEnum,
     ) -> OutputPose:
         """
-        Process videos and return a streaming response.
+        Process the videos of a ZIP file, one per viewpoint.
 
         exercise_type: The exercise type to process.
         """
-        feedback_list: t.List[Feedback] = []
-        s3_video_keys: list[str] = []
-
         video_paths = self.unzip_videos_to_temp(file_path)
+        return self.evaluate_videos(video_paths, user_id, exercise_type)
 
-        for video_path, viewpoint in zip(video_paths, HARDCODED_VIEWPOINTS):
-            video_service = VideoServiceFactory.get_video_service(video_path, viewpoint)
-            self.video_services.append(video_service)
-
-            video_service.process_video(exercise_type)
+    def evaluate_stored_object(
+        self,
+        key: str,
+        user_id: str,
+        exercise_type: ExerciseEnum,
+    ) -> OutputPose:
+        """
+        Process the videos of an uploaded ZIP file (or single video) in storage.
 
-            final_evaluation: ExerciseFinalEvaluation = (
-                video_service.get_final_evaluation()
+        The videos are decoded straight from storage (see get_video_sources), so
+        the first frame does not wait for the whole object. Without ffmpeg, or
+        with VIDEO_STREAMED_INPUT off, the object is downloaded to /tmp first.
+        """
+        if settings.VIDEO_STREAMED_INPUT and FFmpegPipeReader.is_available():
+            sources = get_video_sources(self.storage, key)
+            return self.evaluate_videos(
+                [source.path for source in sources],
+                user_id,
+                exercise_type,
+                content_hashes=[source.content_hash for source in sources],
             )
 
-            print("########################")
-            print("Final evaluation: ", final_evaluation)
-            print("########################")
+        # Stream from storage -> /tmp (constant memory)
+        fd, tmp_path = tempfile.mkstemp(suffix=os.path.splitext(key)[1])
+        os.close(fd)
+        try:
+            self.storage.download_file(key, tmp_path)
+            return self.evaluate_pose(tmp_path, user_id, exercise_type)
+        finally:
+            os.remove(tmp_path)
+
+    def evaluate_videos(
+        self,
+        video_paths: t.List[str],
+        user_id: str,
+        exercise_type: ExerciseEnum,
+        report_progress: t.Optional[ProgressSink] = None,
+        content_hashes: t.Optional[t.List[str]] = None,
+    ) -> OutputPose:
+        """
+        Process video files already on disk (or ffmpeg URLs), one per viewpoint.
+        The files are removed once processed.
+
+        exercise_type: The exercise type to process.
+        report_progress: Called with the Progress events of the videos.
+        content_hashes: Hashes of the videos for the landmark cache and the track
+            archive, by default the hashes of the files.
+        """
+        if content_hashes is None:
+            content_hashes = [None] * len(video_paths)
+
+        feedback_list: t.List[dict[ExerciseMeasureEnum, ExerciseFeedback]] = []
+        s3_video_keys: list[str] = []
+
+        # Re-submitted videos (retries) reuse their cached landmark tracks, and
+        # every track is archived under the same key to rescore the session later
+        views = list(zip(video_paths, content_hashes, HARDCODED_VIEWPOINTS))
+        cache_keys = [
+            get_cache_key(video_path, content_hash)
+            for video_path, content_hash, _ in views
+        ]
+        use_cache = get_landmark_cache() is not None
+        track_archive = get_track_archive()
+        track_keys: list[str] = []
+
+        # The viewpoints are processed concurrently, one worker process per video
+        in_workers = runs_in_workers(len(video_paths))
+        with ProgressRelay(report_progress, in_workers) as progress_sink:
+            final_evaluations: t.List[ExerciseFinalEvaluation] = map_in_workers(
+                evaluate_view,
+                [
+                    (
+                        video_path,
+                        viewpoint,
+                        exercise_type,
+                        cache_key if use_cache else None,
+                        track_archive.get_key(cache_key),
+                        progress_sink,
+                    )
+                    for (video_path, _, viewpoint), cache_key in zip(views, cache_keys)
+                ],
+            )
 
-            feedback_list.extend(final_evaluation.feedback)
+        for final_evaluation in final_evaluations:
+            debug(logger, "Final evaluation: %s", final_evaluation)
+            feedback_list.append(final_evaluation.feedback)
             s3_video_keys.extend(final_evaluation.s3_video_keys)
+            if final_evaluation.track_key is not None:
+                track_keys.append(final_evaluation.track_key)
 
-        print("feedback_list", feedback_list)
+        debug(logger, "Feedback list: %s", feedback_list)
 
-        output_feedback = video_service.feedback_service.summarize_final_evaluation(
+        output_feedback = FeedbackService().summarize_final_evaluation(
             feedback_list,
             exercise_type,
         )
 
-        print("Returning streaming response")
         return OutputPose(
             feedback=output_feedback,
             s3_video_keys=s3_video_keys,
+            track_keys=track_keys,
         )
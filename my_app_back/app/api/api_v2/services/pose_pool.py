@@ -0,0 +1,111 @@
+import contextlib
+import functools
+import queue
+import threading
+import typing as t
+
+import mediapipe as mp
+import numpy as np
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+
+class PosePool:
+    """
+    Process-wide pool of initialized MediaPipe Pose graphs.
+
+    Building a Pose graph (graph config, TFLite interpreter, delegates) is a large
+    fixed cost, so graphs are created once and checked out per video. A graph is
+    reset when it comes back so no tracking state leaks into the next video.
+    At most `size` graphs exist; checkout blocks while all of them are in use.
+    """
+
+    def __init__(self, size: int = 1, **pose_kwargs):
+        self.size = max(1, size)
+        self.pose_kwargs = pose_kwargs
+        # LIFO hands out the most recently used, i.e. warmest, graph first
+        self._idle: queue.LifoQueue = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _create(self):
+        return mp.solutions.pose.Pose(**self.pose_kwargs)
+
+    def _acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+        if not create:
+            return self._idle.get()
+
+        try:
+            return self._create()
+        except BaseException:
+            with self._lock:
+                self._created -= 1
+            raise
+
+    def _release(self, pose) -> None:
+        try:
+            pose.reset()
+        except Exception as e:
+            # A graph that cannot be reset is dropped, a new one is built on demand
+            logger.warning("Discarding MediaPipe Pose graph that failed to reset: %s", e)
+            with self._lock:
+                self._created -= 1
+            return
+        self._idle.put(pose)
+
+    @contextlib.contextmanager
+    def checkout(self) -> t.Iterator[t.Any]:
+        """Borrow a Pose graph for one video."""
+        pose = self._acquire()
+        try:
+            yield pose
+        finally:
+            self._release(pose)
+
+    def warm_up(self, count: t.Optional[int] = None) -> None:
+        """Build `count` graphs (default: all) and run one blank frame through each."""
+        count = self.size if count is None else min(count, self.size)
+        blank_frame = np.zeros((256, 256, 3), dtype=np.uint8)
+        poses = []
+        try:
+            for _ in range(count):
+                pose = self._acquire()
+                poses.append(pose)
+                pose.process(blank_frame)
+        finally:
+            for pose in poses:
+                self._release(pose)
+
+    def close(self) -> None:
+        while True:
+            try:
+                pose = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            pose.close()
+            with self._lock:
+                self._created -= 1
+
+
+@functools.lru_cache(maxsize=None)
+def get_pose_pool() -> PosePool:
+    """Pose pool shared by every video processed in this process."""
+    return PosePool(
+        size=settings.POSE_POOL_SIZE,
+        static_image_mode=False,
+        model_complexity=1,
+    )
@@ -0,0 +1,155 @@
+import functools
+import multiprocessing
+import threading
+import time
+import typing as t
+
+from app.api.api_v2.schemas.job import Progress
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+ProgressSink = t.Callable[[Progress], None]
+
+
+class ProgressReporter:
+    """
+    Count the frames going through the stages of a video and emit Progress events,
+    at most one every min_interval_s so the counting stays off the hot loop's cost.
+    The ETA of a stage is extrapolated from the frames its main counter has
+    processed since the stage started.
+    """
+
+    COUNTERS = ("frames_decoded", "frames_inferred", "frames_encoded")
+
+    def __init__(
+        self,
+        emit: t.Optional[ProgressSink] = None,
+        viewpoint: t.Optional[str] = None,
+        min_interval_s: t.Optional[float] = None,
+    ):
+        self.emit = emit
+        self.viewpoint = viewpoint
+        if min_interval_s is None:
+            min_interval_s = settings.PROGRESS_EVENT_INTERVAL_S
+        self.min_interval_s = min_interval_s
+        self.counts = dict.fromkeys(self.COUNTERS, 0)
+        self.stage = "queued"
+        self.stage_frames = 0
+        self.stage_counter = "frames_decoded"
+        self._stage_start_count = 0
+        self._stage_start_time = time.monotonic()
+        self._last_emit_time = 0.0
+        self._lock = threading.Lock()
+
+    def start_stage(
+        self, stage: str, frames: int = 0, counter: str = "frames_decoded"
+    ) -> None:
+        """Enter a stage of `frames` frames, whose progress is tracked by counter."""
+        self.stage = stage
+        self.stage_frames = frames
+        self.stage_counter = counter
+        self._stage_start_count = self.counts[counter]
+        self._stage_start_time = time.monotonic()
+        self._emit(force=True)
+
+    def add(self, counter: str, frames: int = 1) -> None:
+        # Every counter is only incremented by the thread of its pipeline stage
+        self.counts[counter] += frames
+        if self.emit is not None:
+            self._emit()
+
+    def finish(self) -> None:
+        self.start_stage("done")
+
+    def snapshot(self) -> Progress:
+        now = time.monotonic()
+        stage_done = self.counts[self.stage_counter] - self._stage_start_count
+        eta_s = None
+        if self.stage_frames and stage_done:
+            remaining = max(self.stage_frames - stage_done, 0)
+            eta_s = round((now - self._stage_start_time) / stage_done * remaining, 1)
+        return Progress(
+            viewpoint=self.viewpoint,
+            stage=self.stage,
+            stage_frames=self.stage_frames,
+            stage_frames_done=min(stage_done, self.stage_frames or stage_done),
+            eta_s=eta_s,
+            **self.counts,
+        )
+
+    def _emit(self, force: bool = False) -> None:
+        if self.emit is None:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_emit_time < self.min_interval_s:
+            return
+        with self._lock:
+            if not force and now - self._last_emit_time < self.min_interval_s:
+                return
+            self._last_emit_time = now
+        try:
+            self.emit(self.snapshot())
+        except Exception as e:
+            # Progress is informative only, it never fails the video
+            logger.warning("Progress event dropped: %s", e)
+            self.emit = None
+
+
+class QueueProgressSink:
+    """Picklable sink that sends the events from a worker process to a ProgressRelay."""
+
+    def __init__(self, queue):
+        self.queue = queue
+
+    def __call__(self, progress: Progress) -> None:
+        self.queue.put(progress)
+
+
+@functools.lru_cache(maxsize=None)
+def get_progress_manager():
+    """Manager process owning the progress queues shared with the worker processes."""
+    return multiprocessing.get_context("spawn").Manager()
+
+
+class ProgressRelay:
+    """
+    Forward the progress events of the worker processes to report, from a thread
+    of this process. Entering it returns the sink to hand to the workers, or None
+    when there is nothing to report to or no queue can be shared. Without
+    in_workers the tasks run in this process and report itself is the sink, so
+    no Manager process or queue is involved.
+    """
+
+    def __init__(self, report: t.Optional[ProgressSink], in_workers: bool = True):
+        self.report = report
+        self.in_workers = in_workers
+        self.queue = None
+        self.thread: t.Optional[threading.Thread] = None
+
+    def __enter__(self) -> t.Optional[ProgressSink]:
+        if self.report is None or not self.in_workers:
+            return self.report
+        try:
+            self.queue = get_progress_manager().Queue()
+        except (OSError, EOFError, NotImplementedError) as e:
+            logger.warning("Progress events not available: %s", e)
+            return None
+        self.thread = threading.Thread(
+            target=self._forward, name="progress-relay", daemon=True
+        )
+        self.thread.start()
+        return QueueProgressSink(self.queue)
+
+    def _forward(self) -> None:
+        while True:
+            progress = self.queue.get()
+            if progress is None:
+                return
+            self.report(progress)
+
+    def __exit__(self, *exc_info) -> None:
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
@@ -0,0 +1,84 @@
+import typing as t
+
+from app.api.api_v2.schemas.exercise import ExerciseFinalEvaluation
+from app.api.api_v2.schemas.rescore import RescoreResult, RescoreSession
+from app.api.api_v2.schemas.thresholds import ThresholdProfile
+from app.api.api_v2.services.exercise import ExerciseFactory
+from app.api.api_v2.services.landmark_track import LandmarkTrack
+from app.api.api_v2.services.track_archive import get_track_archive
+from app.api.api_v2.services.workers import get_worker_count, map_in_workers
+from app.enum import ExerciseEnum
+
+
+def rescore_track(
+    track: LandmarkTrack,
+    exercise_type: ExerciseEnum,
+    frame_shape: tuple,
+    profile: t.Optional[ThresholdProfile] = None,
+) -> ExerciseFinalEvaluation:
+    """
+    Evaluate a stored landmark track with a threshold profile. Only the measures
+    are recomputed: there is no video to decode, infer or annotate.
+    """
+    exercise_service = ExerciseFactory.get_exercise_strategy_service(
+        exercise_type, len(track), profile
+    )
+    try:
+        exercise_service.evaluate_track(track, frame_shape)
+    except NotImplementedError:
+        raise ValueError(f"Exercise {exercise_type} cannot be rescored from landmarks")
+    return ExerciseFinalEvaluation(
+        feedback=exercise_service.build_feedback(), s3_video_keys=[]
+    )
+
+
+def rescore_sessions(
+    sessions: t.List[RescoreSession], profile: ThresholdProfile
+) -> t.List[RescoreResult]:
+    """Rescore a batch of sessions from the track archive. Runs in a worker process."""
+    track_archive = get_track_archive()
+    results = []
+    for session in sessions:
+        try:
+            track, frame_shape = track_archive.get(session.track_key)
+        except FileNotFoundError:
+            results.append(
+                RescoreResult(
+                    track_key=session.track_key, error="Landmark track not found"
+                )
+            )
+            continue
+        except ValueError as e:
+            results.append(RescoreResult(track_key=session.track_key, error=str(e)))
+            continue
+
+        try:
+            evaluation = rescore_track(track, session.exercise_type, frame_shape, profile)
+        except (ValueError, NotImplementedError) as e:
+            results.append(RescoreResult(track_key=session.track_key, error=str(e)))
+            continue
+        results.append(RescoreResult(track_key=session.track_key, evaluation=evaluation))
+    return results
+
+
+class RescoreService:
+    """
+    Rescore stored sessions with a threshold profile, i.e. to sweep thresholds over
+    the archive. Sessions are split in one batch per worker process.
+    """
+
+    def rescore(
+        self, sessions: t.List[RescoreSession], profile: ThresholdProfile
+    ) -> t.List[RescoreResult]:
+        if not sessions:
+            return []
+        batch_count = get_worker_count(len(sessions))
+        batch_size = -(-len(sessions) // batch_count)
+        batches = [
+            sessions[start : start + batch_size]
+            for start in range(0, len(sessions), batch_size)
+        ]
+        batch_results = map_in_workers(
+            rescore_sessions, [(batch, profile) for batch in batches]
+        )
+        return [result for results in batch_results for result in results]
@@ -0,0 +1,79 @@
+import typing as t
+
+import numpy as np
+
+from app.api.api_v2.services.landmark_track import LandmarkTrack, PoseLandmark
+
+# Joints whose speed decides the inference stride
+MOTION_LANDMARKS = [
+    PoseLandmark.LEFT_SHOULDER,
+    PoseLandmark.RIGHT_SHOULDER,
+    PoseLandmark.LEFT_ELBOW,
+    PoseLandmark.RIGHT_ELBOW,
+    PoseLandmark.LEFT_WRIST,
+    PoseLandmark.RIGHT_WRIST,
+    PoseLandmark.LEFT_HIP,
+    PoseLandmark.RIGHT_HIP,
+    PoseLandmark.LEFT_KNEE,
+    PoseLandmark.RIGHT_KNEE,
+    PoseLandmark.LEFT_ANKLE,
+    PoseLandmark.RIGHT_ANKLE,
+]
+
+
+class AdaptiveInferenceStride:
+    """
+    Decide which frames go through pose inference.
+
+    After each inferred frame the speed of the fastest joint since the previous
+    inferred frame is measured, in normalized image units per second. While it is
+    above motion_threshold (the concentric/eccentric phases) every frame is inferred.
+    While the joints barely move the stride doubles up to max_stride, and the
+    skipped frames are filled by LandmarkTrack.interpolate(). A lost pose also
+    resets the stride to 1 so the model can reacquire it.
+    """
+
+    def __init__(self, fps: float, max_stride: int = 1, motion_threshold: float = 0.1):
+        self.fps = fps if fps > 0 else 30
+        self.max_stride = max(1, max_stride)
+        self.motion_threshold = motion_threshold
+        self.stride = 1
+        self.last_inferred_frame: t.Optional[int] = None
+        self.inferred_frames = 0
+        self.interpolated_frames = 0
+
+    def should_infer(self, frame_index: int) -> bool:
+        if self.last_inferred_frame is None:
+            return True
+        return frame_index - self.last_inferred_frame >= self.stride
+
+    def update(self, frame_index: int, track: LandmarkTrack) -> None:
+        """Adapt the stride once frame_index has been inferred and stored in the track."""
+        previous = self.last_inferred_frame
+        self.last_inferred_frame = frame_index
+        self.inferred_frames += 1
+
+        if previous is None:
+            return
+        if not (track.is_detected(previous) and track.is_detected(frame_index)):
+            self.stride = 1
+            return
+
+        self.interpolated_frames += frame_index - previous - 1
+        if self.joint_speed(track, previous, frame_index) >= self.motion_threshold:
+            self.stride = 1
+        else:
+            self.stride = min(self.max_stride, self.stride * 2)
+
+    def joint_speed(self, track: LandmarkTrack, start: int, end: int) -> float:
+        """Displacement of the fastest joint between two frames, per second."""
+        displacement = (
+            track.data[end, MOTION_LANDMARKS, :2] - track.data[start, MOTION_LANDMARKS, :2]
+        )
+        return float(np.max(np.linalg.norm(displacement, axis=-1))) * self.fps / (end - start)
+
+    def __str__(self):
+        return (
+            f"AdaptiveInferenceStride(inferred={self.inferred_frames}, "
+            f"interpolated={self.interpolated_frames}, max_stride={self.max_stride})"
+        )
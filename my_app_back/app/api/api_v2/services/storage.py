@@ -0,0 +1,272 @@
+import functools
+import os
+import shutil
+import tempfile
+import typing as t
+
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import ClientError
+
+from app.constants import BUCKET_NAME
+from app.core.aws import get_client
+from app.core.config import settings
+
+
+class StoredObject:
+    """Metadata of a stored object. The etag changes whenever its content does."""
+
+    def __init__(self, key: str, size: int, etag: str):
+        self.key = key
+        self.size = size
+        self.etag = etag
+
+
+class StorageBackend:
+    """
+    Where the uploaded and the annotated videos live, by key ("results/x.mp4").
+    Missing keys raise FileNotFoundError in every backend.
+    """
+
+    def put_file(
+        self,
+        local_path: str,
+        key: str,
+        content_type: t.Optional[str] = None,
+        move: bool = False,
+    ) -> None:
+        """Store a local file. With move the local file is consumed."""
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def put_stream(
+        self, key: str, stream: t.BinaryIO, content_type: t.Optional[str] = None
+    ) -> None:
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def get_stream(self, key: str) -> t.BinaryIO:
+        """The object as a file-like stream, to be closed by the caller."""
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def get_range(self, key: str, start: int, end: int) -> bytes:
+        """Bytes [start, end) of the object."""
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def download_file(self, key: str, local_path: str) -> None:
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def stat(self, key: str) -> StoredObject:
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def get_url(self, key: str, expires_s: t.Optional[int] = None) -> str:
+        """URL (or path) ffmpeg can read the object from, with ranged requests."""
+        raise NotImplementedError("Subclasses must implement this method")
+
+    def list(self, prefix: str = "") -> t.List[str]:
+        """Keys starting with prefix, sorted."""
+        raise NotImplementedError("Subclasses must implement this method")
+
+
+@functools.lru_cache(maxsize=None)
+def get_transfer_config() -> TransferConfig:
+    """Multipart settings of the uploads: large videos upload in parallel parts."""
+    part_size = settings.RESULT_UPLOAD_PART_SIZE_MB * 1024 * 1024
+    return TransferConfig(
+        multipart_threshold=part_size,
+        multipart_chunksize=part_size,
+        max_concurrency=settings.RESULT_UPLOAD_MAX_CONCURRENCY,
+    )
+
+
+def _is_not_found(error: ClientError) -> bool:
+    return error.response.get("Error", {}).get("Code") in ("NoSuchKey", "404", "NotFound")
+
+
+class S3StorageBackend(StorageBackend):
+    """Objects of an S3 bucket."""
+
+    def __init__(self, s3_client, bucket: str):
+        self.s3_client = s3_client
+        self.bucket = bucket
+
+    def put_file(
+        self,
+        local_path: str,
+        key: str,
+        content_type: t.Optional[str] = None,
+        move: bool = False,
+    ) -> None:
+        self.s3_client.upload_file(
+            local_path,
+            self.bucket,
+            key,
+            ExtraArgs={"ContentType": content_type} if content_type else None,
+            Config=get_transfer_config(),
+        )
+        if move:
+            os.remove(local_path)
+
+    def put_stream(
+        self, key: str, stream: t.BinaryIO, content_type: t.Optional[str] = None
+    ) -> None:
+        self.s3_client.upload_fileobj(
+            stream,
+            self.bucket,
+            key,
+            ExtraArgs={"ContentType": content_type} if content_type else None,
+            Config=get_transfer_config(),
+        )
+
+    def _get_object(self, key: str, **kwargs) -> dict:
+        try:
+            return self.s3_client.get_object(Bucket=self.bucket, Key=key, **kwargs)
+        except ClientError as e:
+            if _is_not_found(e):
+                raise FileNotFoundError(f"s3://{self.bucket}/{key}") from e
+            raise
+
+    def get_stream(self, key: str) -> t.BinaryIO:
+        return self._get_object(key)["Body"]
+
+    def get_range(self, key: str, start: int, end: int) -> bytes:
+        response = self._get_object(key, Range=f"bytes={start}-{end - 1}")
+        return response["Body"].read()
+
+    def download_file(self, key: str, local_path: str) -> None:
+        self.s3_client.download_file(
+            self.bucket, key, local_path, Config=get_transfer_config()
+        )
+
+    def stat(self, key: str) -> StoredObject:
+        try:
+            head = self.s3_client.head_object(Bucket=self.bucket, Key=key)
+        except ClientError as e:
+            if _is_not_found(e):
+                raise FileNotFoundError(f"s3://{self.bucket}/{key}") from e
+            raise
+        return StoredObject(key, head["ContentLength"], head.get("ETag", "").strip('"'))
+
+    def get_url(self, key: str, expires_s: t.Optional[int] = None) -> str:
+        return self.s3_client.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": self.bucket, "Key": key},
+            ExpiresIn=expires_s or settings.STORAGE_URL_EXPIRES_S,
+        )
+
+    def list(self, prefix: str = "") -> t.List[str]:
+        paginator = self.s3_client.get_paginator("list_objects_v2")
+        keys = []
+        for page in paginator.paginate(Bucket=self.bucket, Prefix=prefix):
+            keys.extend(item["Key"] for item in page.get("Contents", []))
+        return sorted(keys)
+
+
+class LocalStorageBackend(StorageBackend):
+    """
+    Objects are files under a directory, to run (and benchmark) the whole service
+    on one machine without network. Files are moved in with a rename when
+    possible, and copied with shutil.copyfile, which uses the zero-copy
+    os.sendfile on Linux. Writes land aside and are renamed into place, so
+    readers never see half an object.
+    """
+
+    def __init__(self, root: str):
+        self.root = os.path.abspath(root)
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        path = os.path.abspath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise ValueError(f"Key outside of the storage directory: {key}")
+        return path
+
+    def _temp_path(self, path: str) -> str:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Dot files are not listed, so a half written object is never a key
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix=".")
+        os.close(fd)
+        return temp_path
+
+    def _write(self, path: str, write: t.Callable[[str], None]) -> None:
+        temp_path = self._temp_path(path)
+        try:
+            write(temp_path)
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+    def put_file(
+        self,
+        local_path: str,
+        key: str,
+        content_type: t.Optional[str] = None,
+        move: bool = False,
+    ) -> None:
+        path = self._path(key)
+        if move:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                os.replace(local_path, path)
+                return
+            except OSError:
+                # Another filesystem, the file has to be copied
+                pass
+        self._write(path, lambda temp_path: shutil.copyfile(local_path, temp_path))
+        if move:
+            os.remove(local_path)
+
+    def put_stream(
+        self, key: str, stream: t.BinaryIO, content_type: t.Optional[str] = None
+    ) -> None:
+        def write(temp_path: str) -> None:
+            with open(temp_path, "wb") as f:
+                shutil.copyfileobj(stream, f, settings.UPLOAD_CHUNK_SIZE)
+
+        self._write(self._path(key), write)
+
+    def get_stream(self, key: str) -> t.BinaryIO:
+        return open(self._path(key), "rb")
+
+    def get_range(self, key: str, start: int, end: int) -> bytes:
+        fd = os.open(self._path(key), os.O_RDONLY)
+        try:
+            return os.pread(fd, max(end - start, 0), start)
+        finally:
+            os.close(fd)
+
+    def download_file(self, key: str, local_path: str) -> None:
+        shutil.copyfile(self._path(key), local_path)
+
+    def stat(self, key: str) -> StoredObject:
+        stat = os.stat(self._path(key))
+        return StoredObject(key, stat.st_size, f"{stat.st_mtime_ns:x}-{stat.st_size:x}")
+
+    def get_url(self, key: str, expires_s: t.Optional[int] = None) -> str:
+        path = self._path(key)
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)
+        return path
+
+    def list(self, prefix: str = "") -> t.List[str]:
+        keys = []
+        for directory, _, files in os.walk(self.root):
+            for name in files:
+                if name.startswith("."):
+                    continue
+                key = os.path.relpath(os.path.join(directory, name), self.root)
+                key = key.replace(os.sep, "/")
+                if key.startswith(prefix):
+                    keys.append(key)
+        return sorted(keys)
+
+
+@functools.lru_cache(maxsize=None)
+def get_storage() -> StorageBackend:
+    """Storage backend configured by STORAGE_BACKEND."""
+    backend = settings.STORAGE_BACKEND
+    if backend == "s3":
+        bucket = settings.STORAGE_S3_BUCKET or BUCKET_NAME
+        return S3StorageBackend(get_client("s3"), bucket)
+    if backend == "local":
+        return LocalStorageBackend(settings.STORAGE_LOCAL_DIR)
+    raise ValueError(f"Unknown storage backend: {backend}")
@@ -0,0 +1,74 @@
+import functools
+import io
+import struct
+import typing as t
+
+from app.api.api_v2.services.landmark_track import LandmarkTrack
+from app.api.api_v2.services.storage import StorageBackend, get_storage
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Binary format of an archived session: magic, version, frame height and width,
+# followed by LandmarkTrack.to_bytes()
+_SESSION_MAGIC = b"LMSS"
+_SESSION_VERSION = 1
+_SESSION_HEADER = struct.Struct("<4sHII")
+
+
+class TrackArchive:
+    """
+    Landmark tracks of every processed video, kept with their frame shape so a
+    session can be rescored (see rescore.py) long after its video was processed.
+    Unlike the landmark cache, entries are never evicted nor expired. Like it, a
+    failed write is only logged: the evaluation goes on, without a track key.
+    """
+
+    SUFFIX = ".lmtk"
+
+    def __init__(self, storage: StorageBackend, prefix: str):
+        self.storage = storage
+        self.prefix = prefix
+
+    def get_key(self, cache_key: str) -> str:
+        """Archive key of the track with the given landmark cache key."""
+        return f"{self.prefix}{cache_key}{self.SUFFIX}"
+
+    def put(self, key: str, track: LandmarkTrack, frame_shape: tuple) -> bool:
+        """Archive a track, False if the write failed."""
+        height, width = frame_shape[:2]
+        payload = (
+            _SESSION_HEADER.pack(_SESSION_MAGIC, _SESSION_VERSION, height, width)
+            + track.to_bytes()
+        )
+        try:
+            self.storage.put_stream(
+                key, io.BytesIO(payload), content_type="application/octet-stream"
+            )
+        except Exception as e:
+            logger.warning("Landmark track archive write failed for %s: %s", key, e)
+            return False
+        logger.info("Landmark track archived as %s", key)
+        return True
+
+    def get(self, key: str) -> t.Tuple[LandmarkTrack, tuple]:
+        """
+        The track and the (height, width, 3) frame shape of an archived session.
+        Raises FileNotFoundError for unknown keys and ValueError on a foreign payload.
+        """
+        with self.storage.get_stream(key) as stream:
+            payload = stream.read()
+        if len(payload) < _SESSION_HEADER.size:
+            raise ValueError("Truncated archived track")
+        magic, version, height, width = _SESSION_HEADER.unpack_from(payload)
+        if (magic, version) != (_SESSION_MAGIC, _SESSION_VERSION):
+            raise ValueError(f"Unsupported archived track format: {magic!r} v{version}")
+        track = LandmarkTrack.from_bytes(payload[_SESSION_HEADER.size :])
+        return track, (height, width, 3)
+
+
+@functools.lru_cache(maxsize=None)
+def get_track_archive() -> TrackArchive:
+    """Track archive under TRACK_ARCHIVE_PREFIX of the storage backend."""
+    return TrackArchive(get_storage(), settings.TRACK_ARCHIVE_PREFIX)
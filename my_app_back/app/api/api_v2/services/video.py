@@ -1,50 +1,104 @@
 import io
+import multiprocessing
 import os
+import shutil
 import tempfile
 import typing as t
 from zipfile import ZipFile
 
 import cv2
-import mediapipe as mp
 import numpy as np
 from fastapi import HTTPException, UploadFile
 
 from app.api.api_v2.schemas.video import VideoMetadata
 from app.api.api_v2.services.exercise import ExerciseFactory
 from app.api.api_v2.services.feedback import FeedbackService
+from app.api.api_v2.services.ffmepg_pipe import FFmpegPipeReader
+from app.api.api_v2.services.pipeline import FramePipeline, StageStats
+from app.api.api_v2.services.pose_pool import get_pose_pool
+from app.api.api_v2.services.progress import ProgressReporter
+from app.core.config import settings
+from app.core.logging import LogSampler, debug, get_logger, is_debug_enabled
 from app.enum import ExerciseEnum, Viewpoint
 from app.api.api_v2.schemas.exercise import ExerciseFinalEvaluation
+from app.api.api_v2.services.landmark_cache import get_landmark_cache
+from app.api.api_v2.services.landmark_track import LandmarkTrack
+from app.api.api_v2.services.track_archive import get_track_archive
+from app.api.api_v2.services.sampling import AdaptiveInferenceStride
+from app.api.api_v2.services.workers import get_worker_count, map_in_workers
+
+logger = get_logger(__name__)
+
+
+class FramePacket:
+    """A decoded frame travelling through the processing pipeline."""
+
+    __slots__ = ("frame_index", "frame", "detected")
+
+    def __init__(self, frame_index: int, frame: np.ndarray):
+        self.frame_index = frame_index
+        self.frame = frame
+        self.detected = False
 
 
 class VideoService:
     def __init__(self, feedback_service: FeedbackService):
-        self.mp_pose = mp.solutions.pose
         self.feedback_service = feedback_service
 
         self.video_metadata: t.List[VideoMetadata] = []
         self.video_paths: t.List[str] = []
+        self.pipeline_stats: dict[str, StageStats] = {}
+        self.landmark_track = LandmarkTrack()
+        # Track archive key of the processed video, None if it was not archived
+        self.track_key: t.Optional[str] = None
+        self.batch_evaluation = False
+        self.inference_stride: t.Optional[AdaptiveInferenceStride] = None
+        self.video_reader: t.Optional[FFmpegPipeReader] = None
+        self._pending_packets: t.List[FramePacket] = []
+        # Frame counters, only sent anywhere when given a sink (see evaluate_view)
+        self.progress = ProgressReporter()
+
+    def _open_video_reader(self, video_path: str) -> t.Optional[FFmpegPipeReader]:
+        """ffmpeg decoder with downscaling and fps reduction, if ffmpeg is available."""
+        try:
+            return FFmpegPipeReader(
+                video_path,
+                short_side=settings.VIDEO_DECODE_SHORT_SIDE,
+                fps=settings.VIDEO_DECODE_FPS,
+            )
+        except (FileNotFoundError, RuntimeError) as e:
+            logger.warning("FFmpeg decoding not available, falling back to OpenCV: %s", e)
+            return None
 
     def set_video_params(self, video_path: str, viewpoint: Viewpoint) -> None:
         """Preprocess the video."""
         self.viewpoint = viewpoint
-        cap = cv2.VideoCapture(video_path)
+        self.video_path = video_path
+        self.video_reader = self._open_video_reader(video_path)
+
+        if self.video_reader is not None:
+            self.fps = self.video_reader.fps
+            self.total_frames = self.video_reader.total_frames
+            self.frame_shape = (self.video_reader.height, self.video_reader.width, 3)
+        else:
+            cap = cv2.VideoCapture(video_path)
 
-        # Get the video metadata
-        self.fps = cap.get(cv2.CAP_PROP_FPS) if cap.get(cv2.CAP_PROP_FPS) else 30
-        self.total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+            # Get the video metadata
+            self.fps = cap.get(cv2.CAP_PROP_FPS) if cap.get(cv2.CAP_PROP_FPS) else 30
+            self.total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
 
-        # Get the video dimensions
-        ok, frame = cap.read()
-        if not ok:
+            # Get the video dimensions
+            ok, frame = cap.read()
             cap.release()
-            raise RuntimeError(
-                f"Could not read the first frame of the video in {video_path}"
-            )
-        self.video_path = video_path
-        h, w = frame.shape[:2]
+            if not ok:
+                raise RuntimeError(
+                    f"Could not read the first frame of the video in {video_path}"
+                )
+            self.frame_shape = frame.shape
+        h, w = self.frame_shape[:2]
 
         # check if the video is vertical
-        print(f"h: {h}, w: {w}")
+        debug(logger, "Video %s is %sx%s (h x w)", video_path, h, w)
         is_vertical = h > w
         if not is_vertical:
             raise HTTPException(
@@ -63,46 +117,328 @@ class VideoService:
     def _set_exercise_service(self, exercise_type: ExerciseEnum, total_frames: int):
         self.exercise_service = self._get_exercise_service(exercise_type, total_frames)
 
-    def process_video(
-        self,
-        exercise_type: ExerciseEnum,
-    ) -> None:
-        """Process a video file and analyze exercise form."""
+    def _capture_frames(self, start_frame: int = 0) -> t.Iterator[np.ndarray]:
+        """Fallback decoder when ffmpeg is not available."""
         cap = cv2.VideoCapture(self.video_path)
-        frame_count = 0
-
-        self.exercise_service = self._get_exercise_service(
-            exercise_type, self.total_frames
-        )
-
-        with self.mp_pose.Pose(static_image_mode=False, model_complexity=1) as pose:
+        if start_frame:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+        try:
             while cap.isOpened():
                 ret, frame = cap.read()
                 if not ret:
                     break
+                yield frame
+        finally:
+            cap.release()
 
-                rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-                result = pose.process(rgb_frame)
-                landmarks = result.pose_landmarks
+    def _decode_frames(
+        self, start_frame: int = 0, end_frame: t.Optional[int] = None
+    ) -> t.Iterator[FramePacket]:
+        """Decode stage: read the frames of the video in [start_frame, end_frame)."""
+        # The frame count is an estimate and sizes the per-frame measures
+        if self.total_frames:
+            end_frame = min(end_frame or self.total_frames, self.total_frames)
+
+        if self.video_reader is not None:
+            frame_count = None if end_frame is None else end_frame - start_frame
+            frames = self.video_reader.frames(start_frame, frame_count)
+        else:
+            frames = self._capture_frames(start_frame)
+        # Checked once per decode, so per-frame logging costs nothing when it is off
+        sample = LogSampler(settings.LOG_SAMPLE_EVERY) if is_debug_enabled(logger) else None
+        try:
+            for frame_count, frame in enumerate(frames, start=start_frame):
+                if end_frame is not None and frame_count >= end_frame:
+                    break
 
-                if landmarks:
-                    self.exercise_service.evaluate_frame(
-                        frame_img=frame,
-                        frame_index=frame_count,
-                        landmarks=landmarks,
-                    )
+                if sample is not None and sample():
+                    debug(logger, "Decoded frame %s of %s", frame_count, self.video_path)
+                self.progress.add("frames_decoded")
+                yield FramePacket(frame_count, frame)
+        finally:
+            frames.close()
 
-                print(f"Processing frame {frame_count}...")
+    def _infer_pose(self, pose, packet: FramePacket) -> t.List[FramePacket]:
+        """
+        Pose stage: run MediaPipe on the frame and store it in the landmark track.
+        Frames skipped by the inference stride are held until the next inferred
+        frame, then released in order with interpolated landmarks.
+        """
+        self._pending_packets.append(packet)
+        if not self.inference_stride.should_infer(packet.frame_index):
+            return []
+        return self._run_pose_inference(pose, packet)
+
+    def _flush_pose(self, pose) -> t.List[FramePacket]:
+        """Infer the last frame of the video so the held frames can be released."""
+        if not self._pending_packets:
+            return []
+        return self._run_pose_inference(pose, self._pending_packets[-1])
+
+    def _run_pose_inference(self, pose, packet: FramePacket) -> t.List[FramePacket]:
+        rgb_frame = cv2.cvtColor(packet.frame, cv2.COLOR_BGR2RGB)
+        result = pose.process(rgb_frame)
+        self.landmark_track.set_frame(packet.frame_index, result.pose_landmarks)
+
+        previous = self.inference_stride.last_inferred_frame
+        if previous is not None:
+            self.landmark_track.interpolate(previous, packet.frame_index)
+        self.inference_stride.update(packet.frame_index, self.landmark_track)
+
+        packets, self._pending_packets = self._pending_packets, []
+        for pending in packets:
+            pending.detected = self.landmark_track.is_detected(pending.frame_index)
+        self.progress.add("frames_inferred", len(packets))
+        return packets
+
+    def _evaluate_frame(self, packet: FramePacket) -> t.Optional[FramePacket]:
+        """Evaluate stage: compute the measures. Only frames to annotate go on."""
+        if not packet.detected:
+            return None
 
-                frame_count += 1
+        # In batch mode the measures are computed once the whole track is available
+        if not self.batch_evaluation:
+            self.exercise_service.evaluate_frame(
+                frame_img=packet.frame,
+                frame_index=packet.frame_index,
+                track=self.landmark_track,
+            )
+        if not self.exercise_service.should_annotate(packet.frame_index):
+            return None
+        return packet
+
+    def _annotate_frame(self, packet: FramePacket) -> None:
+        """Annotate stage: draw the feedback and feed the ffmpeg encoders."""
+        self.exercise_service.annotate_frame(
+            frame_img=packet.frame,
+            frame_index=packet.frame_index,
+            track=self.landmark_track,
+        )
+        self.progress.add("frames_encoded")
 
-            cap.release()
+    def _track_frames(
+        self,
+        start_frame: int = 0,
+        end_frame: t.Optional[int] = None,
+        annotate: bool = True,
+    ) -> None:
+        """
+        Run the frames in [start_frame, end_frame) through the pipeline, filling
+        the landmark track. Without annotate only the decode and pose stages run.
+        """
+        self.inference_stride = AdaptiveInferenceStride(
+            fps=self.fps,
+            max_stride=settings.VIDEO_INFERENCE_MAX_STRIDE,
+            motion_threshold=settings.VIDEO_INFERENCE_MOTION_THRESHOLD,
+        )
+        self._pending_packets = []
+
+        # Pose graphs are expensive to build, they are reused across videos
+        with get_pose_pool().checkout() as pose:
+            pipeline = FramePipeline(queue_size=settings.VIDEO_PIPELINE_QUEUE_SIZE)
+            pipeline.add_stage(
+                "pose",
+                lambda packet: self._infer_pose(pose, packet),
+                fan_out=True,
+                flush=lambda: self._flush_pose(pose),
+            )
+            if annotate:
+                pipeline.add_stage("evaluate", self._evaluate_frame)
+                pipeline.add_stage("annotate", self._annotate_frame)
+            self.pipeline_stats = pipeline.run(
+                self._decode_frames(start_frame, end_frame), "decode"
+            )
 
-        print(f"video path: {self.video_path} processed")
+    def track_chunk(self, start_frame: int, end_frame: int) -> LandmarkTrack:
+        """
+        Landmark track of the frames in [start_frame, end_frame). Tracking starts
+        VIDEO_CHUNK_OVERLAP_FRAMES earlier so the pose is already locked on by the
+        first frame of the chunk, and the overlap is dropped.
+        """
+        seed_frame = max(0, start_frame - settings.VIDEO_CHUNK_OVERLAP_FRAMES)
+        self.landmark_track = LandmarkTrack(capacity=end_frame)
+        self._track_frames(seed_frame, end_frame, annotate=False)
+        return self.landmark_track.slice(start_frame, end_frame)
+
+    def _get_chunks(self) -> t.List[t.Tuple[int, int]]:
+        """Frame ranges to track on separate processes, empty to track in one pass."""
+        if not (
+            settings.VIDEO_CHUNKED_MODE
+            and self.batch_evaluation
+            and self.total_frames
+            # Worker processes do not split their video any further
+            and multiprocessing.parent_process() is None
+        ):
+            return []
+
+        chunk_count = get_worker_count(
+            self.total_frames // max(1, settings.VIDEO_CHUNK_MIN_FRAMES)
+        )
+        if chunk_count < 2:
+            return []
+
+        chunk_size = -(-self.total_frames // chunk_count)
+        return [
+            (start, min(start + chunk_size, self.total_frames))
+            for start in range(0, self.total_frames, chunk_size)
+        ]
+
+    def _track_chunks(self, chunks: t.List[t.Tuple[int, int]]) -> None:
+        """Track the chunks on worker processes and stitch them into one track."""
+        chunk_tracks = map_in_workers(
+            track_video_chunk,
+            [(self.video_path, self.viewpoint, start, end) for start, end in chunks],
+        )
+        for (start, _), chunk_track in zip(chunks, chunk_tracks):
+            self.landmark_track.merge(start, chunk_track)
+            # The chunk workers do not report progress, their frames count here
+            self.progress.add("frames_inferred", len(chunk_track))
+
+    def _lookup_track(self, packet: FramePacket) -> FramePacket:
+        """Track stage of the render pass: the landmarks were computed by the chunks."""
+        packet.detected = self.landmark_track.is_detected(packet.frame_index)
+        return packet
+
+    def _render_annotations(self) -> None:
+        """Decode the video again to draw the annotations from the stitched track."""
+        self.progress.start_stage("rendering", self.total_frames)
+        pipeline = FramePipeline(queue_size=settings.VIDEO_PIPELINE_QUEUE_SIZE)
+        pipeline.add_stage("track", self._lookup_track)
+        pipeline.add_stage("evaluate", self._evaluate_frame)
+        pipeline.add_stage("annotate", self._annotate_frame)
+        self.pipeline_stats = pipeline.run(self._decode_frames(), "decode")
+
+    def _render_segments(self) -> None:
+        """
+        Second pass: seek back and annotate only the frame ranges of the flagged
+        segments, plus a preview from the first detected frame for the measures
+        rated PERFECT.
+        """
+        detected_frames = np.flatnonzero(self.landmark_track.detected)
+        preview_start = int(detected_frames[0]) if len(detected_frames) else 0
+        render_ranges = self.exercise_service.get_render_ranges(
+            preview_start, settings.VIDEO_PREVIEW_FRAMES
+        )
+        self.exercise_service.render_ranges = render_ranges
+
+        # Overlapping ranges of different measures are decoded once
+        intervals = []
+        for start, end in sorted(r for ranges in render_ranges.values() for r in ranges):
+            if intervals and start <= intervals[-1][1]:
+                intervals[-1][1] = max(intervals[-1][1], end)
+            else:
+                intervals.append([start, end])
+        self.progress.start_stage(
+            "rendering", sum(end - start for start, end in intervals)
+        )
+
+        self.pipeline_stats = {}
+        for start, end in intervals:
+            pipeline = FramePipeline(queue_size=settings.VIDEO_PIPELINE_QUEUE_SIZE)
+            pipeline.add_stage("track", self._lookup_track)
+            pipeline.add_stage("evaluate", self._evaluate_frame)
+            pipeline.add_stage("annotate", self._annotate_frame)
+            stats = pipeline.run(self._decode_frames(start, end), "decode")
+            for name, stage_stats in stats.items():
+                self.pipeline_stats[f"{name}[{start}:{end}]"] = stage_stats
+        self.rendered_intervals = intervals
+
+    def process_video(
+        self,
+        exercise_type: ExerciseEnum,
+        cache_key: t.Optional[str] = None,
+        archive_key: t.Optional[str] = None,
+    ) -> None:
+        """
+        Process a video file and analyze exercise form.
+
+        Decoding, pose inference, measure evaluation and annotation/encoding run as
+        pipeline stages on their own threads, so decoding and encoding overlap with
+        the MediaPipe inference, which takes most of the time. Inference itself is
+        skipped on frames where the joints barely move (see AdaptiveInferenceStride).
+
+        Long videos of exercises evaluated on the whole track are split in time
+        chunks tracked on several processes, then annotated in a second pass.
+
+        In two-pass mode (VIDEO_TWO_PASS) the first pass only tracks and rates the
+        measures, and the second one renders the flagged segments (_render_segments).
+
+        With a cache_key (see landmark_cache.get_cache_key) the landmark track of a
+        video already processed is loaded from the landmark cache and pose inference
+        is skipped. With an archive_key the track is also kept in the track archive,
+        so the session can be rescored later (a failed write only leaves track_key
+        unset).
+        """
+        self.exercise_service = self._get_exercise_service(
+            exercise_type, self.total_frames
+        )
+        self.landmark_track = LandmarkTrack(capacity=self.total_frames)
+        self.batch_evaluation = (
+            settings.VIDEO_BATCH_EVALUATION
+            and self.exercise_service.supports_track_evaluation
+        )
+
+        two_pass = (
+            settings.VIDEO_TWO_PASS
+            and self.batch_evaluation
+            and self.exercise_service.supports_segment_rendering
+        )
+        self.rendered_intervals = None
+
+        landmark_cache = get_landmark_cache() if cache_key else None
+        cached_track = landmark_cache.get(cache_key) if landmark_cache else None
+
+        chunks = [] if cached_track is not None else self._get_chunks()
+        if cached_track is None:
+            self.progress.start_stage("tracking", self.total_frames, "frames_inferred")
+        if cached_track is not None:
+            self.landmark_track = cached_track
+        elif chunks:
+            self._track_chunks(chunks)
+        else:
+            self._track_frames(annotate=not two_pass)
+        tracking_stats = self.pipeline_stats
+
+        if landmark_cache is not None and cached_track is None:
+            landmark_cache.put(cache_key, self.landmark_track)
+        self.track_key = None
+        if archive_key is not None and get_track_archive().put(
+            archive_key, self.landmark_track, self.frame_shape
+        ):
+            self.track_key = archive_key
+
+        if self.batch_evaluation:
+            self.progress.start_stage("evaluating")
+            self.exercise_service.evaluate_track(self.landmark_track, self.frame_shape)
+
+        if two_pass:
+            self._render_segments()
+        elif chunks or cached_track is not None:
+            self._render_annotations()
+
+        logger.info("Video %s processed", self.video_path)
+        if cached_track is not None:
+            logger.info("Landmark track loaded from the cache: %s", cache_key)
+        if chunks:
+            logger.info("Tracked in %s chunks: %s", len(chunks), chunks)
+        if self.rendered_intervals is not None:
+            logger.info("Rendered frame ranges: %s", self.rendered_intervals)
+        for stage_stats in tracking_stats.values():
+            logger.info("%s", stage_stats)
+        if self.pipeline_stats is not tracking_stats:
+            # Stats of the render pass
+            for stage_stats in self.pipeline_stats.values():
+                logger.info("%s", stage_stats)
+        if not chunks and cached_track is None:
+            logger.info("%s", self.inference_stride)
 
     def get_final_evaluation(self) -> ExerciseFinalEvaluation:
         self._clean_temp_file()
-        return self.exercise_service.get_final_evaluation()
+        self.progress.start_stage("uploading")
+        final_evaluation = self.exercise_service.get_final_evaluation()
+        final_evaluation.track_key = self.track_key
+        self.progress.finish()
+        return final_evaluation
 
     def _clean_temp_file(self) -> None:
         """Clean up the temporary files."""
@@ -132,6 +468,14 @@ class VideoService:
         return temp_path
 
 
+def track_video_chunk(
+    video_path: str, viewpoint: Viewpoint, start_frame: int, end_frame: int
+) -> LandmarkTrack:
+    """Landmark track of a chunk of a video. Runs in a worker process."""
+    video_service = VideoServiceFactory.get_video_service(video_path, viewpoint)
+    return video_service.track_chunk(start_frame, end_frame)
+
+
 class VideoServiceFactory:
     @staticmethod
     def get_video_service(video_path: str, viewpoint: Viewpoint) -> VideoService:
@@ -143,14 +487,19 @@ class VideoServiceFactory:
         return video_service
 
     @staticmethod
-    async def save_to_temp_file(file: UploadFile) -> str:
-        """Save the video file to a temporary file."""
-        video_fd, video_path = tempfile.mkstemp(suffix=".mp4")
-        os.close(video_fd)
-
-        with open(video_path, "wb") as f:
-            content = await file.read()
-            f.write(content)
+    def save_to_temp_file(file: UploadFile) -> str:
+        """
+        Save an uploaded video to a temporary file, copied in chunks of
+        UPLOAD_CHUNK_SIZE bytes so the upload is never held in memory at once.
+        """
+        suffix = os.path.splitext(file.filename or "")[1] or ".mp4"
+        video_fd, video_path = tempfile.mkstemp(suffix=suffix)
+        try:
+            with os.fdopen(video_fd, "wb") as f:
+                shutil.copyfileobj(file.file, f, settings.UPLOAD_CHUNK_SIZE)
+        except BaseException:
+            os.remove(video_path)
+            raise
 
         return video_path
 
@@ -159,7 +508,7 @@ class VideoServiceFactory:
         video_paths: t.List[str],
     ) -> io.BytesIO:
         """Process the videos and return a zip file."""
-        print("Processing videos response")
+        debug(logger, "Processing videos response")
         root_dir_name = "videos"
         zip_buffer = io.BytesIO()
         with ZipFile(zip_buffer, "w") as zip_archive:
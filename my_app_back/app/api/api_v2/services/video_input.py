@@ -0,0 +1,201 @@
+import collections
+import hashlib
+import io
+import os
+import shutil
+import struct
+import tempfile
+import threading
+import typing as t
+import zipfile
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from app.api.api_v2.services.storage import StorageBackend
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Signature and layout of the local file header preceding the data of a zip member
+_LOCAL_HEADER = struct.Struct("<4s22xHH")
+_LOCAL_HEADER_SIGNATURE = b"PK\x03\x04"
+
+
+class RangeReader(io.RawIOBase):
+    """
+    Seekable, read-only file over a stored object, fetched with ranged reads of
+    block_size bytes. Sequential reads prefetch the next readahead blocks in
+    the background, so the consumer rarely waits on a request.
+    """
+
+    def __init__(
+        self,
+        storage: StorageBackend,
+        key: str,
+        size: t.Optional[int] = None,
+        block_size: t.Optional[int] = None,
+        readahead: t.Optional[int] = None,
+    ):
+        super().__init__()
+        self.storage = storage
+        self.key = key
+        if size is None:
+            size = storage.stat(key).size
+        self.size = size
+        self.block_size = block_size or settings.STORAGE_READ_BLOCK_SIZE
+        if readahead is None:
+            readahead = settings.STORAGE_READ_AHEAD_BLOCKS
+        self.readahead = readahead
+        self.position = 0
+        # Ranged reads sent, counted from the reader and the readahead threads
+        self.requests = 0
+        self._requests_lock = threading.Lock()
+        # Fetched and in-flight blocks, oldest first
+        self._blocks: collections.OrderedDict[int, Future] = collections.OrderedDict()
+        self._executor = (
+            ThreadPoolExecutor(readahead, thread_name_prefix="storage-readahead")
+            if readahead
+            else None
+        )
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self.position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self.position
+        elif whence == io.SEEK_END:
+            offset += self.size
+        if offset < 0:
+            raise ValueError(f"Negative seek position {offset}")
+        self.position = offset
+        return self.position
+
+    def readinto(self, buffer) -> int:
+        if self.position >= self.size:
+            return 0
+        block_index, block_offset = divmod(self.position, self.block_size)
+        block = self._get_block(block_index)
+        read = min(len(buffer), len(block) - block_offset)
+        buffer[:read] = block[block_offset : block_offset + read]
+        self.position += read
+        return read
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+        self._blocks.clear()
+        super().close()
+
+    def _fetch(self, block_index: int) -> bytes:
+        start = block_index * self.block_size
+        with self._requests_lock:
+            self.requests += 1
+        return self.storage.get_range(
+            self.key, start, min(start + self.block_size, self.size)
+        )
+
+    def _get_block(self, block_index: int) -> bytes:
+        future = self._blocks.get(block_index)
+        if future is None:
+            future = Future()
+            future.set_result(self._fetch(block_index))
+            self._blocks[block_index] = future
+        self._blocks.move_to_end(block_index)
+
+        # Prefetch the blocks after it, which sequential reads need next
+        if self._executor is not None:
+            last_block = (self.size - 1) // self.block_size
+            for index in range(
+                block_index + 1, min(block_index + self.readahead, last_block) + 1
+            ):
+                if index not in self._blocks:
+                    self._blocks[index] = self._executor.submit(self._fetch, index)
+
+        while len(self._blocks) > self.readahead + 1:
+            self._blocks.popitem(last=False)[1].cancel()
+        return future.result()
+
+
+class VideoSource:
+    """
+    A video of a stored object: the input the decoder reads (an ffmpeg URL or a
+    temporary file) and the hash of its content, for the landmark cache.
+    """
+
+    def __init__(self, path: str, content_hash: str):
+        self.path = path
+        self.content_hash = content_hash
+
+
+def _get_content_hash(*parts: t.Any) -> str:
+    return hashlib.blake2b(
+        "|".join(str(part) for part in parts).encode(), digest_size=20
+    ).hexdigest()
+
+
+def _get_member_data_offset(archive_file: t.BinaryIO, info: zipfile.ZipInfo) -> int:
+    """Offset in the archive of the data of a member, after its local header."""
+    archive_file.seek(info.header_offset)
+    signature, name_length, extra_length = _LOCAL_HEADER.unpack(
+        archive_file.read(_LOCAL_HEADER.size)
+    )
+    if signature != _LOCAL_HEADER_SIGNATURE:
+        raise zipfile.BadZipFile(f"Bad local header of {info.filename}")
+    return info.header_offset + _LOCAL_HEADER.size + name_length + extra_length
+
+
+def _extract_member(archive: zipfile.ZipFile, info: zipfile.ZipInfo) -> str:
+    """Decompress a member to a temporary file, as its bytes arrive."""
+    fd, path = tempfile.mkstemp(suffix=os.path.splitext(info.filename)[1])
+    try:
+        with os.fdopen(fd, "wb") as out, archive.open(info) as member:
+            shutil.copyfileobj(member, out, settings.UPLOAD_CHUNK_SIZE)
+    except BaseException:
+        os.remove(path)
+        raise
+    return path
+
+
+def get_video_sources(storage: StorageBackend, key: str) -> t.List[VideoSource]:
+    """
+    Videos of an uploaded object, a ZIP file or a single video, decoded straight
+    from storage. ffmpeg reads the object URL with ranged requests, and a stored
+    zip member is the byte range of the archive it occupies (the subfile
+    protocol), so decoding starts with the first bytes and nothing is written to
+    /tmp. Only compressed members, which cannot be read at random offsets, are
+    extracted.
+    """
+    stored = storage.stat(key)
+    url = storage.get_url(key)
+
+    if not key.lower().endswith(".zip"):
+        return [VideoSource(url, _get_content_hash(stored.etag, stored.size))]
+
+    reader = RangeReader(storage, key, size=stored.size)
+    sources = []
+    # The reader fetches the central directory and the members on demand
+    with io.BufferedReader(reader, reader.block_size) as archive_file:
+        with zipfile.ZipFile(archive_file) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                content_hash = _get_content_hash(
+                    stored.etag, info.filename, info.CRC, info.file_size
+                )
+                is_encrypted = info.flag_bits & 0x1
+                if info.compress_type == zipfile.ZIP_STORED and not is_encrypted:
+                    start = _get_member_data_offset(archive_file, info)
+                    path = f"subfile,,start,{start},end,{start + info.file_size},,:{url}"
+                else:
+                    logger.info("Extracting compressed member %s", info.filename)
+                    path = _extract_member(archive, info)
+                sources.append(VideoSource(path, content_hash))
+    logger.info("Read the archive %s with %s ranged requests", key, reader.requests)
+    return sources
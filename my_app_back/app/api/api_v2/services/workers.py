@@ -0,0 +1,135 @@
+import functools
+import multiprocessing
+import os
+import typing as t
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+
+from fastapi import HTTPException
+
+from app.api.api_v2.services.pose_pool import get_pose_pool
+from app.core.config import settings
+from app.core.logging import debug_logging, get_logger, is_debug_override
+
+logger = get_logger(__name__)
+
+T = t.TypeVar("T")
+
+
+class _WorkerHTTPException(Exception):
+    """HTTPException does not survive pickling, it is sent back from workers as this."""
+
+    def __init__(self, status_code: int, detail: t.Any):
+        super().__init__(status_code, detail)
+
+
+def get_available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def get_available_memory_mb() -> int:
+    # In Lambda the configured memory is the limit, not the host memory
+    lambda_memory = os.getenv("AWS_LAMBDA_FUNCTION_MEMORY_SIZE")
+    if lambda_memory:
+        return int(lambda_memory)
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES") // 2**20
+    except (ValueError, OSError, AttributeError):
+        return settings.WORKER_MEMORY_MB
+
+
+def get_max_workers() -> int:
+    """Worker processes of the process pool, capped by the CPUs and the memory."""
+    workers = min(
+        get_available_cpus(),
+        max(1, get_available_memory_mb() // settings.WORKER_MEMORY_MB),
+    )
+    if settings.WORKER_MAX_PROCESSES:
+        workers = min(workers, settings.WORKER_MAX_PROCESSES)
+    return max(1, workers)
+
+
+def get_worker_count(tasks: int) -> int:
+    """Worker processes for `tasks` videos or chunks, see get_max_workers."""
+    return max(1, min(tasks, get_max_workers()))
+
+
+def _init_worker() -> None:
+    # Each worker owns its Pose graph, built once when the worker starts
+    get_pose_pool().warm_up(count=1)
+
+
+@functools.lru_cache(maxsize=None)
+def get_worker_executor() -> t.Optional[ProcessPoolExecutor]:
+    """
+    The process pool shared by every request, sized once by get_max_workers.
+    Worker processes are kept alive between requests so their Pose graphs stay
+    warm. None where process pools are not supported (i.e. AWS Lambda has no
+    /dev/shm for the semaphores).
+    """
+    try:
+        # spawn: forking a process that already runs threads and MediaPipe graphs is unsafe
+        return ProcessPoolExecutor(
+            max_workers=get_max_workers(),
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+        )
+    except (OSError, NotImplementedError) as e:
+        logger.warning("Process pool not available, tasks run sequentially: %s", e)
+        return None
+
+
+def runs_in_workers(tasks: int) -> bool:
+    """Whether map_in_workers sends `tasks` tasks to the worker processes."""
+    return get_worker_count(tasks) > 1 and get_worker_executor() is not None
+
+
+def _call_in_worker(fn: t.Callable[..., T], args: tuple, debug: bool = False) -> T:
+    try:
+        # The debug_logging() of the request follows its tasks to the workers
+        with debug_logging(debug):
+            return fn(*args)
+    except HTTPException as e:
+        raise _WorkerHTTPException(e.status_code, e.detail) from None
+
+
+def map_in_workers(fn: t.Callable[..., T], tasks_args: t.List[tuple]) -> t.List[T]:
+    """
+    Call fn(*args) for every task (a viewpoint video or a chunk of a video), in
+    worker processes when runs_in_workers, and return the results in order.
+    A call has at most get_worker_count tasks in the shared pool at a time.
+    Otherwise the tasks run one after another in this process.
+    """
+    workers = get_worker_count(len(tasks_args))
+    if not runs_in_workers(len(tasks_args)):
+        return [fn(*args) for args in tasks_args]
+    executor = get_worker_executor()
+
+    debug = is_debug_override()
+    futures: t.List[Future] = []
+    pending: t.Set[Future] = set()
+    try:
+        while len(futures) < len(tasks_args) or pending:
+            while len(futures) < len(tasks_args) and len(pending) < workers:
+                future = executor.submit(
+                    _call_in_worker, fn, tasks_args[len(futures)], debug
+                )
+                futures.append(future)
+                pending.add(future)
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                # Raises the first failure without waiting for the other tasks
+                future.result()
+        return [future.result() for future in futures]
+    except _WorkerHTTPException as e:
+        raise HTTPException(status_code=e.args[0], detail=e.args[1])
+    except BrokenProcessPool:
+        # A worker died (i.e. out of memory), start a new pool on the next request
+        get_worker_executor.cache_clear()
+        raise
+    finally:
+        for future in pending:
+            future.cancel()
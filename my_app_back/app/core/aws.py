@@ -0,0 +1,75 @@
+import os
+import threading
+
+import boto3
+from botocore.config import Config
+
+from app.core.config import settings
+from app.core.logging import get_logger
+
+logger = get_logger(__name__)
+
+# Sessions and client construction are not thread-safe, built clients are
+_lock = threading.Lock()
+_session: boto3.Session = None
+_clients: dict = {}
+_resources: dict = {}
+
+
+def get_session() -> boto3.Session:
+    """
+    The boto3 session of the process. Uses the AWS credential chain: IAM roles
+    in AWS, the AWS_PROFILE profile locally.
+    """
+    global _session
+    with _lock:
+        if _session is None:
+            env_profile = os.getenv("AWS_PROFILE")
+            if env_profile:
+                # Local development with explicit profile
+                logger.info("Local dev: Using AWS profile: %s", env_profile)
+            else:
+                # AWS environment: Use IAM roles automatically
+                logger.info("AWS environment: Using IAM role credentials")
+            _session = boto3.Session(profile_name=env_profile or None)
+        return _session
+
+
+def _get_config() -> Config:
+    return Config(
+        max_pool_connections=settings.AWS_MAX_POOL_CONNECTIONS,
+        tcp_keepalive=True,
+        retries={"max_attempts": settings.AWS_MAX_ATTEMPTS, "mode": "standard"},
+    )
+
+
+def get_client(service_name: str):
+    """
+    Client of the service shared by the whole process (and the warm invocations
+    of a Lambda), so its connection pool is reused. Built on first use.
+    """
+    client = _clients.get(service_name)
+    if client is None:
+        session = get_session()
+        with _lock:
+            client = _clients.get(service_name)
+            if client is None:
+                client = session.client(service_name, config=_get_config())
+                _clients[service_name] = client
+    return client
+
+
+def get_resource(service_name: str):
+    """
+    Resource of the service shared by the whole process, see get_client. Unlike
+    clients, resources are not thread-safe: use get_client from other threads.
+    """
+    resource = _resources.get(service_name)
+    if resource is None:
+        session = get_session()
+        with _lock:
+            resource = _resources.get(service_name)
+            if resource is None:
+                resource = session.resource(service_name, config=_get_config())
+                _resources[service_name] = resource
+    return resource
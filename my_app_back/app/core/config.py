@@ -25,6 +25,59 @@ class Settings(BaseSettings):
     SECRET_KEY: str = "your-secret-key-here"  # Change this in production!
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
 
+    # Video processing
+    VIDEO_PIPELINE_QUEUE_SIZE: int = 8  # Max frames buffered between pipeline stages
+    VIDEO_BATCH_EVALUATION: bool = True  # Evaluate the whole landmark track at once
+    VIDEO_INFERENCE_MAX_STRIDE: int = 4  # 1 runs pose inference on every frame
+    VIDEO_INFERENCE_MOTION_THRESHOLD: float = 0.1  # Joint speed (image units/s) for full rate
+    VIDEO_DECODE_SHORT_SIDE: int = 720  # Decoded frames are scaled down to it, 0 keeps the size
+    VIDEO_DECODE_FPS: float = 0  # Drops decoded frames down to it; the frame thresholds assume 0 (source rate)
+    VIDEO_SHARED_ENCODER: bool = False  # One ffmpeg process for all the measure videos, only without VIDEO_TWO_PASS
+    VIDEO_WRITER_QUEUE_SLOTS: int = 4  # Frames queued for the ffmpeg feeder thread, 0 writes inline
+    VIDEO_WRITER_BACKPRESSURE: str = "block"  # block, drop_oldest or downsample when the queue is full
+    RESULT_UPLOAD_WORKERS: int = 8  # Threads closing and uploading the annotated videos
+    RESULT_UPLOAD_PART_SIZE_MB: int = 8  # Multipart part size (and threshold) of the uploads
+    RESULT_UPLOAD_MAX_CONCURRENCY: int = 4  # Parts of one upload sent at the same time
+    POSE_POOL_SIZE: int = 2  # MediaPipe Pose graphs kept alive per process
+    POSE_POOL_WARM_UP: bool = True  # Build the Pose graphs at startup
+    WORKER_MAX_PROCESSES: int = 0  # Processes for videos/chunks, 0 derives it from CPUs/memory
+    WORKER_MEMORY_MB: int = 1024  # Memory budget of one worker process
+    VIDEO_CHUNKED_MODE: bool = True  # Track long videos in time chunks on several processes
+    VIDEO_CHUNK_MIN_FRAMES: int = 600  # Shortest chunk worth its own process
+    VIDEO_CHUNK_OVERLAP_FRAMES: int = 30  # Frames before a chunk used to re-seed tracking
+    VIDEO_TWO_PASS: bool = True  # Score first, then only render the flagged segments
+    VIDEO_PREVIEW_FRAMES: int = 30  # Frames rendered for the measures rated PERFECT
+    JOB_BACKEND: str = "local"  # Runs the upload jobs, see services/jobs.py
+    JOB_MAX_RUNNING: int = 0  # Jobs processed at the same time, 0 is POSE_POOL_SIZE
+    JOB_TTL_S: float = 3600  # Seconds a finished job can still be polled
+    JOB_LOCK_PATH: str = "/tmp/gym-pose-jobs.lock"  # Keeps the local job backend to one process, empty disables
+    PROGRESS_EVENT_INTERVAL_S: float = 0.25  # Min seconds between progress events of a video
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024  # Bytes copied at a time from uploads to disk
+    LANDMARK_CACHE_BACKEND: str = "disk"  # disk, storage, or empty to disable the landmark cache
+    LANDMARK_CACHE_DIR: str = "/tmp/landmark_cache"  # Directory of the disk backend
+    LANDMARK_CACHE_MAX_MB: int = 256  # Size of the disk backend before LRU eviction
+    LANDMARK_CACHE_STORAGE_PREFIX: str = "landmark-cache/"  # Key prefix of the storage backend
+    TRACK_ARCHIVE_PREFIX: str = "tracks/"  # Storage prefix of the tracks kept for rescoring, never expired
+    VIDEO_STREAMED_INPUT: bool = True  # The worker decodes its input from storage, not a /tmp copy
+
+    # Storage
+    STORAGE_BACKEND: str = "s3"  # s3, or local to keep the videos on this machine
+    STORAGE_LOCAL_DIR: str = "/tmp/storage"  # Directory of the local backend
+    STORAGE_S3_BUCKET: str = ""  # Bucket of the s3 backend, empty is app.constants.BUCKET_NAME
+    STORAGE_READ_BLOCK_SIZE: int = 1024 * 1024  # Bytes of one ranged read of an object
+    STORAGE_READ_AHEAD_BLOCKS: int = 4  # Ranged reads prefetched ahead of sequential reads
+    STORAGE_URL_EXPIRES_S: int = 3600  # Lifetime of the URLs ffmpeg decodes from
+
+    # AWS
+    AWS_MAX_POOL_CONNECTIONS: int = 32  # HTTP connections kept per client, >= upload threads
+    AWS_MAX_ATTEMPTS: int = 5  # Attempts of a request, with the standard retry mode
+
+    # Logging
+    LOG_LEVEL: str = "INFO"  # DEBUG can also be enabled per request, see core/logging.py
+    LOG_FORMAT: str = "text"  # text, or json for CloudWatch
+    LOG_SAMPLE_EVERY: int = 30  # Per-frame DEBUG logs keep one frame out of it
+    LOG_DEBUG_TOKEN: str = ""  # X-Debug-Logging value enabling DEBUG per request, empty disables it
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -0,0 +1,106 @@
+import contextlib
+import contextvars
+import json
+import logging
+import sys
+import typing as t
+from datetime import datetime, timezone
+
+from app.core.config import settings
+
+# DEBUG logs of the current request or job, whatever LOG_LEVEL is (debug_logging)
+_debug_override: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "debug_override", default=False
+)
+
+# Attributes of every LogRecord, anything else was passed with extra=
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime"}
+
+
+def get_logger(name: str) -> logging.Logger:
+    """Logger of a module, use get_logger(__name__)."""
+    return logging.getLogger(name)
+
+
+def is_debug_enabled(logger: logging.Logger) -> bool:
+    """Check it before building per-frame log messages, so they cost nothing when off."""
+    return logger.isEnabledFor(logging.DEBUG) or _debug_override.get()
+
+
+def debug(logger: logging.Logger, msg: str, *args, **kwargs) -> None:
+    """logger.debug, that also logs inside a debug_logging() block."""
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug(msg, *args, stacklevel=2, **kwargs)
+    elif _debug_override.get() and not logger.disabled:
+        # handle() skips the level check of the logger, not its handlers' filters
+        logger.handle(
+            logger.makeRecord(
+                logger.name,
+                logging.DEBUG,
+                "(debug_logging)",
+                0,
+                msg,
+                args,
+                None,
+                extra=kwargs.get("extra"),
+            )
+        )
+
+
+def is_debug_override() -> bool:
+    return _debug_override.get()
+
+
+@contextlib.contextmanager
+def debug_logging(enabled: bool = True) -> t.Iterator[None]:
+    """
+    Log DEBUG messages of this context (i.e. one request) without changing
+    LOG_LEVEL. Requests enable it with an X-Debug-Logging: <LOG_DEBUG_TOKEN> header.
+    """
+    token = _debug_override.set(enabled)
+    try:
+        yield
+    finally:
+        _debug_override.reset(token)
+
+
+class LogSampler:
+    """Let the first of every `every` events through, for per-frame logs."""
+
+    def __init__(self, every: int):
+        self.every = max(1, every)
+        self.count = 0
+
+    def __call__(self) -> bool:
+        self.count += 1
+        return (self.count - 1) % self.every == 0
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, so CloudWatch Logs Insights can query the fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def configure_logging() -> None:
+    """Root logging setup from LOG_LEVEL and LOG_FORMAT (text or json)."""
+    handler = logging.StreamHandler(sys.stdout)
+    if settings.LOG_FORMAT == "json":
+        handler.setFormatter(JsonFormatter())
+    else:
+        handler.setFormatter(
+            logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+        )
+    logging.basicConfig(level=settings.LOG_LEVEL, handlers=[handler], force=True)
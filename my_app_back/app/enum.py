@@ -66,3 +66,10 @@ class ExerciseRatingEnum(Enum):
     PERFECT = "perfect"
     WARNING = "warning"
     DANGEROUS = "dangerous"
+
+
+class JobStatusEnum(str, Enum):
+    PENDING = "pending"
+    PROCESSING = "processing"
+    DONE = "done"
+    ERROR = "error"
@@ -1,3 +1,6 @@
+import secrets
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import JSONResponse
@@ -7,12 +10,24 @@ import traceback
 import logging
 
 from app.core.config import settings
+from app.core.logging import configure_logging, debug_logging
 from app.api.api_v2.api.router import pose_evaluation_router
+from app.api.api_v2.services.jobs import get_job_backend
+from app.api.api_v2.services.pose_pool import get_pose_pool
 
 # Configure logging
-logging.basicConfig(
-    level=logging.DEBUG, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
-)
+configure_logging()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Fails the startup of a second worker process, the jobs live in memory
+    get_job_backend()
+    # Build the MediaPipe graphs before the first request instead of during it
+    if settings.POSE_POOL_WARM_UP:
+        get_pose_pool().warm_up()
+    yield
+
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -21,9 +36,25 @@ app = FastAPI(
     docs_url="/docs",
     redoc_url="/redoc",
     debug=True,
+    lifespan=lifespan,
 )
 
 
+@app.middleware("http")
+async def debug_logging_middleware(request: Request, call_next):
+    # DEBUG logs of a single request (and the jobs it submits), whatever LOG_LEVEL is.
+    # Only for callers holding LOG_DEBUG_TOKEN, the logs include whole evaluations
+    token = request.headers.get("X-Debug-Logging")
+    if (
+        settings.LOG_DEBUG_TOKEN
+        and token
+        and secrets.compare_digest(token, settings.LOG_DEBUG_TOKEN)
+    ):
+        with debug_logging():
+            return await call_next(request)
+    return await call_next(request)
+
+
 @app.middleware("http")
 async def catch_exceptions_middleware(request: Request, call_next):
     try:
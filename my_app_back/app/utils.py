@@ -1,24 +1,35 @@
 import numpy as np
 
 
+def calculate_angles(a, b, c) -> np.ndarray:
+    """
+    Angle at b, in degrees, of the triangles a-b-c.
+
+    a, b and c are arrays of 2D points with shape (..., 2), i.e. (N, 2) for the
+    series of one joint or (N, 33, 2) for every joint of N frames, and the result
+    has shape (...), i.e. (N,). Degenerate triangles, where a or c is at the same
+    position as b, are masked to 0.0 instead of raising.
+    """
+    a = np.asarray(a, dtype=np.float64)
+    b = np.asarray(b, dtype=np.float64)
+    c = np.asarray(c, dtype=np.float64)
+
+    ba = a - b
+    bc = c - b
+
+    norms = np.linalg.norm(ba, axis=-1) * np.linalg.norm(bc, axis=-1)
+    degenerate = ~(norms > 0)  # also masks NaN points
+    safe_norms = np.where(degenerate, 1.0, norms)
+
+    cosine_angle = np.einsum("...i,...i->...", ba, bc) / safe_norms
+    # Ensure the cosine value is within valid range [-1, 1]
+    cosine_angle = np.clip(cosine_angle, -1.0, 1.0)
+    angles = np.degrees(np.arccos(cosine_angle))
+    return np.where(degenerate, 0.0, angles)
+
+
 def calculate_angle(a, b, c):
-    try:
-        a = np.array(a)
-        b = np.array(b)
-        c = np.array(c)
-
-        ba = a - b
-        bc = c - b
-
-        cosine_angle = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc))
-        # Ensure the cosine value is within valid range [-1, 1]
-        cosine_angle = np.clip(cosine_angle, -1.0, 1.0)
-        angle = np.arccos(cosine_angle)
-        return float(np.degrees(angle))
-    except Exception as e:
-        print(f"Error calculating angle: {e}")
-        print(f"Points: a={a}, b={b}, c={c}")
-        return 0.0
+    return float(calculate_angles(a, b, c))
 
 
 def read_documentation() -> str:
@@ -56,6 +56,12 @@ export class ArchitectureStack extends cdk.Stack {
             },
           ],
         },
+        {
+          // Landmark tracks cached by the worker, only useful for retries. The
+          // tracks kept for rescoring live under tracks/ and never expire.
+          prefix: 'landmark-cache/',
+          expiration: Duration.days(7),
+        },
       ],
       // Keep data by default; change to DESTROY for ephemeral envs:
       removalPolicy: RemovalPolicy.RETAIN,
@@ -70,8 +76,17 @@ export class ArchitectureStack extends cdk.Stack {
       enforceSSL: true,
     });
 
+    // Two videos share the ~2 vCPUs of a worker invocation, so it gets the Lambda
+    // maximum. AWS recommends a visibility timeout of at least 6x the function
+    // timeout plus the batching window, or a slow batch is redelivered (and
+    // processed a second time) while it is still running.
+    const workerTimeout = Duration.minutes(15);
+    const workerBatchingWindow = Duration.seconds(5);
+
     const ingestQueue = new sqs.Queue(this, 'IngestQueue', {
-      visibilityTimeout: Duration.minutes(10),
+      visibilityTimeout: Duration.seconds(
+        6 * workerTimeout.toSeconds() + workerBatchingWindow.toSeconds(),
+      ),
       retentionPeriod: Duration.days(14),
       deadLetterQueue: { queue: dlq, maxReceiveCount: 3 },
       enforceSSL: true,
@@ -120,12 +135,18 @@ export class ArchitectureStack extends cdk.Stack {
         { file: 'architecture/worker/Dockerfile' },
       ),
       memorySize: 3008,
-      timeout: Duration.minutes(10),
+      timeout: workerTimeout,
       architecture: lambda.Architecture.X86_64,
       ephemeralStorageSize: Size.gibibytes(10), // This high tmp storage is needed for the video proccesing. Low cost difference: 10,000 invocaciones de 10 min saldrían ≈ $1.76
       environment: {
         BUCKET: videoBucket.bucketName,
         TABLE: analysesTable.tableName,
+        // The storage backend reads the uploads and writes the results here
+        STORAGE_S3_BUCKET: videoBucket.bucketName,
+        // Shared by every worker instance, so SQS redeliveries hit the cache
+        LANDMARK_CACHE_BACKEND: 'storage',
+        // One JSON object per log line, queryable in CloudWatch Logs Insights
+        LOG_FORMAT: 'json',
 
         OMP_NUM_THREADS: '1',
         OPENBLAS_NUM_THREADS: '1',
@@ -156,9 +177,12 @@ export class ArchitectureStack extends cdk.Stack {
     });
 
     // Subscribe Worker to SQS
+    // The records of a batch are processed concurrently: ~1 vCPU and 1.5 GB per video
+    // at 3008 MB, so they share the cold start, and a batch is slower than one video.
+    // Failed records are reported back (batchItemFailures) and retried on their own.
     worker.addEventSource(new lambdaEventSources.SqsEventSource(ingestQueue, {
-      batchSize: 1,
-      maxBatchingWindow: Duration.seconds(0),
+      batchSize: 2,
+      maxBatchingWindow: workerBatchingWindow,
       reportBatchItemFailures: true,
     }));
 
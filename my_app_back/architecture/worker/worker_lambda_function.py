@@ -1,14 +1,22 @@
 import json
 import os
-import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 from enum import Enum
-from typing import Any, Dict
+from typing import Any, Dict, List, Optional
 
-import boto3
 from app.api.api_v2.services.pose_evaluation import PoseEvaluationService
+from app.api.api_v2.services.pose_pool import get_pose_pool
+from app.api.api_v2.services.storage import S3StorageBackend
+from app.api.api_v2.services.workers import get_worker_count
+from app.core.aws import get_client
+from app.core.config import settings
+from app.core.logging import configure_logging, get_logger
 from app.enum import ExerciseEnum
 
+configure_logging()
+logger = get_logger(__name__)
+
 
 class AnalysisStatus(Enum):
     PENDING = "pending"
@@ -17,101 +25,137 @@ class AnalysisStatus(Enum):
     ERROR = "error"
 
 
-def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
-    """
-    Lambda worker function triggered by SQS messages from S3 events.
-    Processes video files uploaded to S3 and performs pose analysis.
-    """
-
-    print(f"Lambda function started with event: {json.dumps(event)}")
-    print(
-        f"Environment variables: BUCKET={os.environ.get('BUCKET')}, TABLE={os.environ.get('TABLE')}"
+# Built once per container during the init phase and reused by every invocation:
+# the MediaPipe graphs and the AWS clients are a large fixed cost.
+pose_evaluation_service = PoseEvaluationService()
+logger.info("PoseEvaluationService initialized")
+if settings.POSE_POOL_WARM_UP:
+    # The records of a batch are processed concurrently, one graph each
+    get_pose_pool().warm_up()
+    logger.info("MediaPipe Pose pool warmed up")
+
+# A client, not a resource: the records are processed from several threads
+dynamodb = get_client("dynamodb")
+
+
+def set_analysis_status(
+    item_key: Dict[str, Any],
+    status: AnalysisStatus,
+    feedback: Optional[str] = None,
+    track_keys: Optional[List[str]] = None,
+) -> None:
+    update_expression = "set #s = :s"
+    names = {"#s": "status"}
+    values = {":s": {"S": status.value}}
+    if feedback is not None:
+        update_expression += ", #f = :f"
+        names["#f"] = "feedback"
+        values[":f"] = {"S": feedback}
+    if track_keys:
+        # Track archive keys, to rescore the analysis with other thresholds
+        update_expression += ", #t = :t"
+        names["#t"] = "trackKeys"
+        values[":t"] = {"L": [{"S": track_key} for track_key in track_keys]}
+    dynamodb.update_item(
+        TableName=os.environ["TABLE"],
+        Key=item_key,
+        UpdateExpression=update_expression,
+        ExpressionAttributeNames=names,
+        ExpressionAttributeValues=values,
     )
 
+
+def process_video(bucket: str, key: str) -> None:
+    """Evaluate an uploaded video (raw/<user_id>/<exercise_type>/...) and store its feedback."""
+    user_id = key.split("/")[1]
+    exercise_type = key.split("/")[2]
     try:
-        pose_evaluation_service = PoseEvaluationService()
-        print("✓ PoseEvaluationService initialized successfully")
-    except Exception as e:
-        print(f"❌ Failed to initialize PoseEvaluationService: {e}")
-        raise e
+        exercise_type = ExerciseEnum(exercise_type)
+    except ValueError:
+        raise ValueError(f"Invalid exercise type: {exercise_type}")
+
+    logger.info("Processing video: %s/%s", bucket, key)
+
+    # The video is read from the configured storage, which must be the bucket of the event
+    storage = pose_evaluation_service.storage
+    if isinstance(storage, S3StorageBackend) and storage.bucket != bucket:
+        raise ValueError(
+            f"Event of bucket {bucket}, but the storage bucket is {storage.bucket}"
+        )
+
+    # The key of the AnalysesTable, the same for every update of the analysis
+    item_key = {
+        "userId": {"S": user_id},
+        "exerciseType-date": {
+            "S": f"{exercise_type.value}-{datetime.now().strftime('%Y-%m-%d')}"
+        },
+    }
+    set_analysis_status(item_key, AnalysisStatus.PROCESSING)
 
-    s3_client = boto3.client("s3")
-    dynamodb = boto3.resource("dynamodb")
+    try:
+        # Call the pose evaluation service, which decodes from storage
+        output_pose = pose_evaluation_service.evaluate_stored_object(
+            key=key,
+            exercise_type=exercise_type,
+            user_id=user_id,
+        )
+    except Exception:
+        set_analysis_status(item_key, AnalysisStatus.ERROR)
+        raise
+
+    set_analysis_status(
+        item_key,
+        AnalysisStatus.DONE,
+        feedback=output_pose.feedback.model_dump_json(),
+        track_keys=output_pose.track_keys,
+    )
 
-    table_name = os.environ["TABLE"]
-    table = dynamodb.Table(table_name)
 
-    try:
-        # Process each SQS record
-        for record in event["Records"]:
-            # Parse S3 event from SQS message
-            s3_event = json.loads(record["body"])
-
-            if "Records" in s3_event:
-                for s3_record in s3_event["Records"]:
-                    bucket = s3_record["s3"]["bucket"]["name"]
-                    key = s3_record["s3"]["object"]["key"]
-                    user_id = key.split("/")[1]
-                    exercise_type = key.split("/")[2]
-                    try:
-                        exercise_type = ExerciseEnum(exercise_type)
-                        print(f"exercise_type: {exercise_type}")
-                    except ValueError:
-                        raise ValueError(f"Invalid exercise type: {exercise_type}")
-
-                    print(f"Processing video: {bucket}/{key}")
-
-                    # TODO: Implement actual video processing logic
-                    # 1. Download video from S3
-                    # 2. Run pose analysis using MediaPipe/OpenCV
-                    # 3. Generate results and feedback
-                    # 4. Upload results back to S3
-                    # 5. Update DynamoDB with analysis results
-
-                    # Placeholder: Update DynamoDB with processing status
-                    table.update_item(
-                        Key={
-                            "userId": user_id,
-                            "exerciseType-date": f"{exercise_type}-{datetime.now().strftime('%Y-%m-%d')}",
-                        },
-                        UpdateExpression="set #s = :s",
-                        ExpressionAttributeNames={"#s": "status"},
-                        ExpressionAttributeValues={
-                            ":s": AnalysisStatus.PROCESSING.value,
-                        },
-                    )
-
-                    # Stream from S3 -> /tmp (constant memory)
-                    tmp_path = f"/tmp/{uuid.uuid4().hex}{os.path.splitext(key)[1]}"
-                    with open(tmp_path, "wb") as f:
-                        s3_client.download_fileobj(bucket, key, f)
-
-                    # Call the pose evaluation service
-                    output_pose = pose_evaluation_service.evaluate_pose(
-                        file_path=tmp_path,
-                        exercise_type=exercise_type,
-                        user_id=user_id,
-                    )
-
-                    feedback = output_pose.feedback
-
-                    table.update_item(
-                        Key={
-                            "pk": f"user#{user_id}",
-                            "sk": f"exercise#{exercise_type}",
-                        },
-                        UpdateExpression="set #s = :s, #f = :f",
-                        ExpressionAttributeNames={"#s": "status", "#f": "feedback"},
-                        ExpressionAttributeValues={
-                            ":s": AnalysisStatus.DONE.value,
-                            ":f": feedback.model_dump_json(),
-                        },
-                    )
-        else:
-            print("No records to process")
-
-        return {"statusCode": 200, "body": json.dumps("Successfully processed videos")}
-
-    except Exception as e:
-        print(f"Error processing videos: {str(e)}")
-        raise e
+def process_record(record: Dict[str, Any]) -> None:
+    """Process the videos of an SQS message. Raises if any of them failed."""
+    # Parse S3 event from SQS message
+    s3_event = json.loads(record["body"])
+    for s3_record in s3_event.get("Records", []):
+        process_video(s3_record["s3"]["bucket"]["name"], s3_record["s3"]["object"]["key"])
+
+
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
+    """
+    Lambda worker function triggered by SQS messages from S3 events.
+    Processes the video files uploaded to S3 and performs pose analysis.
+
+    The records of the batch are processed concurrently, as many at a time as
+    the CPUs and the memory allow. Only the failed messages are reported back
+    (batchItemFailures), so SQS redelivers those and deletes the rest.
+    """
+    logger.info("Lambda function started with event: %s", json.dumps(event))
+    logger.debug(
+        "Environment variables: BUCKET=%s, TABLE=%s",
+        os.environ.get("BUCKET"),
+        os.environ.get("TABLE"),
+    )
+
+    records = event.get("Records", [])
+    if not records:
+        logger.info("No records to process")
+        return {"batchItemFailures": []}
+
+    batch_item_failures = []
+    with ThreadPoolExecutor(
+        get_worker_count(len(records)), thread_name_prefix="record"
+    ) as executor:
+        futures = {
+            record["messageId"]: executor.submit(process_record, record)
+            for record in records
+        }
+        for message_id, future in futures.items():
+            try:
+                future.result()
+            except Exception as e:
+                logger.exception("Error processing message %s: %s", message_id, e)
+                batch_item_failures.append({"itemIdentifier": message_id})
+
+    logger.info(
+        "Processed %s messages, %s failed", len(records), len(batch_item_failures)
+    )
+    return {"batchItemFailures": batch_item_failures}
@@ -0,0 +1,27 @@
+import cv2
+import numpy as np
+
+from app.api.api_v2.services.annotation import OverlayRenderer
+
+
+def draw_marker(frame, point):
+    h, w = frame.shape[:2]
+    center = (int(point[0] * w), int(point[1] * h))
+    cv2.circle(frame, center, 8, (0, 255, 255), -1, cv2.LINE_AA)
+    cv2.putText(frame, "hip", center, cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 1)
+
+
+def test_layer_matches_drawing_on_the_full_frame():
+    rng = np.random.default_rng(0)
+    frame = rng.integers(0, 255, size=(320, 180, 3), dtype=np.uint8)
+    point = np.array([0.4, 0.6])
+
+    expected = frame.copy()
+    draw_marker(expected, point)
+
+    layer = OverlayRenderer().render(frame.shape, [point], draw_marker, margin=40)
+    assert layer.alpha.shape[0] < frame.shape[0]
+
+    composited = frame.copy()
+    layer.composite(composited)
+    assert np.abs(composited.astype(int) - expected).max() <= 3
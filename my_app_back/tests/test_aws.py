@@ -0,0 +1,12 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from app.core.aws import get_client
+from app.core.config import settings
+
+
+def test_clients_are_built_once_per_process():
+    with ThreadPoolExecutor(4) as executor:
+        clients = list(executor.map(lambda _: get_client("s3"), range(8)))
+
+    assert all(client is clients[0] for client in clients)
+    assert clients[0].meta.config.max_pool_connections == settings.AWS_MAX_POOL_CONNECTIONS
@@ -0,0 +1,50 @@
+import numpy as np
+
+from app.api.api_v2.services.calculation import CalculationService
+from app.utils import calculate_angle, calculate_angles
+
+
+def test_calculate_angle_scalar():
+    assert calculate_angle([1, 0], [0, 0], [0, 1]) == 90.0
+    assert calculate_angle([1, 0], [0, 0], [-1, 0]) == 180.0
+
+
+def test_calculate_angles_masks_degenerate_vectors():
+    a = np.array([[1.0, 0.0], [0.0, 0.0], [np.nan, 0.0]])
+    b = np.zeros((3, 2))
+    c = np.array([[1.0, 1.0], [0.0, 1.0], [0.0, 1.0]])
+
+    np.testing.assert_allclose(calculate_angles(a, b, c), [45.0, 0.0, 0.0])
+
+
+def test_joint_angles_over_frames_of_joints():
+    points = np.zeros((4, 33, 2))
+    points[:, 1] = [1.0, 0.0]
+    points[:, 2] = [0.0, 1.0]
+
+    angles = CalculationService().joint_angles(points, 1, 0, 2)
+
+    assert angles.shape == (4,)
+    np.testing.assert_allclose(angles, 90.0)
+
+
+def test_squat_scalar_calculations_wrap_batch():
+    calculation_service = CalculationService()
+    frame_shape = (100, 50, 3)
+
+    assert (
+        calculation_service.squat_back_posture_calculations(
+            [0.5, 0.2], [0.5, 0.8], frame_shape
+        )
+        == 0
+    )
+    assert calculation_service.squat_depth_calculations(
+        [0.5, 0.61], [0.5, 0.5], frame_shape
+    ) == 11
+    # Zero-length torso does not raise
+    assert (
+        calculation_service.squat_back_posture_calculations(
+            [0.5, 0.5], [0.5, 0.5], frame_shape
+        )
+        == 0
+    )
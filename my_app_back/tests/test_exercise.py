@@ -0,0 +1,135 @@
+import shutil
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+import pytest
+from mediapipe.framework.formats import landmark_pb2
+
+from app.api.api_v2.services.annotation import OverlayLayer
+from app.api.api_v2.services.exercise import ExerciseSideLateralRaises, ExerciseSquad
+from app.api.api_v2.services.landmark_track import NUM_LANDMARKS, LandmarkTrack
+from app.api.api_v2.services.storage import get_storage
+from app.core.config import settings
+from app.enum import ExerciseMeasureEnum, ExerciseRatingEnum
+
+
+def make_track(frames: int, seed: int = 0) -> LandmarkTrack:
+    rng = np.random.default_rng(seed)
+    track = LandmarkTrack()
+    for frame_index in range(frames):
+        if frame_index % 7 == 3:
+            track.append(None)
+            continue
+        landmarks = landmark_pb2.NormalizedLandmarkList()
+        for x, y in rng.uniform(0.1, 0.9, size=(NUM_LANDMARKS, 2)):
+            landmarks.landmark.add(x=x, y=y, z=0.0, visibility=1.0)
+        track.append(landmarks)
+    return track
+
+
+def test_squat_track_evaluation_matches_frame_evaluation():
+    frame_shape = (1920, 1080, 3)
+    frame_img = np.zeros(frame_shape, dtype=np.uint8)
+    track = make_track(120)
+
+    per_frame = ExerciseSquad(len(track))
+    for frame_index in np.flatnonzero(track.detected):
+        per_frame.evaluate_frame(frame_img, frame_index, track)
+
+    batch = ExerciseSquad(len(track))
+    batch.evaluate_track(track, frame_shape)
+
+    np.testing.assert_array_equal(batch.back_posture, per_frame.back_posture)
+    np.testing.assert_array_equal(batch.head_alignment, per_frame.head_alignment)
+    assert batch.deep_squad_frames == per_frame.deep_squad_frames
+    assert batch.back_posture.any() and batch.head_alignment.any()
+
+
+def test_side_lateral_raise_track_evaluation_matches_frame_evaluation():
+    frame_shape = (1920, 1080, 3)
+    frame_img = np.zeros(frame_shape, dtype=np.uint8)
+    track = make_track(60, seed=1)
+
+    per_frame = ExerciseSideLateralRaises(len(track))
+    for frame_index in np.flatnonzero(track.detected):
+        per_frame.evaluate_frame(frame_img, frame_index, track)
+
+    batch = ExerciseSideLateralRaises(len(track))
+    batch.evaluate_track(track, frame_shape)
+
+    for measure in (
+        "arms_lifting_too_high",
+        "arms_abduction_up_correct_position",
+        "incorrect_elbows_bend_angles",
+        "incorrect_symmetry",
+    ):
+        np.testing.assert_array_equal(
+            getattr(batch, measure), getattr(per_frame, measure), err_msg=measure
+        )
+    np.testing.assert_allclose(
+        batch.left_shoulder_elevation_array, per_frame.left_shoulder_elevation_array
+    )
+
+
+def test_squat_render_ranges_cover_flagged_segments_and_preview():
+    track = make_track(120)
+    squat = ExerciseSquad(len(track))
+    squat.evaluate_track(track, (1920, 1080, 3))
+
+    render_ranges = squat.get_render_ranges(preview_start=10, preview_frames=30)
+    for measure, feedback in squat.build_feedback().items():
+        if feedback.rating == ExerciseRatingEnum.PERFECT:
+            assert render_ranges[measure] == [(10, 40)]
+        elif feedback.video_segments[0].applies_to_full_video:
+            assert render_ranges[measure] == [(0, len(track))]
+        else:
+            assert render_ranges[measure] == [
+                (segment.start_frame, segment.end_frame)
+                for segment in feedback.video_segments
+            ]
+
+    squat.render_ranges = {ExerciseMeasureEnum.SQUAT_DEPTH: [(10, 40)]}
+    measures = list(ExerciseMeasureEnum)
+    assert squat.measures_to_annotate(5, measures) == []
+    assert squat.measures_to_annotate(10, measures) == [ExerciseMeasureEnum.SQUAT_DEPTH]
+
+
+@pytest.mark.skipif(not shutil.which("ffmpeg"), reason="ffmpeg is not installed")
+@pytest.mark.parametrize("shared_encoder", [True, False])
+def test_concurrent_evaluations_write_their_own_videos(
+    tmp_path, monkeypatch, shared_encoder
+):
+    monkeypatch.setattr(settings, "STORAGE_BACKEND", "local")
+    monkeypatch.setattr(settings, "STORAGE_LOCAL_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "VIDEO_SHARED_ENCODER", shared_encoder)
+    get_storage.cache_clear()
+    measures = [
+        ExerciseMeasureEnum.SQUAT_BACK_POSTURE,
+        ExerciseMeasureEnum.SQUAT_DEPTH,
+    ]
+
+    def evaluate(value: int):
+        squat = ExerciseSquad(12)
+        frame = np.full((64, 32, 3), value, dtype=np.uint8)
+        layer = OverlayLayer(
+            0, 0, np.zeros((4, 4, 3), np.uint8), np.zeros((4, 4), np.uint8)
+        )
+        for _ in range(12):
+            squat.write_annotation_layers(frame, {measure: layer for measure in measures})
+        return squat.close_writers()
+
+    try:
+        with ThreadPoolExecutor(2) as executor:
+            keys = [key for keys in executor.map(evaluate, (0, 255)) for key in keys]
+    finally:
+        get_storage.cache_clear()
+
+    assert len(set(keys)) == 4
+    for key in keys:
+        capture = cv2.VideoCapture(str(tmp_path / key))
+        frames = 0
+        while capture.read()[0]:
+            frames += 1
+        capture.release()
+        assert frames == 12, key
@@ -0,0 +1,49 @@
+from app.api.api_v2.schemas.exercise import (
+    ExerciseFeedback,
+    ExerciseFinalEvaluation,
+    VideoSegment,
+)
+from app.api.api_v2.services import pose_evaluation
+from app.api.api_v2.services.pose_evaluation import PoseEvaluationService
+from app.enum import ExerciseEnum, ExerciseMeasureEnum, ExerciseRatingEnum
+
+
+def rated(rating: ExerciseRatingEnum) -> ExerciseFeedback:
+    return ExerciseFeedback(
+        rating=rating,
+        comment=f"{rating.value} comment",
+        video_segments=[VideoSegment(applies_to_full_video=True)],
+    )
+
+
+def test_evaluated_videos_are_summarized_by_rating(tmp_path, monkeypatch):
+    def evaluate_view(video_path, viewpoint, exercise_type, *args):
+        return ExerciseFinalEvaluation(
+            feedback={
+                ExerciseMeasureEnum.SQUAT_BACK_POSTURE: rated(
+                    ExerciseRatingEnum.WARNING
+                ),
+                ExerciseMeasureEnum.SQUAT_DEPTH: rated(ExerciseRatingEnum.DANGEROUS),
+                ExerciseMeasureEnum.HEAD_ALIGNMENT: rated(ExerciseRatingEnum.PERFECT),
+            },
+            s3_video_keys=["results/squat.depth.mp4"],
+        )
+
+    monkeypatch.setattr(pose_evaluation, "evaluate_view", evaluate_view)
+    monkeypatch.setattr(pose_evaluation, "get_landmark_cache", lambda: None)
+    video_path = tmp_path / "side.mp4"
+    video_path.write_bytes(b"video")
+
+    output = PoseEvaluationService().evaluate_videos(
+        [str(video_path)], "user", ExerciseEnum.SQUAT
+    )
+
+    assert output.s3_video_keys == ["results/squat.depth.mp4"]
+    assert output.track_keys == []
+    assert [comment.title for comment in output.feedback.warnings] == [
+        ExerciseMeasureEnum.SQUAT_BACK_POSTURE.value
+    ]
+    assert [comment.title for comment in output.feedback.harmful] == [
+        ExerciseMeasureEnum.SQUAT_DEPTH.value
+    ]
+    assert output.feedback.harmful[0].feedback == "dangerous comment"
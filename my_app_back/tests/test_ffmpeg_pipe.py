@@ -0,0 +1,151 @@
+import io
+import os
+import shutil
+import threading
+import time
+
+import numpy as np
+import pytest
+
+from app.api.api_v2.services.ffmepg_pipe import (
+    AsyncFrameWriter,
+    FFmpegMultiOutputWriter,
+    FFmpegPipeReader,
+    FFmpegPipeWriter,
+    PipeWriteStats,
+)
+
+
+def test_reader_output_size_scales_the_short_side():
+    assert FFmpegPipeReader.get_output_size(1080, 1920, 720) == (720, 1280)
+    # Never upscales, and keeps even dimensions
+    assert FFmpegPipeReader.get_output_size(540, 960, 720) == (540, 960)
+    assert FFmpegPipeReader.get_output_size(1081, 1921, 0) == (1080, 1920)
+
+
+def test_reader_reads_rotation_metadata():
+    assert FFmpegPipeReader._get_rotation({"tags": {"rotate": "90"}}) == 90
+    assert (
+        FFmpegPipeReader._get_rotation({"side_data_list": [{"rotation": -90}]}) == 270
+    )
+    assert FFmpegPipeReader._get_rotation({}) == 0
+
+
+def write_frames(policy: str, frames: int = 20):
+    """Push frames faster than a slow sink can take them."""
+    written = []
+
+    def slow_sink(frame):
+        time.sleep(0.005)
+        written.append(int(frame[0, 0, 0]))
+
+    writer = AsyncFrameWriter(slow_sink, (2, 2, 3), slots=2, policy=policy)
+    for value in range(frames):
+        writer.write(np.full((2, 2, 3), value, dtype=np.uint8))
+    writer.close()
+    return writer, written
+
+
+def test_async_writer_backpressure_policies():
+    writer, written = write_frames("block")
+    assert written == list(range(20))
+    assert writer.frames_blocked > 0
+
+    writer, written = write_frames("drop_oldest")
+    assert writer.frames_dropped > 0
+    assert written[-1] == 19
+    assert len(written) + writer.frames_dropped == 20
+
+    writer, written = write_frames("downsample")
+    assert writer.frames_downsampled > 0
+    assert len(written) + writer.frames_downsampled == 20
+    assert written == sorted(written)
+
+
+def test_async_writer_reraises_sink_errors():
+    def broken_sink(frame):
+        raise BrokenPipeError("ffmpeg exited")
+
+    writer = AsyncFrameWriter(broken_sink, (2, 2, 3), slots=1)
+    with pytest.raises(BrokenPipeError):
+        for _ in range(5):
+            writer.write(np.zeros((2, 2, 3), dtype=np.uint8))
+        writer.close()
+
+
+def test_pipe_stats_writes_frame_buffers():
+    stream = io.BytesIO()
+    stats = PipeWriteStats()
+    frame = np.arange(4 * 6 * 3, dtype=np.uint8).reshape(4, 6, 3)
+
+    stats.write(stream, frame)
+    stats.write(stream, frame[:, ::2])  # non-contiguous view
+
+    assert stream.getvalue() == frame.tobytes() + frame[:, ::2].tobytes()
+    assert stats.frames_written == 2
+    assert stats.bytes_written == frame.nbytes + frame[:, ::2].nbytes
+
+
+class SlowStorage:
+    def __init__(self, delay_s: float):
+        self.delay_s = delay_s
+        self.uploading = 0
+        self.max_uploading = 0
+        self.lock = threading.Lock()
+
+    def put_file(self, local_path, key, content_type=None, move=False):
+        with self.lock:
+            self.uploading += 1
+            self.max_uploading = max(self.max_uploading, self.uploading)
+        time.sleep(self.delay_s)
+        with self.lock:
+            self.uploading -= 1
+
+
+@pytest.mark.skipif(not shutil.which("ffmpeg"), reason="ffmpeg is not installed")
+def test_multi_output_writer_uploads_outputs_concurrently(tmp_path):
+    out_paths = [str(tmp_path / f"measure_{i}.mp4") for i in range(3)]
+    writer = FFmpegMultiOutputWriter(out_paths, width=32, height=32, fps=6)
+    writer.storage = SlowStorage(delay_s=0.2)
+    for _ in range(3):
+        writer.begin_frame()
+        writer.write_tiles()
+
+    keys = writer.close_and_upload()
+
+    assert keys == [f"results/measure_{i}.mp4" for i in range(3)]
+    assert writer.storage.max_uploading == 3
+
+
+class BrokenStorage:
+    def put_file(self, local_path, key, content_type=None, move=False):
+        raise ConnectionError("storage unreachable")
+
+
+@pytest.mark.skipif(not shutil.which("ffmpeg"), reason="ffmpeg is not installed")
+def test_multi_output_writer_raises_failed_uploads(tmp_path):
+    out_paths = [str(tmp_path / f"measure_{i}.mp4") for i in range(2)]
+    writer = FFmpegMultiOutputWriter(out_paths, width=32, height=32, fps=6)
+    writer.storage = BrokenStorage()
+    writer.begin_frame()
+    writer.write_tiles()
+
+    with pytest.raises(ConnectionError):
+        writer.close_and_upload()
+    # The local files are removed all the same
+    assert not any(os.path.exists(path) for path in out_paths)
+
+
+@pytest.mark.skipif(not shutil.which("ffmpeg"), reason="ffmpeg is not installed")
+def test_writer_stops_ffmpeg_when_its_feeder_failed(tmp_path):
+    writer = FFmpegPipeWriter(str(tmp_path / "video.mp4"), 32, 32, queue_slots=2)
+
+    def broken_sink(frame):
+        raise BrokenPipeError("ffmpeg exited")
+
+    writer.async_writer.sink = broken_sink
+    writer.write(np.zeros((32, 32, 3), dtype=np.uint8))
+
+    with pytest.raises(BrokenPipeError):
+        writer.close()
+    assert writer.proc.poll() is not None
@@ -0,0 +1,58 @@
+import os
+
+import numpy as np
+import pytest
+
+from app.api.api_v2.services.landmark_cache import DiskLandmarkCache, get_file_hash
+from app.api.api_v2.services.landmark_track import LandmarkTrack
+from tests.test_landmark_track import make_landmarks
+
+
+def make_track() -> LandmarkTrack:
+    track = LandmarkTrack()
+    for frame_index in range(9):
+        track.set_frame(frame_index, None if frame_index == 4 else make_landmarks(0.1))
+    track.set_frame(12, make_landmarks(0.4))
+    track.interpolate(8, 12)
+    return track
+
+
+def test_track_bytes_round_trip():
+    track = make_track()
+    restored = LandmarkTrack.from_bytes(track.to_bytes())
+
+    assert len(restored) == len(track)
+    np.testing.assert_array_equal(restored.detected, track.detected)
+    np.testing.assert_array_equal(restored.interpolated, track.interpolated)
+    np.testing.assert_array_equal(restored.data, track.data)
+
+    with pytest.raises(ValueError):
+        LandmarkTrack.from_bytes(track.to_bytes()[:-1])
+    empty = LandmarkTrack.from_bytes(LandmarkTrack().to_bytes())
+    assert len(empty) == 0
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    track = make_track()
+    entry_size = len(track.to_bytes())
+    cache = DiskLandmarkCache(str(tmp_path), max_bytes=2 * entry_size)
+
+    cache.put("a", track)
+    cache.put("b", track)
+    os.utime(tmp_path / "a.lmtk", (0, 0))
+    os.utime(tmp_path / "b.lmtk", (1, 1))
+    assert cache.get("a") is not None  # a becomes the most recently used
+    cache.put("c", track)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+    assert not [name for name in os.listdir(tmp_path) if name.endswith(".tmp")]
+
+
+def test_file_hash_depends_on_contents(tmp_path):
+    first, second = tmp_path / "first.mp4", tmp_path / "second.mp4"
+    first.write_bytes(b"video" * 1000)
+    second.write_bytes(b"video" * 1000)
+    assert get_file_hash(str(first)) == get_file_hash(str(second))
+    second.write_bytes(b"video" * 999 + b"VIDEO")
+    assert get_file_hash(str(first)) != get_file_hash(str(second))
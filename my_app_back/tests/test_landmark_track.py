@@ -0,0 +1,82 @@
+import numpy as np
+from mediapipe.framework.formats import landmark_pb2
+
+from app.api.api_v2.services.landmark_track import (
+    NUM_LANDMARKS,
+    LandmarkTrack,
+    PoseLandmark,
+)
+
+
+def make_landmarks(offset: float) -> landmark_pb2.NormalizedLandmarkList:
+    landmarks = landmark_pb2.NormalizedLandmarkList()
+    for index in range(NUM_LANDMARKS):
+        landmarks.landmark.add(
+            x=offset + index / 100, y=offset, z=0.0, visibility=0.5
+        )
+    return landmarks
+
+
+def test_track_grows_in_chunks_and_keeps_frames():
+    track = LandmarkTrack(capacity=2, chunk_size=4)
+    for frame_index in range(7):
+        track.append(make_landmarks(frame_index / 10))
+
+    assert len(track) == 7
+    assert track.data.shape == (7, NUM_LANDMARKS, 4)
+    assert track.data.dtype == np.float32
+    np.testing.assert_allclose(
+        track.point(3, PoseLandmark.LEFT_HIP),
+        [0.3 + PoseLandmark.LEFT_HIP / 100, 0.3],
+        rtol=1e-6,
+    )
+    assert track.points(PoseLandmark.NOSE).shape == (7, 2)
+
+
+def test_track_flags_missing_poses():
+    track = LandmarkTrack()
+    track.append(make_landmarks(0.1))
+    track.append(None)
+
+    assert track.detected.tolist() == [True, False]
+    assert np.isnan(track.point(1, PoseLandmark.LEFT_KNEE)).all()
+
+
+def test_track_rebuilds_landmark_list():
+    track = LandmarkTrack()
+    track.append(make_landmarks(0.2))
+
+    landmark_list = track.to_landmark_list(0)
+    assert len(landmark_list.landmark) == NUM_LANDMARKS
+    assert abs(landmark_list.landmark[PoseLandmark.LEFT_EAR].y - 0.2) < 1e-6
+
+
+def test_track_interpolates_skipped_frames():
+    track = LandmarkTrack()
+    track.set_frame(0, make_landmarks(0.0))
+    track.set_frame(4, make_landmarks(0.4))
+    track.interpolate(0, 4)
+
+    assert track.detected.tolist() == [True] * 5
+    assert track.interpolated.tolist() == [False, True, True, True, False]
+    np.testing.assert_allclose(
+        track.points(PoseLandmark.NOSE)[:, 1], [0.0, 0.1, 0.2, 0.3, 0.4], atol=1e-6
+    )
+
+    track.set_frame(7, None)
+    track.interpolate(4, 7)
+    assert track.detected.tolist()[5:] == [False, False, False]
+
+
+def test_track_stitches_chunks():
+    track = LandmarkTrack()
+    for frame_index in range(6):
+        track.append(make_landmarks(frame_index / 10) if frame_index != 2 else None)
+
+    stitched = LandmarkTrack(capacity=6)
+    stitched.merge(3, track.slice(3, 6))
+    stitched.merge(0, track.slice(0, 3))
+
+    assert len(stitched) == 6
+    assert stitched.detected.tolist() == track.detected.tolist()
+    np.testing.assert_array_equal(stitched.data, track.data)
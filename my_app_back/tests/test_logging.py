@@ -0,0 +1,71 @@
+import json
+import logging
+
+from app.core.config import settings
+from app.core.logging import (
+    JsonFormatter,
+    LogSampler,
+    debug,
+    debug_logging,
+    get_logger,
+    is_debug_enabled,
+    is_debug_override,
+)
+from app.main import app
+
+
+def test_debug_logging_overrides_the_level_in_its_context(caplog):
+    # The handlers let DEBUG through, only the logger level filters it out
+    caplog.set_level(logging.DEBUG)
+    logger = get_logger("tests.logging")
+    logger.setLevel(logging.INFO)
+
+    debug(logger, "frame %s", 1)
+    assert not is_debug_enabled(logger)
+    with debug_logging():
+        assert is_debug_enabled(logger)
+        debug(logger, "frame %s", 2)
+    debug(logger, "frame %s", 3)
+
+    assert [record.getMessage() for record in caplog.records] == ["frame 2"]
+    assert caplog.records[0].levelno == logging.DEBUG
+
+
+def test_log_sampler_keeps_one_event_out_of_every():
+    sample = LogSampler(3)
+    assert [sample() for _ in range(7)] == [True, False, False, True, False, False, True]
+
+
+def test_json_formatter_includes_extra_fields():
+    record = logging.makeLogRecord(
+        {
+            "name": "app.video",
+            "levelno": logging.INFO,
+            "levelname": "INFO",
+            "msg": "processed %s",
+            "args": ("a.mp4",),
+            "frames": 120,
+        }
+    )
+    entry = json.loads(JsonFormatter().format(record))
+    assert entry["message"] == "processed a.mp4"
+    assert entry["logger"] == "app.video" and entry["level"] == "INFO"
+    assert entry["frames"] == 120
+
+
+def test_debug_header_needs_the_configured_token(client, monkeypatch):
+    @app.get("/debug-override")
+    def debug_override():
+        return {"debug": is_debug_override()}
+
+    def get_debug(token: str) -> bool:
+        response = client.get("/debug-override", headers={"X-Debug-Logging": token})
+        return response.json()["debug"]
+
+    try:
+        assert not get_debug("secret")  # disabled without LOG_DEBUG_TOKEN
+        monkeypatch.setattr(settings, "LOG_DEBUG_TOKEN", "secret")
+        assert get_debug("secret")
+        assert not get_debug("1")
+    finally:
+        app.router.routes.pop()
@@ -0,0 +1,33 @@
+import pytest
+
+from app.api.api_v2.services.pipeline import FramePipeline
+
+
+def test_pipeline_runs_stages_in_order():
+    results = []
+    pipeline = FramePipeline(queue_size=2)
+    pipeline.add_stage("double", lambda item: item * 2)
+    pipeline.add_stage("drop_odd", lambda item: item if item % 4 == 0 else None)
+    pipeline.add_stage("collect", results.append)
+
+    stats = pipeline.run(range(10), "source")
+
+    assert results == [0, 4, 8, 12, 16]
+    assert stats["source"].processed == 10
+    assert stats["double"].processed == 10
+    assert stats["collect"].processed == 5
+    assert stats["double"].max_queue_depth <= 2
+
+
+def test_pipeline_reraises_stage_errors():
+    def fail(item):
+        if item == 3:
+            raise ValueError("bad frame")
+        return item
+
+    pipeline = FramePipeline(queue_size=1, poll_interval=0.01)
+    pipeline.add_stage("fail", fail)
+    pipeline.add_stage("sink", lambda item: None)
+
+    with pytest.raises(ValueError, match="bad frame"):
+        pipeline.run(iter(range(1000)))
@@ -0,0 +1,30 @@
+import threading
+
+from app.api.api_v2.services.pose_pool import PosePool
+
+
+def test_pool_reuses_warm_graphs():
+    pool = PosePool(size=1, static_image_mode=False, model_complexity=1)
+    pool.warm_up()
+
+    with pool.checkout() as first:
+        pass
+    with pool.checkout() as second:
+        pass
+    assert first is second
+
+    # With every graph checked out, the next checkout waits for one to come back
+    checked_out = []
+
+    def wait_for_graph():
+        with pool.checkout() as pose:
+            checked_out.append(pose)
+
+    with pool.checkout():
+        waiter = threading.Thread(target=wait_for_graph)
+        waiter.start()
+        waiter.join(timeout=0.2)
+        assert checked_out == []
+    waiter.join(timeout=5)
+    assert checked_out == [first]
+    pool.close()
@@ -0,0 +1,35 @@
+from app.api.api_v2.services.progress import ProgressRelay, ProgressReporter
+
+
+def test_reporter_rate_limits_frame_events():
+    events = []
+    reporter = ProgressReporter(events.append, viewpoint="side", min_interval_s=60)
+
+    reporter.start_stage("tracking", frames=10, counter="frames_inferred")
+    for _ in range(4):
+        reporter.add("frames_decoded")
+        reporter.add("frames_inferred")
+    # Stage changes are always sent, frame counts only once per interval
+    assert [event.stage for event in events] == ["tracking"]
+
+    snapshot = reporter.snapshot()
+    assert snapshot.frames_decoded == snapshot.frames_inferred == 4
+    assert snapshot.stage_frames_done == 4 and snapshot.eta_s is not None
+
+    reporter.finish()
+    assert events[-1].stage == "done" and events[-1].frames_inferred == 4
+
+
+def test_reporter_without_sink_only_counts():
+    reporter = ProgressReporter()
+    reporter.start_stage("rendering", frames=5)
+    reporter.add("frames_decoded", 5)
+    assert reporter.snapshot().stage_frames_done == 5
+
+
+def test_relay_hands_the_report_itself_to_inline_tasks():
+    events = []
+    with ProgressRelay(events.append, in_workers=False) as sink:
+        assert sink == events.append
+        ProgressReporter(sink, viewpoint="side").finish()
+    assert [event.stage for event in events] == ["done"]
@@ -0,0 +1,77 @@
+from app.api.api_v2.schemas.rescore import RescoreSession
+from app.api.api_v2.schemas.thresholds import SquatThresholds, ThresholdProfile
+from app.api.api_v2.services import rescore
+from app.api.api_v2.services.exercise import ExerciseSquad
+from app.api.api_v2.services.storage import LocalStorageBackend
+from app.api.api_v2.services.track_archive import TrackArchive
+from app.enum import ExerciseEnum, ExerciseMeasureEnum, ExerciseRatingEnum
+from tests.test_exercise import make_track
+
+FRAME_SHAPE = (1920, 1080, 3)
+
+
+def test_rescore_with_default_profile_matches_processing():
+    track = make_track(120)
+    squat = ExerciseSquad(len(track))
+    squat.evaluate_track(track, FRAME_SHAPE)
+
+    evaluation = rescore.rescore_track(track, ExerciseEnum.SQUAT, FRAME_SHAPE)
+
+    assert evaluation.feedback == squat.build_feedback()
+    assert evaluation.s3_video_keys == []
+
+
+def test_rescore_applies_profile_thresholds():
+    track = make_track(120)
+    lenient = ThresholdProfile(
+        squat=SquatThresholds(
+            back_posture_max_angle=180, head_alignment_max_offset=FRAME_SHAPE[1]
+        )
+    )
+
+    evaluation = rescore.rescore_track(track, ExerciseEnum.SQUAT, FRAME_SHAPE, lenient)
+
+    for measure in (
+        ExerciseMeasureEnum.SQUAT_BACK_POSTURE,
+        ExerciseMeasureEnum.HEAD_ALIGNMENT,
+    ):
+        assert evaluation.feedback[measure].rating == ExerciseRatingEnum.PERFECT
+
+
+def test_rescore_sessions_reads_tracks_from_the_archive(tmp_path, monkeypatch):
+    archive = TrackArchive(LocalStorageBackend(str(tmp_path)), "tracks/")
+    stored = archive.get_key("stored")
+    archive.put(stored, make_track(120), FRAME_SHAPE)
+    monkeypatch.setattr(rescore, "get_track_archive", lambda: archive)
+
+    track, frame_shape = archive.get(stored)
+    assert len(track) == 120 and frame_shape == FRAME_SHAPE
+
+    results = rescore.rescore_sessions(
+        [
+            RescoreSession(track_key=key, exercise_type=exercise_type)
+            for key, exercise_type in (
+                (stored, ExerciseEnum.SQUAT),
+                (archive.get_key("missing"), ExerciseEnum.SQUAT),
+                (stored, ExerciseEnum.PULL_UP),
+                (stored, ExerciseEnum.SIDE_LATERAL_RAISE),
+            )
+        ],
+        ThresholdProfile(),
+    )
+
+    assert results[0].evaluation is not None and results[0].error is None
+    assert results[1].evaluation is None and "not found" in results[1].error
+    assert results[2].evaluation is None and "cannot be rescored" in results[2].error
+    # Processed frame by frame, but its stored tracks can be rescored
+    assert results[3].evaluation is not None and results[3].error is None
+
+
+class BrokenStorage:
+    def put_stream(self, key, stream, content_type=None):
+        raise ConnectionError("storage unreachable")
+
+
+def test_failed_archive_writes_are_reported_not_raised():
+    archive = TrackArchive(BrokenStorage(), "tracks/")
+    assert not archive.put(archive.get_key("stored"), make_track(10), FRAME_SHAPE)
@@ -0,0 +1,27 @@
+from app.api.api_v2.services.landmark_track import LandmarkTrack
+from app.api.api_v2.services.sampling import AdaptiveInferenceStride
+from tests.test_landmark_track import make_landmarks
+
+
+def run_stride(offsets, max_stride=4):
+    """Infer the frames chosen by the stride over a pose moving by offsets."""
+    track = LandmarkTrack()
+    stride = AdaptiveInferenceStride(fps=30, max_stride=max_stride, motion_threshold=0.1)
+    inferred = []
+    for frame_index, offset in enumerate(offsets):
+        if stride.should_infer(frame_index):
+            track.set_frame(frame_index, make_landmarks(offset))
+            inferred.append(frame_index)
+            stride.update(frame_index, track)
+    return inferred
+
+
+def test_stride_grows_while_still_and_resets_on_motion():
+    still = [0.5] * 16
+    assert run_stride(still) == [0, 1, 3, 7, 11, 15]
+
+    # From frame 7 on the pose moves 0.02 per frame, i.e. 0.6 image units/s
+    moving = [0.5] * 8 + [0.5 + 0.02 * i for i in range(1, 9)]
+    assert run_stride(moving) == [0, 1, 3, 7, 11, 12, 13, 14, 15]
+
+    assert run_stride(still, max_stride=1) == list(range(16))
@@ -0,0 +1,38 @@
+import io
+import os
+
+import pytest
+
+from app.api.api_v2.services.storage import LocalStorageBackend, get_storage
+from app.core.config import settings
+
+
+def test_local_storage_moves_files_and_reads_ranges(tmp_path):
+    storage = LocalStorageBackend(str(tmp_path / "storage"))
+    local_path = tmp_path / "video.mp4"
+    local_path.write_bytes(b"0123456789")
+
+    storage.put_file(str(local_path), "results/video.mp4", move=True)
+    storage.put_stream("raw/user/squat/videos.zip", io.BytesIO(b"zip"))
+
+    assert not local_path.exists()
+    assert storage.get_range("results/video.mp4", 2, 5) == b"234"
+    assert storage.stat("results/video.mp4").size == 10
+    assert storage.list("results/") == ["results/video.mp4"]
+    assert storage.list() == ["raw/user/squat/videos.zip", "results/video.mp4"]
+    assert os.path.isfile(storage.get_url("results/video.mp4"))
+
+    with pytest.raises(FileNotFoundError):
+        storage.get_stream("results/missing.mp4")
+    with pytest.raises(ValueError):
+        storage.stat("../outside")
+
+
+def test_s3_storage_uses_the_configured_bucket(monkeypatch):
+    monkeypatch.setattr(settings, "STORAGE_BACKEND", "s3")
+    monkeypatch.setattr(settings, "STORAGE_S3_BUCKET", "videos-bucket")
+    get_storage.cache_clear()
+    try:
+        assert get_storage().bucket == "videos-bucket"
+    finally:
+        get_storage.cache_clear()
@@ -0,0 +1,117 @@
+import os
+import time
+
+import pytest
+
+from app.api.api_v2.api.dependencies.services import (
+    get_job_service,
+    get_pose_evaluation_service,
+)
+from app.api.api_v2.schemas.feedback import Feedback
+from app.api.api_v2.schemas.job import Progress
+from app.api.api_v2.schemas.pose import OutputPose
+from app.api.api_v2.services.jobs import (
+    JobService,
+    LocalJobBackend,
+    _lock_single_process,
+)
+from app.main import app
+
+
+class RecordingPoseEvaluationService:
+    def __init__(self):
+        self.videos = {}
+
+    def evaluate_videos(self, video_paths, user_id, exercise_type, report_progress):
+        report_progress(Progress(stage="tracking", stage_frames=90, frames_decoded=1))
+        if user_id == "slow":
+            # Long enough for the event stream to see the progress
+            time.sleep(0.5)
+        if user_id == "broken":
+            raise RuntimeError("pose evaluation failed")
+        for video_path in video_paths:
+            with open(video_path, "rb") as f:
+                self.videos[video_path] = f.read()
+        return OutputPose(
+            feedback=Feedback(exercise="squat", fixes=[], warnings=[], harmful=[]),
+            s3_video_keys=[],
+        )
+
+
+def wait_for_job(client, job_id: str) -> dict:
+    for _ in range(100):
+        job = client.get(f"/api/v2/video/jobs/{job_id}").json()
+        if job["status"] in ("done", "error"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"Job {job_id} did not finish")
+
+
+def test_upload_streams_videos_to_a_background_job(client):
+    service = RecordingPoseEvaluationService()
+    job_service = JobService(LocalJobBackend(max_running=1, ttl_s=60))
+    app.dependency_overrides[get_pose_evaluation_service] = lambda: service
+    app.dependency_overrides[get_job_service] = lambda: job_service
+
+    side, front = os.urandom(3 * 1024 * 1024 + 7), os.urandom(1024)
+    response = client.post(
+        "/api/v2/video/upload",
+        files=[
+            ("files", ("side.mov", side, "video/quicktime")),
+            ("files", ("front.mp4", front, "video/mp4")),
+        ],
+        data={"exercise_type": "squat", "user_id": "user"},
+    )
+    assert response.status_code == 202
+    job = wait_for_job(client, response.json()["job_id"])
+
+    assert job["status"] == "done"
+    assert job["progress"]["stage"] == "tracking"
+    assert job["result"]["feedback"]["exercise"] == "squat"
+    assert list(service.videos.values()) == [side, front]
+    assert [os.path.splitext(path)[1] for path in service.videos] == [".mov", ".mp4"]
+    assert not any(os.path.exists(path) for path in service.videos)
+
+    response = client.post(
+        "/api/v2/video/upload",
+        files=[("files", ("side.mp4", side, "video/mp4"))],
+        data={"exercise_type": "squat", "user_id": "broken"},
+    )
+    job = wait_for_job(client, response.json()["job_id"])
+    assert job["status"] == "error" and job["error"] == "pose evaluation failed"
+
+    assert client.get("/api/v2/video/jobs/unknown").status_code == 404
+
+
+def test_job_progress_is_streamed_as_server_sent_events(client):
+    job_service = JobService(LocalJobBackend(max_running=1, ttl_s=60))
+    app.dependency_overrides[get_pose_evaluation_service] = (
+        RecordingPoseEvaluationService
+    )
+    app.dependency_overrides[get_job_service] = lambda: job_service
+
+    response = client.post(
+        "/api/v2/video/upload",
+        files=[("files", ("side.mp4", b"video", "video/mp4"))],
+        data={"exercise_type": "squat", "user_id": "slow"},
+    )
+    job_id = response.json()["job_id"]
+
+    with client.stream("GET", f"/api/v2/video/jobs/{job_id}/events") as events:
+        assert events.headers["content-type"].startswith("text/event-stream")
+        names = [
+            line.split(": ", 1)[1]
+            for line in events.iter_lines()
+            if line.startswith("event: ")
+        ]
+
+    assert "progress" in names
+    assert names[-1] == "done"
+
+
+def test_local_jobs_lock_the_backend_to_one_process(tmp_path):
+    lock_path = str(tmp_path / "jobs.lock")
+    _lock_single_process(lock_path)
+    # flock locks conflict between file descriptors, as between worker processes
+    with pytest.raises(RuntimeError, match="single process"):
+        _lock_single_process(lock_path)
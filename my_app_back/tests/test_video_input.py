@@ -0,0 +1,65 @@
+import io
+import os
+import re
+import zipfile
+
+from app.api.api_v2.services.storage import LocalStorageBackend
+from app.api.api_v2.services.video_input import RangeReader, get_video_sources
+
+
+class CountingStorage(LocalStorageBackend):
+    """Local storage recording the ranged reads, like the GETs of S3."""
+
+    def __init__(self, root: str):
+        super().__init__(root)
+        self.ranges = []
+
+    def get_range(self, key: str, start: int, end: int) -> bytes:
+        self.ranges.append((start, end))
+        return super().get_range(key, start, end)
+
+
+def test_range_reader_reads_and_seeks_in_blocks(tmp_path):
+    payload = bytes(range(256)) * 40
+    storage = CountingStorage(str(tmp_path))
+    storage.put_stream("video.mp4", io.BytesIO(payload))
+    reader = io.BufferedReader(
+        RangeReader(storage, "video.mp4", block_size=1000, readahead=2), 1000
+    )
+
+    assert reader.read() == payload
+    # A sequential read fetches every block once, the last one is shorter
+    blocks = [(start, start + 1000) for start in range(0, 10000, 1000)]
+    assert sorted(storage.ranges) == blocks + [(10000, 10240)]
+    assert reader.raw.requests == len(storage.ranges)
+    reader.seek(-10, io.SEEK_END)
+    assert reader.read(100) == payload[-10:]
+    reader.seek(2500)
+    assert reader.read(600) == payload[2500:3100]
+    reader.close()
+
+
+def test_zip_members_are_read_in_place_or_extracted(tmp_path):
+    stored, deflated = os.urandom(5000), b"frame" * 2000
+    archive = io.BytesIO()
+    with zipfile.ZipFile(archive, "w") as z:
+        z.writestr("videos/", b"")
+        z.writestr("videos/side.mp4", stored, zipfile.ZIP_STORED)
+        z.writestr("videos/front.mp4", deflated, zipfile.ZIP_DEFLATED)
+    storage = LocalStorageBackend(str(tmp_path / "storage"))
+    storage.put_stream("raw/user/squat/videos.zip", io.BytesIO(archive.getvalue()))
+
+    side, front = get_video_sources(storage, "raw/user/squat/videos.zip")
+
+    # The stored member is a byte range of the object URL
+    match = re.fullmatch(r"subfile,,start,(\d+),end,(\d+),,:(.*)", side.path)
+    start, end = int(match.group(1)), int(match.group(2))
+    assert archive.getvalue()[start:end] == stored
+    assert match.group(3) == storage.get_url("raw/user/squat/videos.zip")
+
+    try:
+        with open(front.path, "rb") as f:
+            assert f.read() == deflated
+    finally:
+        os.remove(front.path)
+    assert side.content_hash != front.content_hash
@@ -0,0 +1,71 @@
+import importlib
+import json
+import os
+import sys
+import types
+
+import pytest
+
+from app.core.config import settings
+
+WORKER_DIR = os.path.join(os.path.dirname(__file__), "..", "architecture", "worker")
+
+
+class FakeDynamoDB:
+    def __init__(self):
+        self.updates = []
+
+    def update_item(self, **kwargs):
+        values = kwargs["ExpressionAttributeValues"]
+        self.updates.append((kwargs["Key"]["userId"]["S"], values[":s"]["S"]))
+
+
+@pytest.fixture
+def worker(monkeypatch):
+    monkeypatch.setenv("TABLE", "analyses")
+    monkeypatch.setenv("AWS_DEFAULT_REGION", "eu-west-1")
+    monkeypatch.setattr(settings, "POSE_POOL_WARM_UP", False)
+    monkeypatch.syspath_prepend(WORKER_DIR)
+    module = importlib.import_module("worker_lambda_function")
+    monkeypatch.setattr(module, "dynamodb", FakeDynamoDB())
+    yield module
+    sys.modules.pop("worker_lambda_function", None)
+
+
+def make_record(message_id: str, bucket: str, key: str) -> dict:
+    body = {"Records": [{"s3": {"bucket": {"name": bucket}, "object": {"key": key}}}]}
+    return {"messageId": message_id, "body": json.dumps(body)}
+
+
+def test_handler_reports_only_the_failed_records(worker, monkeypatch):
+    def evaluate_stored_object(key, user_id, exercise_type):
+        if user_id == "broken":
+            raise RuntimeError("decoding failed")
+        feedback = types.SimpleNamespace(model_dump_json=lambda: "{}")
+        return types.SimpleNamespace(feedback=feedback, track_keys=["tracks/a.lmtk"])
+
+    service = worker.pose_evaluation_service
+    monkeypatch.setattr(service, "evaluate_stored_object", evaluate_stored_object)
+    bucket = service.storage.bucket
+
+    response = worker.lambda_handler(
+        {
+            "Records": [
+                make_record("1", bucket, "raw/ok/squat/a.zip"),
+                make_record("2", bucket, "raw/broken/squat/a.zip"),
+                make_record("3", bucket, "raw/ok/not-an-exercise/a.zip"),
+                make_record("4", "another-bucket", "raw/ok/squat/a.zip"),
+            ]
+        },
+        None,
+    )
+
+    assert response == {
+        "batchItemFailures": [{"itemIdentifier": i} for i in ("2", "3", "4")]
+    }
+    assert sorted(worker.dynamodb.updates) == [
+        ("broken", "error"),
+        ("broken", "processing"),
+        ("ok", "done"),
+        ("ok", "processing"),
+    ]
@@ -0,0 +1,33 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from app.api.api_v2.services import workers
+
+running = 0
+max_running = 0
+lock = threading.Lock()
+
+
+def slow_square(x: int) -> int:
+    global running, max_running
+    with lock:
+        running += 1
+        max_running = max(max_running, running)
+    time.sleep(0.02)
+    with lock:
+        running -= 1
+    return x * x
+
+
+def test_map_in_workers_caps_the_tasks_of_a_call(monkeypatch):
+    # A larger shared pool: the cap comes from the call, not from the pool size
+    pool = ThreadPoolExecutor(8)
+    monkeypatch.setattr(workers, "get_worker_executor", lambda: pool)
+    monkeypatch.setattr(workers, "get_max_workers", lambda: 2)
+
+    results = workers.map_in_workers(slow_square, [(x,) for x in range(6)])
+
+    assert results == [x * x for x in range(6)]
+    assert max_running == 2
+    pool.shutdown()